@@ -0,0 +1,31 @@
+"""
+Profil ASGI : gunicorn supervise des workers uvicorn qui servent
+``azigroup_project.asgi`` avec les vues asynchrones (``ASYNC_VIEWS``).
+
+Chaque worker garde de nombreuses connexions ouvertes sur une boucle asyncio :
+les clients lents (réseaux mobiles, envois au goutte-à-goutte) n'immobilisent
+plus un worker comme avec les workers synchrones.
+
+    gunicorn -c azigroup_project/gunicorn_asgi.py
+
+Réglages par variables d'environnement : PORT, WEB_CONCURRENCY, GUNICORN_TIMEOUT.
+
+Sous ASGI, Django exécute le code synchrone de chaque requête dans un thread
+qui lui est propre : une connexion persistante n'y serait jamais réutilisée
+et resterait ouverte. Les connexions persistantes sont donc désactivées ;
+avec PostgreSQL, préférer le pool (DB_POOL=True).
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+os.environ['DB_CONN_MAX_AGE'] = '0'
+
+wsgi_app = 'azigroup_project.asgi:application'
+worker_class = 'uvicorn_worker.UvicornWorker'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# Un worker asynchrone par cœur suffit : l'attente réseau ne bloque pas
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -59,6 +59,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Inactif sauf si REQUEST_PROFILING est activé (voir plus bas)
+    'website.profiling.RequestProfilingMiddleware',
+    # Mémoïsation par requête des objets lus sur toutes les pages (website.memo)
+    'website.memo.RequestMemoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,26 +92,116 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'azigroup_project.wsgi.application'
+ASGI_APPLICATION = 'azigroup_project.asgi.application'
+
+# Versions asynchrones des pages et API les plus lues (website.async_views), pour
+# un déploiement ASGI : gunicorn -c azigroup_project/gunicorn_asgi.py
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
 # Database configuration
+# Connexions persistantes : durée de vie en secondes (0 = une connexion par requête)
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+# Vérifie qu'une connexion réutilisée répond encore avant la première requête SQL
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+# Pool de connexions dans le processus (PostgreSQL, psycopg 3 et psycopg-pool requis) ;
+# remplace les connexions persistantes
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+
 # Pour PostgreSQL (production)
 if config('DATABASE_URL', default=''):
     import dj_database_url
     DATABASES = {
-        'default': dj_database_url.parse(config('DATABASE_URL'))
+        'default': dj_database_url.parse(
+            config('DATABASE_URL'),
+            conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
     }
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        # Moteur de Django + option pool (website/db/postgresql)
+        DATABASES['default']['ENGINE'] = 'website.db.postgresql'
+        if DB_POOL:
+            DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            }
 else:
-    # SQLite pour le développement
+    # SQLite pour le développement : journal WAL (lectures concurrentes d'une
+    # écriture), synchronisation allégée et lecture du fichier par mmap
+    SQLITE_JOURNAL_MODE = config('SQLITE_JOURNAL_MODE', default='WAL')
+    SQLITE_SYNCHRONOUS = config('SQLITE_SYNCHRONOUS', default='NORMAL')
+    SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'website.db.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {
+                'init_command': (
+                    f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}; '
+                    f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}; '
+                    f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}'
+                ),
+            },
+        }
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Cache partagé (Redis, paquet `redis` requis) en production, mémoire locale en développement
+if config('REDIS_URL', default=''):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('REDIS_URL'),
         }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'azigroup',
+        }
+    }
+
+# Durée de vie (secondes) des versions des valeurs gardées par processus (objet
+# actif, paramètres, snapshot du site, cartes, pages) quand le cache n'est pas partagé : délai maximal avant
+# qu'un worker voie une modification faite par un autre (voir website.versions)
+LOCAL_VERSION_TIMEOUT = config('LOCAL_VERSION_TIMEOUT', default=30, cast=int)
+
+# Durée de vie (secondes) du snapshot logo/navbar/footer
+SITE_CHROME_CACHE_TIMEOUT = config('SITE_CHROME_CACHE_TIMEOUT', default=300, cast=int)
+
+# Durée de vie du snapshot des paramètres (Setting), versionné à chaque modification
+SITE_SETTINGS_CACHE_TIMEOUT = config('SITE_SETTINGS_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Durée de vie des cartes entreprises précalculées (recalculées à l'enregistrement)
+COMPANY_CARDS_CACHE_TIMEOUT = config('COMPANY_CARDS_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Cache des pages publiques, purgé par modèle lors des modifications
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=True, cast=bool)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Durée de vie du snapshot partagé de l'index d'autocomplétion
+SUGGEST_INDEX_TIMEOUT = config('SUGGEST_INDEX_TIMEOUT', default=3600, cast=int)
+
+# Sitemap : URL par fichier avant découpage en index + sections (limite du protocole : 50 000)
+SITEMAP_MAX_URLS = config('SITEMAP_MAX_URLS', default=45000, cast=int)
+SITEMAP_CACHE_TIMEOUT = config('SITEMAP_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Réponses JSON en flux pour les API (mémoire constante)
+STREAMING_JSON_API = config('STREAMING_JSON_API', default=False, cast=bool)
+STREAMING_JSON_CHUNK_SIZE = config('STREAMING_JSON_CHUNK_SIZE', default=2000, cast=int)
 
 
 # Password validation
@@ -151,10 +245,98 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Build des fichiers statiques (collectstatic) : CSS/JS minifiés, noms hachés, copies
+# .gz/.br, servis par WhiteNoise avec Cache-Control immutable (website/assets.py)
+STATIC_BUILD = config('STATIC_BUILD', default=not DEBUG, cast=bool)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'website.assets.AssetStorage' if STATIC_BUILD
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+if STATIC_BUILD:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+    )
+
+# CSS critique inline par page (manage.py build_critical_css), feuille complète en asynchrone
+CRITICAL_CSS_ENABLED = config('CRITICAL_CSS_ENABLED', default=True, cast=bool)
+CRITICAL_CSS_DIR = BASE_DIR / 'static' / 'css' / 'critical'
+CRITICAL_CSS_PAGES = ['index', 'companies', 'company_detail', 'news_list', 'news_detail']
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Dérivés responsive des images envoyées (largeurs en pixels, formats par priorité)
+# AVIF n'est produit que si Pillow dispose d'un encodeur (ex. pillow-avif-plugin)
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 1024, 1600]
+IMAGE_DERIVATIVE_FORMATS = ['avif', 'webp', 'jpeg']
+IMAGE_DERIVATIVE_CACHE_TIMEOUT = 3600
+
+# File de tâches d'arrière-plan (manage.py run_worker)
+# TASKS_ALWAYS_EAGER exécute les tâches dans la requête (développement sans worker)
+TASKS_ALWAYS_EAGER = config('TASKS_ALWAYS_EAGER', default=False, cast=bool)
+TASK_WORKER_CONCURRENCY = config('TASK_WORKER_CONCURRENCY', default=2, cast=int)
+TASK_WORKER_POOL = config('TASK_WORKER_POOL', default='thread')
+TASK_VISIBILITY_TIMEOUT = config('TASK_VISIBILITY_TIMEOUT', default=300, cast=int)
+
+# E-mails
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@azigroup.com')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+
+# Destinataires des notifications de nouveaux messages de contact
+CONTACT_NOTIFICATION_EMAILS = config('CONTACT_NOTIFICATION_EMAILS', default='', cast=Csv())
+
+# Import en masse (/api/contacts/bulk/) : jetons des partenaires, taille des requêtes et des lots
+CONTACT_BULK_API_TOKENS = config('CONTACT_BULK_API_TOKENS', default='', cast=Csv())
+CONTACT_BULK_MAX_ROWS = config('CONTACT_BULK_MAX_ROWS', default=5000, cast=int)
+CONTACT_BULK_BATCH_SIZE = config('CONTACT_BULK_BATCH_SIZE', default=500, cast=int)
+
+# Limitation de débit (POST) par vue, par IP et par email : '<requêtes>/<période>' (s, m, h, d)
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+RATE_LIMITS = {
+    'contact': config('RATE_LIMIT_CONTACT', default='5/10m'),
+    'contact_ajax': config('RATE_LIMIT_CONTACT_AJAX', default='5/10m'),
+    'api_contacts_bulk': config('RATE_LIMIT_CONTACT_BULK', default='60/m'),
+}
+# Nombre de proxys de confiance devant l'application (X-Forwarded-For), 0 sans proxy
+RATE_LIMIT_PROXY_COUNT = config('RATE_LIMIT_PROXY_COUNT', default=0, cast=int)
+
+# Instrumentation des requêtes : en-tête Server-Timing, logs website.profiling
+# et percentiles par vue sur /api/profiling/ (réservé à l'équipe)
+REQUEST_PROFILING = config('REQUEST_PROFILING', default=False, cast=bool)
+REQUEST_PROFILING_SAMPLE_RATE = config('REQUEST_PROFILING_SAMPLE_RATE', default=0.1, cast=float)
+REQUEST_PROFILING_MAX_SAMPLES = config('REQUEST_PROFILING_MAX_SAMPLES', default=500, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'website.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
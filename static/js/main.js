@@ -88,6 +88,91 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Autocomplétion de la recherche (index en mémoire côté serveur)
+document.addEventListener('DOMContentLoaded', function() {
+    const input = document.querySelector('.search-input[data-suggest-url]');
+    const list = document.querySelector('.search-suggestions');
+    if (!input || !list) {
+        return;
+    }
+    
+    const typeLabels = { news: 'Actualité', company: 'Entreprise' };
+    let timer = null;
+    let controller = null;
+    let activeIndex = -1;
+    
+    function hideSuggestions() {
+        list.hidden = true;
+        list.innerHTML = '';
+        activeIndex = -1;
+    }
+    
+    function renderSuggestions(suggestions) {
+        list.innerHTML = '';
+        suggestions.forEach(suggestion => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = suggestion.url;
+            link.textContent = suggestion.title;
+            const type = document.createElement('span');
+            type.className = 'suggestion-type';
+            type.textContent = typeLabels[suggestion.type] || '';
+            link.appendChild(type);
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+        list.hidden = suggestions.length === 0;
+        activeIndex = -1;
+    }
+    
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        const query = this.value.trim();
+        if (query.length < 2) {
+            hideSuggestions();
+            return;
+        }
+        timer = setTimeout(() => {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(query)}`, { signal: controller.signal })
+                .then(response => response.json())
+                .then(result => renderSuggestions(result.suggestions))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        hideSuggestions();
+                    }
+                });
+        }, 120);
+    });
+    
+    // Navigation au clavier dans les suggestions
+    input.addEventListener('keydown', function(e) {
+        const items = list.querySelectorAll('li');
+        if (list.hidden || !items.length) {
+            return;
+        }
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            activeIndex = (activeIndex + (e.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+            items.forEach((item, i) => item.classList.toggle('active', i === activeIndex));
+        } else if (e.key === 'Enter' && activeIndex >= 0) {
+            e.preventDefault();
+            window.location.href = items[activeIndex].querySelector('a').href;
+        } else if (e.key === 'Escape') {
+            hideSuggestions();
+        }
+    });
+    
+    document.addEventListener('click', function(e) {
+        if (!list.contains(e.target) && e.target !== input) {
+            hideSuggestions();
+        }
+    });
+});
+
 // Fonction pour afficher les messages flash
 function showFlashMessage(message, type) {
     const flashContainer = document.querySelector('.flash-messages') || createFlashContainer();
@@ -1,9 +1,12 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Contact, Company, CompanyProjectImage, News, Setting, Testimonial, HomePageHero, NavigationLogo
+from .models import Contact, Company, CompanyProjectImage, News, Setting, Testimonial, HomePageHero, NavigationLogo, Task
+from .query_budget import query_budget
 
 
 @admin.register(Contact)
+@query_budget(13)
 class ContactAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'company', 'service', 'status', 'created_at']
     list_filter = ['status', 'service', 'created_at']
@@ -37,6 +40,7 @@ class CompanyProjectImageInline(admin.TabularInline):
 
 
 @admin.register(Company)
+@query_budget(11)
 class CompanyAdmin(admin.ModelAdmin):
     list_display = ['name', 'icon', 'active', 'created_at']
     list_filter = ['active', 'created_at']
@@ -67,6 +71,7 @@ class CompanyAdmin(admin.ModelAdmin):
 
 
 @admin.register(CompanyProjectImage)
+@query_budget(12)
 class CompanyProjectImageAdmin(admin.ModelAdmin):
     list_display = ['company', 'title', 'order', 'created_at']
     list_filter = ['company', 'created_at']
@@ -76,6 +81,7 @@ class CompanyProjectImageAdmin(admin.ModelAdmin):
 
 
 @admin.register(News)
+@query_budget(13)
 class NewsAdmin(admin.ModelAdmin):
     list_display = ['title', 'published', 'featured', 'created_at']
     list_filter = ['published', 'featured', 'created_at']
@@ -102,6 +108,7 @@ class NewsAdmin(admin.ModelAdmin):
 
 
 @admin.register(Setting)
+@query_budget(11)
 class SettingAdmin(admin.ModelAdmin):
     list_display = ['key', 'value_preview', 'description_preview']
     search_fields = ['key', 'value', 'description']
@@ -117,6 +124,7 @@ class SettingAdmin(admin.ModelAdmin):
 
 
 @admin.register(Testimonial)
+@query_budget(12)
 class TestimonialAdmin(admin.ModelAdmin):
     list_display = ['name', 'company', 'rating', 'active', 'created_at']
     list_filter = ['active', 'rating', 'created_at']
@@ -137,6 +145,7 @@ class TestimonialAdmin(admin.ModelAdmin):
 
 
 @admin.register(NavigationLogo)
+@query_budget(12)
 class NavigationLogoAdmin(admin.ModelAdmin):
     list_display = ['name', 'active', 'created_at']
     list_filter = ['active', 'created_at']
@@ -164,6 +173,7 @@ class NavigationLogoAdmin(admin.ModelAdmin):
 
 
 @admin.register(HomePageHero)
+@query_budget(12)
 class HomePageHeroAdmin(admin.ModelAdmin):
     list_display = ['title', 'active', 'overlay_opacity', 'created_at']
     list_filter = ['active', 'created_at']
@@ -194,6 +204,27 @@ class HomePageHeroAdmin(admin.ModelAdmin):
         return True
 
 
+@admin.register(Task)
+@query_budget(12)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'updated_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['name', 'payload', 'attempts', 'locked_until', 'last_error', 'created_at', 'updated_at']
+    actions = ['retry_tasks']
+    
+    def has_add_permission(self, request):
+        # Les tâches sont créées par l'application
+        return False
+    
+    @admin.action(description="Relancer les tâches sélectionnées")
+    def retry_tasks(self, request, queryset):
+        updated = queryset.update(
+            status=Task.STATUS_PENDING, attempts=0, locked_until=None, run_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} tâche(s) replanifiée(s).")
+
+
 # Configuration de l'interface d'administration
 admin.site.site_header = "AZI GROUP - Administration"
 admin.site.site_title = "AZI GROUP Admin"
@@ -0,0 +1,78 @@
+"""
+Build des fichiers statiques (``collectstatic`` avec ``STATIC_BUILD``).
+
+``AssetStorage`` enchaîne, pour chaque fichier collecté :
+
+* la minification des CSS et JS (rcssmin, rjsmin), faite avant le hachage :
+  le hash du nom correspond aux octets réellement servis ;
+* les noms hachés et le manifeste de ``ManifestStaticFilesStorage``
+  (``style.css`` -> ``style.3f2a….css``), utilisés par ``{% static %}`` ;
+* des copies précompressées ``.gz`` et ``.br`` (WhiteNoise, brotli requis
+  pour ``.br``).
+
+``whitenoise.middleware.WhiteNoiseMiddleware`` sert ensuite ces fichiers
+avec ``Cache-Control: immutable`` pour les noms hachés et la variante
+compressée acceptée par le navigateur.
+"""
+from django.core.files.base import ContentFile
+from rcssmin import cssmin
+from rjsmin import jsmin
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+MINIFIERS = {
+    '.css': cssmin,
+    '.js': jsmin,
+}
+
+
+def minifier_for(path):
+    """Retourne la fonction de minification du fichier, ou None (déjà minifié, autre type)"""
+    name = path.lower()
+    if name.endswith(('.min.css', '.min.js')):
+        return None
+    for extension, minify in MINIFIERS.items():
+        if name.endswith(extension):
+            return minify
+    return None
+
+
+def minify(path, content):
+    """Retourne le contenu (octets) minifié selon l'extension de ``path``"""
+    minify = minifier_for(path)
+    if minify is None:
+        return content
+    return minify(content.decode('utf-8')).encode('utf-8')
+
+
+class MinifiedSource:
+    """Stockage source (finder) dont les CSS et JS sont lus minifiés"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def open(self, path, mode='rb'):
+        with self.storage.open(path, mode) as handle:
+            return ContentFile(minify(path, handle.read()), name=path)
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+
+class AssetStorage(CompressedManifestStaticFilesStorage):
+    """Fichiers statiques minifiés, hachés et précompressés"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        paths = {
+            path: (MinifiedSource(storage) if minifier_for(path) else storage, source_path)
+            for path, (storage, source_path) in paths.items()
+        }
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Fichier absent du build (ex. déposé à la main sur le serveur) :
+            # lien sous son nom d'origine plutôt qu'une erreur 500 sur la page
+            return name
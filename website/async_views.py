@@ -0,0 +1,151 @@
+"""
+Versions asynchrones des pages et API les plus lues, servies sous ASGI.
+
+Activées par ``ASYNC_VIEWS=True`` (voir ``website.urls``), avec gunicorn et
+des workers uvicorn : un client lent n'immobilise plus un worker, la boucle
+asyncio continue de servir les autres requêtes pendant qu'il lit ou envoie.
+
+Les requêtes SQL passent par l'ORM asynchrone (``async for``, ``aget``,
+``acount``, ``aaggregate``, ``aiterator``). Le rendu des templates reste
+synchrone (context processor, balises d'images) et s'exécute dans le thread
+de ``sync_to_async``, de même que les accesseurs déjà en cache
+(cartes des entreprises, hero actif) et le moteur de recherche. Les règles
+métier sont partagées avec ``website.views``.
+"""
+from calendar import timegm
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import active_companies, cache_page_tagged, get_company_cards, public_company_card
+from .models import Company, HomePageHero, News, Testimonial
+from .query_budget import query_budget
+from .streaming import StreamingJsonResponse, iterator_chunk_size, streaming_json_enabled
+from .views import (
+    HOME_DATA, NEWS_API_STATE, home_pictures, news_api_etag, news_api_last_modified, news_api_page, news_api_query,
+    prefetch_pictures, search_results, stream_news_page,
+)
+
+
+arender = sync_to_async(render)
+aprefetch_pictures = sync_to_async(prefetch_pictures)
+
+
+@query_budget(6)
+@cache_page_tagged(Company, News, Testimonial, HomePageHero)
+async def index(request):
+    """Page d'accueil : requêtes indépendantes lancées en parallèle (views.HOME_DATA)"""
+    context = await HOME_DATA.aload()
+    await aprefetch_pictures(*home_pictures(context))
+    return await arender(request, 'website/index.html', context)
+
+
+@query_budget(6)
+@cache_page_tagged(News)
+async def news_list(request):
+    """Liste des actualités"""
+    news_list = News.objects.filter(published=True).order_by('-created_at')
+
+    # Pagination : total et page lus par l'ORM asynchrone
+    paginator = Paginator(news_list, 6)
+    paginator.count = await news_list.acount()
+    news = paginator.get_page(request.GET.get('page'))
+    news.object_list = [item async for item in news.object_list]
+    await aprefetch_pictures(*(item.image for item in news.object_list))
+
+    context = {
+        'news': news,
+    }
+    return await arender(request, 'website/news_list.html', context)
+
+
+@query_budget(5)
+@cache_page_tagged(News)
+async def news_detail(request, slug):
+    """Détail d'une actualité"""
+    try:
+        news = await News.objects.aget(slug=slug, published=True)
+    except News.DoesNotExist:
+        raise Http404("Aucune actualité ne correspond à cette adresse")
+
+    related_news = [
+        item async for item in News.objects.filter(published=True).exclude(id=news.id).order_by('-created_at')[:3]
+    ]
+    await aprefetch_pictures(news.image)
+
+    context = {
+        'news': news,
+        'related_news': related_news,
+    }
+    return await arender(request, 'website/news_detail.html', context)
+
+
+@query_budget(9)
+async def search(request):
+    """Page de recherche (moteur synchrone exécuté hors de la boucle)"""
+    query = request.GET.get('q', '').strip()
+    context = {
+        'results': await sync_to_async(_evaluated_search_results)(query, request.GET.get('page')),
+        'query': query,
+    }
+    return await arender(request, 'website/search.html', context)
+
+
+def _evaluated_search_results(query, page_number):
+    # La page est lue ici, et non pendant le rendu
+    results = search_results(query, page_number)
+    if results:
+        results['news'].object_list = list(results['news'].object_list)
+    return results
+
+
+@query_budget(1)
+async def api_companies(request):
+    """API pour les entreprises (voir ``views.api_companies``)"""
+    if streaming_json_enabled():
+        return StreamingJsonResponse(
+            (
+                public_company_card(company.to_card())
+                async for company in active_companies().aiterator(chunk_size=iterator_chunk_size())
+            ),
+            'companies',
+        )
+
+    cards = await sync_to_async(get_company_cards)()
+    return JsonResponse({'companies': [public_company_card(card) for card in cards]})
+
+
+@query_budget(2)
+async def api_news(request):
+    """
+    API pour les actualités (voir ``views.api_news``). Les en-têtes
+    conditionnels sont traités ici, après validation des paramètres :
+    ``@condition`` n'accepte pas de vue asynchrone avec Django 4.2.
+    """
+    query = news_api_query(request)
+    if isinstance(query, JsonResponse):
+        return query
+    rows, fields, limit = query
+
+    request._news_api_state = await News.objects.filter(published=True).aaggregate(**NEWS_API_STATE)
+    etag = news_api_etag(request)
+    last_modified = news_api_last_modified(request)
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        if streaming_json_enabled():
+            response = stream_news_page(rows, fields, limit, asynchronous=True)
+        else:
+            response = JsonResponse(news_api_page([row async for row in rows], fields, limit))
+
+    if request.method in ('GET', 'HEAD'):
+        if timestamp is not None and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(timestamp)
+        if not response.has_header('ETag'):
+            response.headers['ETag'] = etag
+    return response
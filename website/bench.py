@@ -0,0 +1,318 @@
+"""
+Outils du banc de performance (``manage.py bench``).
+
+* ``seed_dataset`` / ``clear_dataset`` : jeu de données synthétique
+  (entreprises, images de projets, actualités, témoignages) identifié par un
+  préfixe, inséré avec ``bulk_create`` puis indexé ;
+* ``route_urls`` : une URL concrète pour chaque route de ``website.urls`` ;
+* ``database_profile`` et ``check_database_profile`` : réglages de connexion
+  effectifs de la base mesurée et vérification de leur effet ;
+* ``summarize`` et ``compare_to_baseline`` : percentiles et détection des
+  régressions par rapport à une mesure de référence.
+"""
+from io import BytesIO
+import random
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.urls import URLPattern, reverse
+
+from .cache import invalidate_site_chrome, model_tag, purge_tags, refresh_company_cards
+from .models import Company, CompanyProjectImage, Contact, News, Testimonial
+from .profiling import percentile
+from .search import get_search_backend
+from .suggest import rebuild_suggest_index
+
+
+DEFAULT_PREFIX = 'bench'
+
+WORDS = (
+    'agriculture', 'énergie', 'solaire', 'transport', 'logistique', 'conseil',
+    'formation', 'industrie', 'numérique', 'finance', 'immobilier', 'santé',
+    'innovation', 'partenariat', 'développement', 'Bamako', 'Mali', 'projet',
+)
+
+# Paramètres des routes : valeurs tirées du jeu de données
+ROUTE_KWARGS = {
+    'company_detail': lambda dataset: {'slug': dataset['company_slug']},
+    'news_detail': lambda dataset: {'slug': dataset['news_slug']},
+    'sitemap_section': lambda dataset: {'section': 'companies', 'page': 1},
+}
+ROUTE_QUERY = {
+    'search': 'q=projet',
+    'api_search_suggest': 'q=pro',
+    'api_news': 'limit=20',
+}
+# Routes non mesurables en GET anonyme
+SKIPPED_ROUTES = {'contact_ajax', 'api_contacts_bulk', 'api_profiling'}
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+# Fichiers images du jeu de données : dossier et nom de base
+SEED_IMAGES = {
+    'logo': 'company_logos',
+    'project': 'company_projects',
+}
+
+
+def _seed_image_names(prefix, kind, count):
+    """
+    Enregistre ``count`` fichiers images distincts (un par logo ou par image
+    de projet, comme en production) et retourne leurs noms dans le stockage
+    """
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), (102, 126, 234)).save(buffer, 'JPEG')
+    content = buffer.getvalue()
+    return [
+        default_storage.save(f'{SEED_IMAGES[kind]}/{prefix}-{kind}-{index:05d}.jpg', ContentFile(content))
+        for index in range(count)
+    ]
+
+
+def delete_seed_images(prefix=DEFAULT_PREFIX):
+    """Supprime les fichiers images du jeu de données (non annulés avec la transaction)"""
+    for kind, folder in SEED_IMAGES.items():
+        try:
+            _, files = default_storage.listdir(folder)
+        except FileNotFoundError:
+            continue
+        for name in files:
+            if name.startswith(f'{prefix}-{kind}-'):
+                default_storage.delete(f'{folder}/{name}')
+
+
+def clear_dataset(prefix=DEFAULT_PREFIX):
+    """Supprime les données synthétiques portant le préfixe"""
+    Company.objects.filter(slug__startswith=f'{prefix}-').delete()
+    News.objects.filter(slug__startswith=f'{prefix}-').delete()
+    Testimonial.objects.filter(company__startswith=f'{prefix}-').delete()
+    Contact.objects.filter(email__endswith=f'@{prefix}.example.com').delete()
+    delete_seed_images(prefix)
+    _refresh_derived_data()
+
+
+def seed_dataset(companies=20, news=100, testimonials=10, images=4, contacts=0, prefix=DEFAULT_PREFIX, seed=42):
+    """
+    Crée le jeu de données synthétique et retourne sa description (tailles
+    et slugs utilisés par ``route_urls``).
+    """
+    rng = random.Random(seed)
+    clear_dataset(prefix)
+
+    logos = _seed_image_names(prefix, 'logo', companies)
+    company_objects = Company.objects.bulk_create([
+        Company(
+            name=f'{prefix.capitalize()} {index:05d} {rng.choice(WORDS)}',
+            slug=f'{prefix}-company-{index:05d}',
+            description=_sentence(rng, 20),
+            detailed_description=_sentence(rng, 80),
+            icon='🏢',
+            logo=logos[index],
+            services=[_sentence(rng, 3) for _ in range(4)],
+            kpis=[f'{rng.choice(WORDS).capitalize()} ≥ {rng.randint(50, 99)}%' for _ in range(3)],
+        )
+        for index in range(companies)
+    ])
+    if images and company_objects:
+        project_images = iter(_seed_image_names(prefix, 'project', images * len(company_objects)))
+        CompanyProjectImage.objects.bulk_create([
+            CompanyProjectImage(
+                company=company,
+                image=next(project_images),
+                title=_sentence(rng, 4),
+                order=order,
+                width=64,
+                height=48,
+            )
+            for company in company_objects
+            for order in range(images)
+        ])
+    News.objects.bulk_create([
+        News(
+            title=_sentence(rng, 8),
+            slug=f'{prefix}-news-{index:05d}',
+            content='\n\n'.join(_sentence(rng, 60) for _ in range(5)),
+            excerpt=_sentence(rng, 25),
+            featured=index < 3,
+        )
+        for index in range(news)
+    ])
+    Testimonial.objects.bulk_create([
+        Testimonial(
+            name=f'Client {index}',
+            company=f'{prefix}-client-{index:05d}',
+            position='Directeur',
+            content=_sentence(rng, 40),
+            rating=rng.randint(3, 5),
+        )
+        for index in range(testimonials)
+    ])
+    Contact.objects.bulk_create([
+        Contact(
+            name=f'Contact {index}',
+            email=f'contact-{index:05d}@{prefix}.example.com',
+            company=f'Société {index}',
+            service=rng.choice(Contact.SERVICE_CHOICES)[0],
+            message=_sentence(rng, 30),
+        )
+        for index in range(contacts)
+    ])
+    _refresh_derived_data(prefix)
+
+    return {
+        'prefix': prefix,
+        'companies': companies,
+        'news': news,
+        'testimonials': testimonials,
+        'images_per_company': images,
+        'contacts': contacts,
+        'company_slug': f'{prefix}-company-00000' if companies else None,
+        'news_slug': f'{prefix}-news-00000' if news else None,
+    }
+
+
+def _refresh_derived_data(prefix=None):
+    """bulk_create n'émet pas de signaux : index et caches sont recalculés ici"""
+    if prefix:
+        backend = get_search_backend()
+        for model in (Company, News):
+            for instance in model.objects.filter(slug__startswith=f'{prefix}-').iterator():
+                backend.index_object(instance)
+    rebuild_suggest_index()
+    refresh_company_cards()
+    invalidate_site_chrome()
+    purge_tags(*(model_tag(model) for model in (Company, CompanyProjectImage, News, Testimonial)))
+
+
+def route_urls(dataset, urlpatterns=None):
+    """
+    Retourne ``{nom de route: URL}`` pour chaque route GET de ``website.urls``.
+
+    Les routes dont les paramètres ne peuvent pas être déduits du jeu de
+    données (ex. aucune actualité générée) sont ignorées.
+    """
+    if urlpatterns is None:
+        from .urls import urlpatterns
+    urls = {}
+    for pattern in urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in SKIPPED_ROUTES:
+            continue
+        kwargs = ROUTE_KWARGS[pattern.name](dataset) if pattern.name in ROUTE_KWARGS else {}
+        if any(value is None for value in kwargs.values()):
+            continue
+        url = reverse(f'website:{pattern.name}', kwargs=kwargs)
+        if pattern.name in ROUTE_QUERY:
+            url = f'{url}?{ROUTE_QUERY[pattern.name]}'
+        urls[f'website:{pattern.name}'] = url
+    return urls
+
+
+SQLITE_PRAGMAS = ('journal_mode', 'synchronous', 'mmap_size')
+SQLITE_SYNCHRONOUS_NAMES = {0: 'off', 1: 'normal', 2: 'full', 3: 'extra'}
+
+
+def database_profile():
+    """
+    Réglages de connexion de la base ``default`` : connexions persistantes,
+    pool et, pour SQLite, valeurs des PRAGMA lues sur une connexion ouverte
+    """
+    settings_dict = connection.settings_dict
+    pool = settings_dict.get('OPTIONS', {}).get('pool')
+    profile = {
+        'vendor': connection.vendor,
+        'engine': settings_dict['ENGINE'],
+        'conn_max_age': settings_dict['CONN_MAX_AGE'],
+        'conn_health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+        'pool': (pool if isinstance(pool, dict) else {}) if pool else None,
+    }
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(f'PRAGMA {pragma}')
+                row = cursor.fetchone()
+                profile[pragma] = row[0] if row else None
+        profile['synchronous'] = SQLITE_SYNCHRONOUS_NAMES.get(profile['synchronous'], profile['synchronous'])
+    return profile
+
+
+def check_database_profile(results, persistent_modes=('gunicorn',)):
+    """
+    Retourne les écarts entre la configuration de la base et les mesures :
+    PRAGMA demandés par ``init_command`` mais non appliqués, ou connexions
+    rouvertes par au moins la moitié des requêtes d'une route mesurée dans
+    ``persistent_modes`` alors que ``CONN_MAX_AGE`` les rend persistantes.
+
+    Avec un pool, Django « ouvre » une connexion à chaque requête en la
+    reprenant au pool : le nombre de connexions n'est alors pas vérifié.
+    """
+    profile = results.get('database', {})
+    problems = []
+    for command in connection.settings_dict.get('OPTIONS', {}).get('init_command', '').split(';'):
+        name, _, expected = command.strip().removeprefix('PRAGMA ').partition('=')
+        name, expected = name.strip().lower(), expected.strip().lower()
+        if name in SQLITE_PRAGMAS and str(profile.get(name)).lower() != expected:
+            problems.append(f'PRAGMA {name} : {expected} demandé, {profile.get(name)} appliqué')
+
+    if profile.get('conn_max_age') and profile.get('pool') is None:
+        for mode in persistent_modes:
+            for route, measure in results.get(mode, {}).items():
+                if measure.get('connections') and measure['connections'] * 2 >= measure['requests']:
+                    problems.append(
+                        f"{mode} {route} : {measure['connections']} connexions ouvertes "
+                        f"pour {measure['requests']} requêtes malgré les connexions persistantes"
+                    )
+    return problems
+
+
+def summarize(latencies, wall_time):
+    """Débit et percentiles (ms) d'une série de mesures en secondes"""
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        'requests': len(values),
+        'throughput_rps': round(len(values) / wall_time, 1) if wall_time else None,
+        'p50_ms': round(percentile(values, 0.50), 2) if values else None,
+        'p95_ms': round(percentile(values, 0.95), 2) if values else None,
+        'p99_ms': round(percentile(values, 0.99), 2) if values else None,
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25, slack_ms=2.0):
+    """
+    Retourne la liste des régressions par rapport à ``baseline``.
+
+    Les nombres de requêtes SQL, d'erreurs et de connexions ouvertes à la base
+    sont comparés strictement ; le p50 peut
+    dépasser la référence de ``tolerance`` (+ ``slack_ms`` contre le bruit),
+    de même que le temps moyen par requête déduit du débit.
+    """
+    regressions = []
+    for mode, routes in results.items():
+        if mode in ('dataset', 'database') or mode not in baseline:
+            continue
+        for route, current in routes.items():
+            reference = baseline[mode].get(route)
+            if not reference:
+                continue
+            label = f'{mode} {route}'
+            for field in ('queries', 'cold_queries', 'errors', 'connections'):
+                if current.get(field) is not None and reference.get(field) is not None \
+                        and current[field] > reference[field]:
+                    regressions.append(f'{label} : {field} {reference[field]} -> {current[field]}')
+            # p50 plutôt que p95 : sur quelques dizaines de requêtes, le p95 n'est qu'un pic isolé
+            if reference.get('p50_ms') is not None and current.get('p50_ms') is not None \
+                    and current['p50_ms'] > reference['p50_ms'] * (1 + tolerance) + slack_ms:
+                regressions.append(f"{label} : p50 {reference['p50_ms']} ms -> {current['p50_ms']} ms")
+            # Débit comparé via le temps moyen par requête, avec la même marge
+            if reference.get('throughput_rps') and current.get('throughput_rps'):
+                reference_ms = 1000 / reference['throughput_rps']
+                if 1000 / current['throughput_rps'] > reference_ms * (1 + tolerance) + slack_ms:
+                    regressions.append(
+                        f"{label} : débit {reference['throughput_rps']} -> {current['throughput_rps']} req/s"
+                    )
+    return regressions
@@ -0,0 +1,277 @@
+"""
+Caches du site : éléments communs à toutes les pages (logo, navbar, footer)
+et pages publiques complètes.
+
+Le snapshot est stocké dans le cache Django configuré (locmem en
+développement, Redis/Memcached en production) et invalidé par les signaux
+définis dans ``website.signals``. Snapshot, cartes et pages sont rangés sous
+des clés versionnées (``website.versions``) : une modification change la
+version, et un worker au cache local la voit au plus tard après
+``LOCAL_VERSION_TIMEOUT`` secondes au lieu de servir l'ancienne valeur
+jusqu'à son expiration.
+"""
+import hashlib
+import re
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+from .memo import request_memoized
+from .models import NavigationLogo, HomePageHero, Company, SingleActiveModel, COMPANY_CARD_VERSION
+from .versions import bump_version, current_version, current_versions
+
+
+SITE_CHROME_CACHE_KEY = 'website:site_chrome:v2'
+SITE_CHROME_VERSION_KEY = f'{SITE_CHROME_CACHE_KEY}:version'
+COMPANY_CARDS_CACHE_KEY = f'website:company_cards:v{COMPANY_CARD_VERSION}'
+COMPANY_CARDS_VERSION_KEY = f'{COMPANY_CARDS_CACHE_KEY}:version'
+# Champs des cartes réservés aux gabarits (chemins de stockage), absents de l'API
+PRIVATE_CARD_FIELDS = frozenset({'logo_name'})
+
+
+def _file_url(field):
+    """Retourne l'URL d'un fichier ou None si le stockage échoue"""
+    if not field:
+        return None
+    try:
+        return field.url
+    except Exception:
+        return None
+
+
+def build_site_chrome():
+    """Construit le snapshot du logo, de l'URL de la navbar et du footer"""
+    active = SingleActiveModel.get_active_many(NavigationLogo, HomePageHero)
+    active_logo, active_hero = active[NavigationLogo], active[HomePageHero]
+
+    navbar_logo_url = navbar_logo_name = None
+    if active_hero:
+        navbar_logo_url = _file_url(getattr(active_hero, 'background_image', None))
+        navbar_logo_name = active_hero.background_image.name if navbar_logo_url else None
+    if not navbar_logo_url and active_logo:
+        navbar_logo_url = _file_url(getattr(active_logo, 'logo', None))
+        navbar_logo_name = active_logo.logo.name if navbar_logo_url else None
+
+    return {
+        'navigation_logo': active_logo,
+        'navbar_logo_url': navbar_logo_url,
+        # Nom du fichier dans le stockage, pour les dérivés responsive
+        'navbar_logo_name': navbar_logo_name,
+        # Nom distinct de la variable « companies » des vues : le context
+        # processor est appliqué après le contexte de la vue et l'écraserait
+        'footer_companies': get_company_cards(),
+    }
+
+
+def site_chrome_cache_key():
+    """Clé du snapshot : versions du snapshot et des cartes du footer"""
+    versions = current_versions([SITE_CHROME_VERSION_KEY, COMPANY_CARDS_VERSION_KEY])
+    return f'{SITE_CHROME_CACHE_KEY}:' + ':'.join(map(str, versions))
+
+
+@request_memoized
+def get_site_chrome():
+    """Retourne le snapshot depuis le cache, en le reconstruisant si besoin"""
+    key = site_chrome_cache_key()
+    chrome = cache.get(key)
+    if chrome is None:
+        chrome = build_site_chrome()
+        cache.set(key, chrome, getattr(settings, 'SITE_CHROME_CACHE_TIMEOUT', 300))
+    return chrome
+
+
+def invalidate_site_chrome():
+    """Change la version du snapshot pour forcer sa reconstruction"""
+    bump_version(SITE_CHROME_VERSION_KEY)
+    get_site_chrome.forget()
+
+
+def company_cards_cache_key():
+    return f'{COMPANY_CARDS_CACHE_KEY}:{current_version(COMPANY_CARDS_VERSION_KEY)}'
+
+
+def active_companies():
+    """Entreprises affichées en cartes, dans l'ordre des cartes (par nom)"""
+    return Company.objects.filter(active=True).order_by('name')
+
+
+def _store_company_cards(key):
+    cards = [company.to_card() for company in active_companies()]
+    cache.set(key, cards, getattr(settings, 'COMPANY_CARDS_CACHE_TIMEOUT', 3600))
+    return cards
+
+
+def refresh_company_cards():
+    """Recalcule les cartes des entreprises actives sous une nouvelle version"""
+    bump_version(COMPANY_CARDS_VERSION_KEY)
+    get_company_cards.forget()
+    return _store_company_cards(company_cards_cache_key())
+
+
+@request_memoized
+def get_company_cards():
+    """Retourne les cartes précalculées des entreprises actives (triées par nom)"""
+    key = company_cards_cache_key()
+    cards = cache.get(key)
+    if cards is None:
+        cards = _store_company_cards(key)
+    return cards
+
+
+def public_company_card(card):
+    """
+    Élément d'api_companies : la carte (``Company.to_card``) sans les champs
+    internes (``PRIVATE_CARD_FIELDS``). Seul sérialiseur de l'API, que la
+    carte vienne du cache ou d'une ligne lue en flux.
+    """
+    return {key: value for key, value in card.items() if key not in PRIVATE_CARD_FIELDS}
+
+
+def get_company_card(company):
+    """Retourne la carte d'une entreprise, depuis le cache si elle y figure"""
+    for card in get_company_cards():
+        if card['id'] == company.pk:
+            return card
+    return company.to_card()
+
+
+# ---------------------------------------------------------------------------
+# Cache des pages publiques
+# ---------------------------------------------------------------------------
+
+PAGE_CACHE_PREFIX = 'website:page'
+TAG_VERSION_PREFIX = 'website:tag'
+
+# Modèles affichés sur toutes les pages via le context processor
+SITE_CHROME_MODELS = (NavigationLogo, HomePageHero, Company)
+
+CSRF_PLACEHOLDER = '__csrf_token_placeholder__'
+CSRF_INPUT_RE = re.compile(
+    r'(<input type="hidden" name="csrfmiddlewaretoken" value=")[^"]*(")'
+)
+
+
+def model_tag(model):
+    """Retourne le tag de cache associé à un modèle (ex. 'website.news')"""
+    return model._meta.label_lower
+
+
+def _tag_version_key(tag):
+    return f'{TAG_VERSION_PREFIX}:{tag}'
+
+
+def get_tag_versions(tags):
+    """Retourne la version courante de chaque tag, en l'initialisant si besoin"""
+    return current_versions([_tag_version_key(tag) for tag in tags])
+
+
+def purge_tags(*tags):
+    """Invalide toutes les pages dépendant des tags donnés"""
+    for tag in tags:
+        bump_version(_tag_version_key(tag))
+
+
+def page_cache_key(request, tags):
+    """Clé d'une page : chemin, query string, langue et versions des tags"""
+    versions = get_tag_versions(tags)
+    raw = '|'.join([
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        get_language() or '',
+        *(f'{tag}={version}' for tag, version in zip(tags, versions)),
+    ])
+    return f'{PAGE_CACHE_PREFIX}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def _should_bypass(request):
+    """Les requêtes d'écriture et les pages avec messages flash ne sont pas cachées"""
+    if request.method not in ('GET', 'HEAD'):
+        return True
+    # len() ne consomme pas les messages, contrairement à l'itération
+    return len(get_messages(request)) > 0
+
+
+def _punch_csrf_hole(content):
+    """Remplace le jeton CSRF rendu par un marqueur avant mise en cache"""
+    return CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', content)
+
+
+def _lookup_page(request, tags):
+    """Retourne (clé, entrée en cache) ; clé None si la page ne doit pas être cachée"""
+    if not getattr(settings, 'PAGE_CACHE_ENABLED', True) or _should_bypass(request):
+        return None, None
+    key = page_cache_key(request, tags)
+    return key, cache.get(key)
+
+
+def _store_page(key, response):
+    """Met la réponse en cache ; retourne l'entrée, ou None si elle n'est pas cachable"""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return None
+    content = response.content.decode(response.charset)
+    entry = {
+        'content': _punch_csrf_hole(content),
+        'content_type': response['Content-Type'],
+    }
+    cache.set(key, entry, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+    return entry
+
+
+def _page_response(request, entry, cache_status):
+    content = entry['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['X-Page-Cache'] = cache_status
+    return response
+
+
+def cache_page_tagged(*models):
+    """
+    Met en cache la réponse d'une vue publique (synchrone ou asynchrone).
+
+    La page est étiquetée avec les modèles dont elle dépend (plus ceux du
+    context processor) ; une modification de l'un d'eux la purge. Le jeton
+    CSRF des formulaires est réinjecté à chaque requête.
+    """
+    tags = sorted({model_tag(model) for model in (*models, *SITE_CHROME_MODELS)})
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                # Messages flash (session) et cache lus en un seul passage synchrone
+                key, entry = await sync_to_async(_lookup_page)(request, tags)
+                if key is None:
+                    return await view_func(request, *args, **kwargs)
+                cache_status = 'HIT'
+                if entry is None:
+                    response = await view_func(request, *args, **kwargs)
+                    entry = await sync_to_async(_store_page)(key, response)
+                    if entry is None:
+                        return response
+                    cache_status = 'MISS'
+                return _page_response(request, entry, cache_status)
+            return _wrapped_view
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            key, entry = _lookup_page(request, tags)
+            if key is None:
+                return view_func(request, *args, **kwargs)
+            cache_status = 'HIT'
+            if entry is None:
+                response = view_func(request, *args, **kwargs)
+                entry = _store_page(key, response)
+                if entry is None:
+                    return response
+                cache_status = 'MISS'
+            return _page_response(request, entry, cache_status)
+        return _wrapped_view
+    return decorator
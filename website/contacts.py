@@ -0,0 +1,145 @@
+"""
+Import en masse des messages de contact (``/api/contacts/bulk/``).
+
+Le corps est un tableau JSON ou du NDJSON (un objet par ligne). Chaque
+ligne est validée par ``ContactForm`` puis les lignes valides sont insérées
+par lots avec ``bulk_create``. La clé ``idempotency_key`` fournie par
+l'appelant évite de créer deux fois le même message lorsqu'un partenaire
+renvoie un lot ; une ligne sans clé est toujours enregistrée (deux messages
+identiques peuvent être légitimes).
+"""
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from .forms import ContactForm
+from .models import Contact
+
+
+class BulkPayloadError(ValueError):
+    """Corps de requête illisible ou trop volumineux"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# Taille des lots de SELECT ... IN (limite de variables de SQLite)
+LOOKUP_CHUNK_SIZE = 500
+
+KEY_MAX_LENGTH = Contact._meta.get_field('idempotency_key').max_length
+
+
+def max_rows():
+    return getattr(settings, 'CONTACT_BULK_MAX_ROWS', 5000)
+
+
+def batch_size():
+    return getattr(settings, 'CONTACT_BULK_BATCH_SIZE', 500)
+
+
+def parse_rows(body, content_type=''):
+    """Retourne la liste des lignes d'un tableau JSON ou d'un flux NDJSON"""
+    try:
+        text = body.decode('utf-8')
+    except UnicodeDecodeError:
+        raise BulkPayloadError("Le corps doit être encodé en UTF-8")
+
+    if 'ndjson' not in content_type and text.lstrip().startswith('['):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as error:
+            raise BulkPayloadError(f"JSON invalide : {error}")
+    else:
+        rows = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as error:
+                raise BulkPayloadError(f"NDJSON invalide ligne {number} : {error}")
+
+    if len(rows) > max_rows():
+        raise BulkPayloadError(f"Au plus {max_rows()} lignes par requête", status=413)
+    return rows
+
+
+def idempotency_key(row):
+    """Clé fournie par l'appelant, ou None (pas de dédoublonnage)"""
+    key = row.get('idempotency_key')
+    if key in (None, ''):
+        return None
+    return str(key)
+
+
+def _existing_keys(keys):
+    """Retourne {clé: id} des contacts déjà enregistrés, par lots"""
+    keys = list(keys)
+    existing = {}
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        existing.update(
+            Contact.objects.filter(idempotency_key__in=keys[start:start + LOOKUP_CHUNK_SIZE])
+            .values_list('idempotency_key', 'id')
+        )
+    return existing
+
+
+def ingest_contacts(rows):
+    """
+    Valide et enregistre les lignes ; retourne un résultat par ligne, dans
+    l'ordre : ``created``, ``duplicate`` (clé déjà connue) ou ``invalid``.
+    """
+    results = [None] * len(rows)
+    pending = {}  # clé -> (index, instance)
+    unkeyed = []  # (index, instance) des lignes sans clé
+
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[index] = {'index': index, 'status': 'invalid', 'errors': {'__all__': ["Objet JSON attendu"]}}
+            continue
+        form = ContactForm(data=row)
+        if not form.is_valid():
+            results[index] = {'index': index, 'status': 'invalid', 'errors': form.errors.get_json_data()}
+            continue
+        key = idempotency_key(row)
+        if key is None:
+            unkeyed.append((index, form.save(commit=False)))
+            continue
+        if len(key) > KEY_MAX_LENGTH:
+            results[index] = {
+                'index': index, 'status': 'invalid',
+                'errors': {'idempotency_key': [f"{KEY_MAX_LENGTH} caractères au maximum"]},
+            }
+            continue
+        if key in pending:
+            # Même clé plus haut dans le lot
+            results[index] = {'index': index, 'status': 'duplicate', 'key': key}
+            continue
+        instance = form.save(commit=False)
+        instance.idempotency_key = key
+        pending[key] = (index, instance)
+
+    # Une seule transaction : un seul commit quel que soit le nombre de lots
+    with transaction.atomic():
+        existing = _existing_keys(pending)
+        new = [instance for key, (_, instance) in pending.items() if key not in existing]
+        # ignore_conflicts : un envoi concurrent de la même clé ne fait pas échouer le lot
+        Contact.objects.bulk_create(new, batch_size=batch_size(), ignore_conflicts=True)
+        created_ids = _existing_keys(instance.idempotency_key for instance in new)
+        # Sans clé, aucun conflit possible : les identifiants sont retournés par l'insertion
+        Contact.objects.bulk_create([instance for _, instance in unkeyed], batch_size=batch_size())
+
+    for index, instance in unkeyed:
+        results[index] = {'index': index, 'status': 'created', 'key': None, 'id': instance.pk}
+
+    for key, (index, _) in pending.items():
+        if key in existing:
+            results[index] = {'index': index, 'status': 'duplicate', 'key': key, 'id': existing[key]}
+        else:
+            results[index] = {'index': index, 'status': 'created', 'key': key, 'id': created_ids.get(key)}
+    for result in results:
+        if result['status'] == 'duplicate' and 'id' not in result:
+            result['id'] = existing.get(result['key'], created_ids.get(result['key']))
+    return results
@@ -0,0 +1,118 @@
+"""
+CSS critique : règles de ``style.css`` nécessaires au premier écran d'une page.
+
+``extract_critical_css`` analyse hors ligne, sans navigateur, le HTML rendu
+d'une page : faute de mise en page, le premier écran est approché par le
+document jusqu'au début du contenu, à savoir ``<header>``, messages, puis les
+``FOLD_SECTIONS`` premiers blocs de ``<main>`` (le hero occupe 70vh). Une
+règle est retenue si l'un de ses sélecteurs désigne un de ces éléments ;
+les états interactifs (``:hover``, ``:focus``...) sont écartés, les blocs
+``@media`` filtrés de la même façon et les ``@keyframes`` gardés s'ils sont
+utilisés.
+
+``manage.py build_critical_css`` écrit le résultat de chaque page de
+``CRITICAL_CSS_PAGES`` dans ``CRITICAL_CSS_DIR`` ; la balise
+``{% critical_css %}`` l'insère dans la page et charge la feuille complète
+sans bloquer le rendu.
+"""
+import os
+import re
+
+import cssselect2
+import html5lib
+import tinycss2
+from django.conf import settings
+from rcssmin import cssmin
+
+
+FOLD_SECTIONS = 2
+
+# Règles filtrées par sélecteur, et blocs dont le contenu est filtré récursivement
+GROUPING_AT_RULES = {'media', 'supports'}
+# Sans effet sur le premier écran
+SKIPPED_ELEMENTS = {'script', 'footer', 'noscript', 'template'}
+
+_KEYFRAMES_USE = r'animation(?:-name)?\s*:[^;}]*\b%s\b'
+
+# CSS critique lu sur disque, par page : (mtime, contenu)
+_loaded = {}
+
+
+def fold_elements(html, sections=FOLD_SECTIONS):
+    """Éléments du premier écran (``cssselect2.ElementWrapper``) du HTML rendu"""
+    root = cssselect2.ElementWrapper.from_html_root(html5lib.parse(html, namespaceHTMLElements=False))
+    elements = [root]
+    body = next((child for child in root.iter_children() if child.local_name == 'body'), None)
+    if body is None:
+        return elements
+    elements.append(body)
+    for child in body.iter_children():
+        if child.local_name == 'main':
+            elements.append(child)
+            for index, block in enumerate(child.iter_children()):
+                if index >= sections:
+                    break
+                elements.extend(block.iter_subtree())
+            break
+        if child.local_name not in SKIPPED_ELEMENTS:
+            elements.extend(child.iter_subtree())
+    return elements
+
+
+def _matches(rule, elements):
+    try:
+        selectors = cssselect2.compile_selector_list(rule.prelude)
+    except cssselect2.SelectorError:
+        # Sélecteur non pris en charge par l'analyse : règle conservée par prudence
+        return True
+    return any(selector.test(element) for selector in selectors for element in elements)
+
+
+def _critical_rules(rules, elements):
+    kept, keyframes = [], []
+    for rule in rules:
+        if rule.type == 'qualified-rule':
+            if _matches(rule, elements):
+                kept.append(tinycss2.serialize([rule]))
+        elif rule.type == 'at-rule':
+            keyword = rule.lower_at_keyword
+            if keyword in GROUPING_AT_RULES:
+                inner = _critical_rules(
+                    tinycss2.parse_rule_list(rule.content or [], skip_comments=True, skip_whitespace=True), elements,
+                )
+                if inner:
+                    kept.append(f'@{rule.at_keyword}{tinycss2.serialize(rule.prelude)}{{{inner}}}')
+            elif keyword.endswith('keyframes'):
+                keyframes.append((tinycss2.serialize(rule.prelude).strip(), tinycss2.serialize([rule])))
+            else:
+                # @font-face, @import, @charset... : toujours nécessaires
+                kept.append(tinycss2.serialize([rule]))
+    css = '\n'.join(kept)
+    used = [text for name, text in keyframes if re.search(_KEYFRAMES_USE % re.escape(name), css)]
+    return '\n'.join(kept + used)
+
+
+def extract_critical_css(html, css, sections=FOLD_SECTIONS):
+    """Retourne les règles de ``css`` utilisées par le premier écran de ``html``, minifiées"""
+    rules = tinycss2.parse_stylesheet(css, skip_comments=True, skip_whitespace=True)
+    return cssmin(_critical_rules(rules, fold_elements(html, sections)))
+
+
+def critical_css_path(page):
+    return os.path.join(settings.CRITICAL_CSS_DIR, f'{page}.css')
+
+
+def load_critical_css(page):
+    """CSS critique construit pour la page (nom d'URL), ou None ; relu si le fichier change"""
+    if not getattr(settings, 'CRITICAL_CSS_ENABLED', True) or page not in settings.CRITICAL_CSS_PAGES:
+        return None
+    path = critical_css_path(page)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding='utf-8') as handle:
+            cached = _loaded[path] = (mtime, handle.read())
+    return cached[1]
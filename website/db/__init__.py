@@ -0,0 +1,9 @@
+"""
+Moteurs de base de données du site (valeurs de ``DATABASES['default']['ENGINE']``).
+
+Django 4.2 ne sait ni mettre en commun les connexions PostgreSQL ni exécuter
+des commandes à l'ouverture d'une connexion SQLite : ces moteurs ajoutent les
+options ``pool`` (PostgreSQL, psycopg 3) et ``init_command`` (SQLite) sous le
+nom et avec la forme qu'elles ont dans Django 5.1. Après une mise à jour de
+Django, il suffira de revenir aux moteurs d'origine.
+"""
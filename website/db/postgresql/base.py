@@ -0,0 +1,91 @@
+"""
+PostgreSQL avec ``OPTIONS['pool']`` : pool de connexions dans le processus
+(psycopg 3 et ``psycopg_pool`` requis).
+
+``pool`` vaut ``True`` ou un dict d'arguments de ``ConnectionPool``
+(``min_size``, ``max_size``, ``timeout``...). Fermer la connexion Django la
+rend au pool au lieu de la couper : chaque requête réutilise une connexion
+déjà authentifiée, sans les connexions persistantes (``CONN_MAX_AGE``) d'un
+thread à l'autre. Sans ``pool``, le moteur se comporte comme celui de Django.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+from django.utils.asyncio import async_unsafe
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Un pool par alias, partagé par tous les threads du processus
+    _connection_pools = {}
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict['OPTIONS'].get('pool')
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+
+        if self.alias not in self._connection_pools:
+            if not is_psycopg3:
+                raise ImproperlyConfigured("OPTIONS['pool'] nécessite psycopg 3 (paquets psycopg et psycopg-pool).")
+            if self.settings_dict['CONN_MAX_AGE'] != 0:
+                raise ImproperlyConfigured("OPTIONS['pool'] est incompatible avec CONN_MAX_AGE : utilisez 0.")
+            from psycopg_pool import ConnectionPool
+
+            pool_options = {} if pool_options is True else dict(pool_options)
+            connect_kwargs = self.get_connection_params()
+            # Connexions rendues au pool en autocommit ; Django règle ensuite le mode voulu
+            connect_kwargs['autocommit'] = True
+            pool = ConnectionPool(
+                kwargs=connect_kwargs,
+                # Ouvert à la première connexion, pas au chargement des réglages
+                open=False,
+                check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                name=f'django-{self.alias}',
+                **pool_options,
+            )
+            # Si deux threads créent un pool en même temps, le premier enregistré l'emporte
+            self._connection_pools.setdefault(self.alias, pool)
+        return self._connection_pools[self.alias]
+
+    def close_pool(self):
+        """Ferme le pool du processus (arrêt du worker, tests)"""
+        pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+        pool.open()
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None and self.pool is not None:
+            with self.wrap_database_errors:
+                # Rendue au pool (annulée si une transaction est restée ouverte)
+                self.connection._pool.putconn(self.connection)
+                self.connection = None
+            return
+        return super()._close()
@@ -0,0 +1,20 @@
+"""
+SQLite avec ``OPTIONS['init_command']`` : instructions séparées par des
+points-virgules, exécutées à l'ouverture de chaque connexion (PRAGMA).
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.init_commands = [command.strip() for command in params.pop('init_command', '').split(';')]
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for command in self.init_commands:
+            if command:
+                connection.execute(command)
+        return connection
@@ -1,4 +1,5 @@
 from django import forms
+from django.utils.functional import cached_property
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Field, Submit, Row, Column
 from .models import Contact
@@ -39,10 +40,18 @@ class ContactForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.form_class = 'contact-form'
-        self.helper.layout = Layout(
+        
+        # Ajouter des classes CSS aux champs
+        for field_name, field in self.fields.items():
+            field.required = field_name in ['name', 'email', 'message']
+    
+    @cached_property
+    def helper(self):
+        # Construit à la demande : inutile pour la validation des imports en masse
+        helper = FormHelper()
+        helper.form_method = 'post'
+        helper.form_class = 'contact-form'
+        helper.layout = Layout(
             Row(
                 Column('name', css_class='form-group col-md-6'),
                 Column('email', css_class='form-group col-md-6'),
@@ -57,17 +66,7 @@ class ContactForm(forms.ModelForm):
             Field('message', css_class='form-group'),
             Submit('submit', 'Envoyer le message', css_class='btn btn-primary btn-lg')
         )
-        
-        # Ajouter des classes CSS aux champs
-        for field_name, field in self.fields.items():
-            field.required = field_name in ['name', 'email', 'message']
-    
-    def clean_email(self):
-        email = self.cleaned_data.get('email')
-        if email and Contact.objects.filter(email=email).exists():
-            # Optionnel : vérifier si l'email existe déjà
-            pass
-        return email
+        return helper
     
     def clean_phone(self):
         phone = self.cleaned_data.get('phone')
@@ -0,0 +1,92 @@
+"""
+Traitement des images envoyées par l'administration (Pillow) : dimensions,
+miniatures et dérivés responsive (plusieurs largeurs en AVIF/WebP/JPEG).
+"""
+from io import BytesIO
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+def read_dimensions(field_file):
+    """Retourne (largeur, hauteur) d'une image, ou (None, None) si illisible"""
+    try:
+        field_file.open('rb')
+    except (OSError, ValueError):
+        return None, None
+    try:
+        with Image.open(field_file) as image:
+            return image.size
+    except (OSError, ValueError):
+        return None, None
+    finally:
+        field_file.seek(0)
+
+
+def make_thumbnail(field_file, width):
+    """
+    Retourne (ContentFile JPEG, largeur, hauteur) d'une miniature de
+    ``width`` pixels de large, sans agrandir les petites images
+    """
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                height = round(image.height * width / image.width)
+                image = image.resize((width, height), Image.LANCZOS)
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            buffer = BytesIO()
+            image.save(buffer, format='JPEG', quality=82, optimize=True, progressive=True)
+            thumb_width, thumb_height = image.size
+    finally:
+        field_file.seek(0)
+    name = f'{os.path.splitext(os.path.basename(field_file.name))[0]}_{thumb_width}w.jpg'
+    return ContentFile(buffer.getvalue(), name=name), thumb_width, thumb_height
+
+
+# Formats des dérivés : extension, format Pillow, type MIME, options d'encodage
+DERIVATIVE_FORMATS = {
+    'avif': ('avif', 'AVIF', 'image/avif', {'quality': 60}),
+    'webp': ('webp', 'WEBP', 'image/webp', {'quality': 78, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def supported_formats(formats):
+    """Filtre les formats que Pillow sait encoder (AVIF nécessite un plugin)"""
+    Image.init()
+    return [fmt for fmt in formats if DERIVATIVE_FORMATS[fmt][1] in Image.SAVE]
+
+
+def encode_derivatives(field_file, widths, formats):
+    """
+    Génère les dérivés d'une image : pour chaque largeur (sans agrandir
+    l'original) et chaque format, retourne (largeur, hauteur, format, ContentFile)
+    """
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as source:
+            source = ImageOps.exif_transpose(source)
+            source.load()
+    finally:
+        field_file.seek(0)
+
+    base_name = os.path.splitext(os.path.basename(field_file.name))[0]
+    targets = sorted({min(width, source.width) for width in widths})
+    derivatives = []
+    for width in targets:
+        height = round(source.height * width / source.width)
+        resized = source if width == source.width else source.resize((width, height), Image.LANCZOS)
+        for fmt in supported_formats(formats):
+            extension, pillow_format, _, options = DERIVATIVE_FORMATS[fmt]
+            image = resized
+            if pillow_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            buffer = BytesIO()
+            image.save(buffer, format=pillow_format, **options)
+            content = ContentFile(buffer.getvalue(), name=f'{base_name}_{width}w.{extension}')
+            derivatives.append((width, height, fmt, content))
+    return derivatives
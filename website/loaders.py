@@ -0,0 +1,90 @@
+"""
+Chargement déclaratif des données d'une vue.
+
+Une vue déclare ses dépendances, indépendantes les unes des autres ::
+
+    HOME_DATA = DataDependencies(
+        Batch(('hero_section',), load_site_singletons),
+        news=lambda: list(News.objects.filter(published=True)[:3]),
+        ...
+    )
+    context = HOME_DATA.load()           # vue synchrone
+    context = await HOME_DATA.aload()    # vue asynchrone
+
+En synchrone, les dépendances sont chargées l'une après l'autre, celles d'un
+même ``Batch`` par un seul appel (ex. hero et logo : une lecture groupée du
+cache). En asynchrone, elles sont lancées ensemble, chacune dans un thread
+avec sa propre connexion : le temps passé en base est celui de la plus lente
+et non la somme. À l'intérieur d'une transaction (tests, ATOMIC_REQUESTS), les
+lectures doivent passer par la connexion de la transaction : elles restent
+alors séquentielles.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+
+
+class Batch:
+    """Dépendances chargées ensemble : ``load()`` retourne un dict {nom: valeur}"""
+
+    def __init__(self, names, load):
+        self.names = tuple(names)
+        self._load = load
+
+    def load(self):
+        values = self._load()
+        return {name: values[name] for name in self.names}
+
+
+class DataDependencies:
+    """Dépendances nommées d'une vue (callables synchrones sans argument)"""
+
+    def __init__(self, *batches, **loaders):
+        self.batches = batches
+        self.loaders = loaders
+
+    def load(self):
+        """Charge tout dans le thread courant ; retourne {nom: valeur}"""
+        data = {}
+        for batch in self.batches:
+            data.update(batch.load())
+        for name, load in self.loaders.items():
+            data[name] = load()
+        return data
+
+    async def aload(self):
+        """Charge toutes les dépendances en parallèle ; retourne {nom: valeur}"""
+        jobs = [batch.load for batch in self.batches]
+        jobs += [_named(name, load) for name, load in self.loaders.items()]
+        # Transaction ouverte dans le thread des appels synchrones de la requête
+        concurrent = not await sync_to_async(_in_transaction)()
+        results = await asyncio.gather(*(_run(job, concurrent) for job in jobs))
+        data = {}
+        for values in results:
+            data.update(values)
+        return data
+
+
+def _in_transaction():
+    return connection.in_atomic_block
+
+
+def _named(name, load):
+    return lambda: {name: load()}
+
+
+async def _run(job, concurrent):
+    if not concurrent:
+        return await sync_to_async(job)()
+    return await sync_to_async(_in_worker_thread(job), thread_sensitive=False)()
+
+
+def _in_worker_thread(job):
+    def run():
+        try:
+            return job()
+        finally:
+            # Connexion propre au thread : fermée ou conservée selon CONN_MAX_AGE
+            close_old_connections()
+    return run
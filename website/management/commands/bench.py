@@ -0,0 +1,369 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import importlib.util
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from website.bench import (
+    DEFAULT_PREFIX, check_database_profile, clear_dataset, compare_to_baseline, database_profile, route_urls,
+    seed_dataset, summarize,
+)
+from website.profiling import percentile
+
+
+SERVER_TIMING_QUERIES_RE = re.compile(r'SQL x(\d+)')
+SERVER_TIMING_CONNECTIONS_RE = re.compile(r'connect x(\d+)')
+
+# Serveurs mesurés : application et classe de workers gunicorn
+SERVERS = {
+    'gunicorn': {'app': 'azigroup_project.wsgi:application', 'worker_class': 'sync', 'env': {}},
+    'asgi': {
+        'app': 'azigroup_project.asgi:application',
+        'worker_class': 'uvicorn_worker.UvicornWorker',
+        # Connexions persistantes sans effet sous ASGI (voir gunicorn_asgi.py)
+        'env': {'ASYNC_VIEWS': 'True', 'DB_CONN_MAX_AGE': '0'},
+    },
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _slow_clients(port, count, interval=0.5):
+    """
+    Ouvre ``count`` connexions qui envoient une requête incomplète, un
+    en-tête toutes les ``interval`` secondes, pendant la durée du bloc (clients
+    lents ou mobiles, « slowloris »). Un worker synchrone reste bloqué sur
+    chacune ; une boucle asyncio continue de servir les autres requêtes.
+    """
+    if not count:
+        yield
+        return
+    stop = threading.Event()
+
+    def dribble():
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=5) as sock:
+                sock.sendall(b'GET /robots.txt HTTP/1.1\r\nHost: localhost\r\n')
+                while not stop.wait(interval):
+                    sock.sendall(b'X-Slow-Client: 1\r\n')
+        except OSError:
+            # Connexion fermée par le serveur (délai dépassé) : le client lent s'arrête
+            pass
+
+    threads = [threading.Thread(target=dribble, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    # Laisse aux connexions le temps d'occuper les workers
+    time.sleep(interval)
+    try:
+        yield
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+
+def _consume(response):
+    """Lit tout le corps de la réponse (y compris en flux) pour mesurer le temps complet"""
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = (
+        "Banc de performance : génère un jeu de données synthétique, mesure chaque "
+        "route de website.urls (client de test et gunicorn) et compare à une référence"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=20, help="Nombre d'entreprises générées")
+        parser.add_argument('--news', type=int, default=100, help="Nombre d'actualités générées")
+        parser.add_argument('--testimonials', type=int, default=10, help="Nombre de témoignages générés")
+        parser.add_argument('--images', type=int, default=4, help="Images de projet par entreprise")
+        parser.add_argument('--requests', type=int, default=30, help="Requêtes mesurées par route")
+        parser.add_argument(
+            '--mode', choices=['client', 'gunicorn', 'asgi', 'all'], default='all',
+            help=(
+                "Client de test Django, gunicorn WSGI (workers synchrones), gunicorn ASGI "
+                "(workers uvicorn, vues asynchrones) ou tous (ASGI si uvicorn-worker est installé)"
+            ),
+        )
+        parser.add_argument('--workers', type=int, default=2, help="Workers gunicorn")
+        parser.add_argument('--concurrency', type=int, default=8, help="Clients simultanés (modes serveur)")
+        parser.add_argument(
+            '--slow-clients', type=int, default=0,
+            help="Connexions qui envoient leur requête au goutte-à-goutte pendant les mesures (modes serveur)",
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=10,
+            help="Délai maximal d'une requête mesurée (s) ; au-delà elle est comptée en erreur",
+        )
+        parser.add_argument(
+            '--routes', help="Routes mesurées, séparées par des virgules (ex. index,api_news ; toutes par défaut)",
+        )
+        parser.add_argument(
+            '--no-page-cache', action='store_true',
+            help="Désactive le cache des pages pour mesurer le rendu complet",
+        )
+        parser.add_argument('--output', help="Fichier JSON de résultats (sortie standard par défaut)")
+        parser.add_argument(
+            '--baseline', default=str(settings.BASE_DIR / 'bench_baseline.json'),
+            help="Fichier de référence à comparer",
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help="Enregistre les résultats comme nouvelle référence",
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help="Dégradation relative tolérée sur le p50 et le débit",
+        )
+        parser.add_argument('--keep-data', action='store_true', help="Conserve le jeu de données après le banc")
+        parser.add_argument(
+            '--allow-live', action='store_true',
+            help=(
+                "Confirme l'écriture du jeu de données dans la base configurée (DATABASES['default']) : "
+                "à réserver à une base dédiée au banc"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if not options['allow_live']:
+            database = connection.settings_dict['NAME']
+            raise CommandError(
+                f"Le banc insère puis supprime des données dans la base « {database} ». "
+                "Pointer DATABASE_URL vers une base dédiée et relancer avec --allow-live."
+            )
+        self.stderr.write("Génération du jeu de données…")
+        dataset = seed_dataset(
+            companies=options['companies'],
+            news=options['news'],
+            testimonials=options['testimonials'],
+            images=options['images'],
+        )
+        urls = route_urls(dataset)
+        if options['routes']:
+            selected = {f"website:{name.strip()}" for name in options['routes'].split(',') if name.strip()}
+            unknown = selected - set(urls)
+            if unknown:
+                clear_dataset(DEFAULT_PREFIX)
+                raise CommandError(f"Routes inconnues : {', '.join(sorted(unknown))}")
+            urls = {name: url for name, url in urls.items() if name in selected}
+        results = {'dataset': {key: value for key, value in dataset.items() if not key.endswith('_slug')}}
+        results['dataset']['page_cache'] = not options['no_page_cache']
+        results['dataset']['slow_clients'] = options['slow_clients']
+        # Réglages de connexion (DB_CONN_MAX_AGE, DB_POOL, PRAGMA SQLite), partagés avec gunicorn
+        results['database'] = database_profile()
+
+        try:
+            if options['mode'] in ('client', 'all'):
+                results['client'] = self.run_client(urls, options)
+            if options['mode'] in ('gunicorn', 'all'):
+                results['gunicorn'] = self.run_server('gunicorn', urls, options)
+            if options['mode'] == 'asgi' or (
+                options['mode'] == 'all' and importlib.util.find_spec('uvicorn_worker') is not None
+            ):
+                results['asgi'] = self.run_server('asgi', urls, options)
+        finally:
+            if not options['keep_data']:
+                clear_dataset(DEFAULT_PREFIX)
+
+        output = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        # Réglages de la base annoncés mais sans effet mesurable (PRAGMA, connexions persistantes)
+        problems = check_database_profile(results, persistent_modes=[
+            name for name, server in SERVERS.items() if server['env'].get('DB_CONN_MAX_AGE') != '0'
+        ])
+        if problems:
+            raise CommandError("Configuration de la base sans effet :\n  " + "\n  ".join(problems))
+
+        baseline_path = options['baseline']
+        if options['save_baseline']:
+            with open(baseline_path, 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+            self.stderr.write(f"Référence enregistrée dans {baseline_path}")
+            return
+
+        if not os.path.exists(baseline_path):
+            self.stderr.write(f"Aucune référence ({baseline_path}) : comparaison ignorée")
+            return
+        with open(baseline_path, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        if baseline.get('dataset') != results['dataset']:
+            raise CommandError(
+                "La référence a été mesurée sur un autre jeu de données : "
+                f"{baseline.get('dataset')} (référence) != {results['dataset']}"
+            )
+        regressions = compare_to_baseline(results, baseline, tolerance=options['tolerance'])
+        if regressions:
+            raise CommandError("Régressions de performance :\n  " + "\n  ".join(regressions))
+        self.stderr.write("Aucune régression par rapport à la référence")
+
+    def run_client(self, urls, options):
+        """
+        Mesure chaque route via le client de test (sans réseau, un seul thread).
+        Les mesures partent de caches froids dans un cache local propre au banc :
+        le cache du site (Redis partagé en production) n'est pas vidé.
+        """
+        self.stderr.write("Mesures via le client de test…")
+        client = Client(HTTP_HOST='localhost')
+        report = {}
+        isolated = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench'}},
+            PAGE_CACHE_ENABLED=not options['no_page_cache'],
+        )
+        with isolated:
+            cache.clear()
+            for name, url in urls.items():
+                # Première requête (caches froids) puis requêtes mesurées
+                with CaptureQueriesContext(connection) as cold:
+                    response = client.get(url)
+                    _consume(response)
+                latencies = []
+                queries = 0
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    with CaptureQueriesContext(connection) as warm:
+                        start = time.perf_counter()
+                        _consume(client.get(url))
+                        latencies.append(time.perf_counter() - start)
+                    queries = max(queries, len(warm))
+                report[name] = {
+                    'url': url,
+                    'status': response.status_code,
+                    'cold_queries': len(cold),
+                    'queries': queries,
+                    **summarize(latencies, time.perf_counter() - started),
+                }
+        return report
+
+    def run_server(self, name, urls, options):
+        """
+        Mesure chaque route sur un serveur gunicorn local (``SERVERS[name]``),
+        avec clients concurrents et, en option, des clients lents
+        """
+        server_config = SERVERS[name]
+        port = _free_port()
+        base = f'http://127.0.0.1:{port}'
+        env = {
+            **os.environ,
+            # Nombre de requêtes SQL lu dans l'en-tête Server-Timing
+            'REQUEST_PROFILING': 'True',
+            'REQUEST_PROFILING_SAMPLE_RATE': '0',
+            'PAGE_CACHE_ENABLED': str(not options['no_page_cache']),
+            **server_config['env'],
+        }
+        self.stderr.write(
+            f"Démarrage de gunicorn {name} ({options['workers']} workers {server_config['worker_class']}) sur {base}…"
+        )
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', server_config['app'],
+                '--bind', f'127.0.0.1:{port}', '--workers', str(options['workers']),
+                '--worker-class', server_config['worker_class'],
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR, env=env,
+            # Journaux de profilage affichés seulement en mode verbeux
+            stderr=None if options['verbosity'] > 1 else subprocess.DEVNULL,
+        )
+        try:
+            self._wait_for_server(server, base)
+            report = {}
+            timeout = options['timeout']
+            with ThreadPoolExecutor(max_workers=max(options['concurrency'], 1)) as executor:
+                for route, url in urls.items():
+                    # Préchauffage : une requête par worker
+                    for _ in range(options['workers']):
+                        self._fetch(base + url, timeout)
+                    with _slow_clients(port, options['slow_clients']):
+                        started = time.perf_counter()
+                        samples = list(executor.map(
+                            lambda _: self._fetch(base + url, timeout), range(options['requests']),
+                        ))
+                        wall_time = time.perf_counter() - started
+                    succeeded = [sample for sample in samples if sample[0] is not None]
+                    # Médiane : selon le worker servi, le cache local peut être froid
+                    queries = sorted(count for _, _, count, _ in succeeded if count is not None)
+                    # Connexions ouvertes à la base : 0 attendu avec CONN_MAX_AGE ou un pool
+                    connects = [count for _, _, _, count in succeeded if count is not None]
+                    report[route] = {
+                        'url': url,
+                        'status': max((status for status, _, _, _ in succeeded), default=None),
+                        'errors': len(samples) - len(succeeded),
+                        'queries': percentile(queries, 0.5) if queries else None,
+                        'connections': sum(connects) if connects else None,
+                        **summarize([latency for _, latency, _, _ in succeeded], wall_time),
+                    }
+            return report
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    def _wait_for_server(self, server, base, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn s'est arrêté au démarrage")
+            try:
+                urllib.request.urlopen(base + '/robots.txt', timeout=1).read()
+                return
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn ne répond pas après {timeout} s")
+
+    @staticmethod
+    def _fetch(url, timeout=30):
+        """
+        Retourne (statut, latence en secondes, requêtes SQL et connexions
+        ouvertes d'après Server-Timing) ; statut None si la requête expire ou échoue
+        """
+        request = urllib.request.Request(url, headers={'Host': 'localhost'})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                status, headers = response.status, response.headers
+        except urllib.error.HTTPError as error:
+            error.read()
+            status, headers = error.code, error.headers
+        except (urllib.error.URLError, OSError):
+            return None, time.perf_counter() - start, None, None
+        latency = time.perf_counter() - start
+        server_timing = headers.get('Server-Timing', '')
+        queries = SERVER_TIMING_QUERIES_RE.search(server_timing)
+        connects = SERVER_TIMING_CONNECTIONS_RE.search(server_timing)
+        return (
+            status, latency,
+            int(queries.group(1)) if queries else None,
+            int(connects.group(1)) if connects else None,
+        )
@@ -0,0 +1,102 @@
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from website.bench import delete_seed_images, route_urls, seed_dataset
+from website.critical_css import FOLD_SECTIONS, critical_css_path, extract_critical_css
+from website.templatetags.critical_css import STYLESHEET
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcule le CSS critique (premier écran) de chaque page de CRITICAL_CSS_PAGES à partir "
+        "de son HTML rendu, sans navigateur, et l'écrit dans CRITICAL_CSS_DIR"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', help="Pages traitées, séparées par des virgules (CRITICAL_CSS_PAGES par défaut)",
+        )
+        parser.add_argument(
+            '--sections', type=int, default=FOLD_SECTIONS,
+            help="Blocs de <main> considérés comme visibles au premier écran",
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help="N'écrit rien ; échoue si un fichier est absent ou périmé (intégration continue)",
+        )
+
+    def handle(self, *args, **options):
+        pages = settings.CRITICAL_CSS_PAGES
+        if options['pages']:
+            pages = [page.strip() for page in options['pages'].split(',') if page.strip()]
+            unknown = set(pages) - set(settings.CRITICAL_CSS_PAGES)
+            if unknown:
+                raise CommandError(f"Pages hors de CRITICAL_CSS_PAGES : {', '.join(sorted(unknown))}")
+
+        stylesheet = finders.find(STYLESHEET)
+        if not stylesheet:
+            raise CommandError(f"Feuille de style introuvable : {STYLESHEET}")
+        with open(stylesheet, encoding='utf-8') as handle:
+            css = handle.read()
+
+        outdated = []
+        for page, html in self.render_pages(pages).items():
+            critical = extract_critical_css(html, css, options['sections']) + '\n'
+            path = critical_css_path(page)
+            current = None
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as handle:
+                    current = handle.read()
+            if options['check']:
+                if current != critical:
+                    outdated.append(page)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(critical)
+            self.stdout.write(f"{page} : {len(critical)} octets sur {len(css)} -> {path}")
+
+        if outdated:
+            raise CommandError(
+                f"CSS critique absent ou périmé : {', '.join(outdated)} (lancer manage.py build_critical_css)"
+            )
+
+    def render_pages(self, pages):
+        """
+        Rend chaque page sur un jeu de données synthétique, créé dans une
+        transaction annulée et avec un cache isolé : la base et le cache du
+        site ne sont pas modifiés, les images déposées sont supprimées ensuite
+        """
+        isolated = override_settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'critical-css'},
+            },
+            PAGE_CACHE_ENABLED=False,
+            CRITICAL_CSS_ENABLED=False,
+            RATE_LIMIT_ENABLED=False,
+            ALLOWED_HOSTS=['testserver'],
+        )
+        rendered = {}
+        try:
+            with isolated, transaction.atomic():
+                dataset = seed_dataset(companies=6, news=9, testimonials=3, images=0, prefix='critical')
+                urls = route_urls(dataset)
+                client = Client()
+                for page in pages:
+                    url = urls.get(f'website:{page}')
+                    if url is None:
+                        raise CommandError(f"Aucune route website:{page} à rendre")
+                    response = client.get(url)
+                    if response.status_code != 200:
+                        raise CommandError(f"{url} : statut {response.status_code}")
+                    rendered[page] = response.content.decode(response.charset or 'utf-8')
+                transaction.set_rollback(True)
+        finally:
+            delete_seed_images('critical')
+        return rendered
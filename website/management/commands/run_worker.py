@@ -0,0 +1,99 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import logging
+import signal
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from website.tasks import claim_tasks, execute_task
+
+logger = logging.getLogger('website.tasks')
+
+
+def _init_process():
+    # Processus enfants : Django doit être initialisé (méthode de démarrage "spawn")
+    django.setup()
+
+
+def _succeeded(future):
+    """Résultat d'une tâche ; une exception sortie d'execute_task compte comme un échec"""
+    try:
+        return future.result()
+    except Exception:
+        logger.exception("Erreur du worker pendant l'exécution d'une tâche")
+        return False
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches d'arrière-plan de la file website.Task"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.TASK_WORKER_CONCURRENCY,
+            help="Nombre de tâches exécutées en parallèle",
+        )
+        parser.add_argument(
+            '--pool', choices=['thread', 'process'], default=settings.TASK_WORKER_POOL,
+            help="Type de pool : threads (E/S) ou processus (traitement d'images)",
+        )
+        parser.add_argument(
+            '--visibility-timeout', type=int, default=settings.TASK_VISIBILITY_TIMEOUT,
+            help="Secondes avant qu'une tâche réservée non terminée soit reprise",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Secondes d'attente lorsque la file est vide",
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help="S'arrêter dès que la file est vide (cron, tests)",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        if options['pool'] == 'process':
+            # Les connexions ne doivent pas être partagées avec les processus enfants
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=concurrency, initializer=_init_process)
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        self.stdout.write(f"Worker démarré ({options['pool']} x{concurrency})")
+        running = set()
+        processed = failed = 0
+        with executor:
+            while not self.stopping:
+                claimed = []
+                if len(running) < concurrency:
+                    claimed = claim_tasks(concurrency - len(running), options['visibility_timeout'])
+                    running.update(executor.submit(execute_task, task_id) for task_id in claimed)
+
+                if not running:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    processed += 1
+                    if not _succeeded(future):
+                        failed += 1
+
+            # Arrêt demandé : terminer les tâches en cours
+            for future in running:
+                processed += 1
+                if not _succeeded(future):
+                    failed += 1
+
+        self.stdout.write(f"Worker arrêté : {processed} tâche(s) exécutée(s), {failed} en échec")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
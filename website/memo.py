@@ -0,0 +1,103 @@
+"""
+Mémoïsation limitée à la requête en cours.
+
+``RequestMemoMiddleware`` ouvre un magasin (un dict) au début de chaque
+requête et le referme à la fin. Il est porté par une ``ContextVar`` : chaque
+requête, même servie par le même thread ou la même boucle asyncio (ASGI),
+voit son propre magasin. Hors requête (shell, tâches, commandes),
+``request_memo`` calcule la valeur à chaque appel.
+
+Les accesseurs lus sur toutes les pages (objet actif des modèles « un seul
+actif », cartes des entreprises actives, snapshot du site, paramètres) passent
+par ce magasin : la vue et le context processor partagent le même résultat.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+_store = ContextVar('website_request_memo', default=None)
+
+
+def request_memo(key, compute):
+    """Retourne la valeur mémoïsée sous ``key`` pour la requête, ou la calcule"""
+    store = _store.get()
+    if store is None:
+        return compute()
+    try:
+        return store[key]
+    except KeyError:
+        value = store[key] = compute()
+        return value
+
+
+def is_memoized(key):
+    """Indique si une valeur est déjà mémoïsée pour la requête"""
+    store = _store.get()
+    return store is not None and key in store
+
+
+def remember(key, value):
+    """Mémoïse une valeur chargée ailleurs (ex. par lot) pour la requête"""
+    store = _store.get()
+    if store is not None:
+        store[key] = value
+
+
+def forget(key):
+    """Oublie une valeur (ex. après l'enregistrement de l'objet correspondant)"""
+    store = _store.get()
+    if store is not None:
+        store.pop(key, None)
+
+
+def request_memoized(func):
+    """
+    Mémoïse une fonction pour la requête en cours, par arguments (hachables).
+    ``func.forget(*args, **kwargs)`` oublie un résultat.
+    """
+    def make_key(args, kwargs):
+        return (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return request_memo(make_key(args, kwargs), lambda: func(*args, **kwargs))
+
+    wrapper.forget = lambda *args, **kwargs: forget(make_key(args, kwargs))
+    return wrapper
+
+
+@contextmanager
+def request_memo_scope():
+    """Ouvre un magasin hors requête (tâche, commande) : ``with request_memo_scope(): ...``"""
+    token = _store.set({})
+    try:
+        yield
+    finally:
+        _store.reset(token)
+
+
+class RequestMemoMiddleware:
+    """Ouvre un magasin de mémoïsation vide pour chaque requête (WSGI et ASGI)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_memo_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Les vues synchrones exécutées dans un thread (sync_to_async) reçoivent
+        # une copie du contexte : elles partagent ce même magasin
+        with request_memo_scope():
+            return await self.get_response(request)
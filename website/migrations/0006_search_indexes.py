@@ -0,0 +1,98 @@
+from django.db import migrations, transaction
+from django.db.utils import DatabaseError
+
+
+SEARCH_CONFIG = 'french_unaccent'
+
+
+def create_postgres_search(apps, schema_editor):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    with schema_editor.connection.cursor() as cursor:
+        # Configuration française insensible aux accents (unaccent si disponible)
+        cursor.execute('SELECT 1 FROM pg_ts_config WHERE cfgname = %s', [SEARCH_CONFIG])
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = french)')
+            try:
+                with transaction.atomic(using=schema_editor.connection.alias):
+                    cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+                    cursor.execute(
+                        f'ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} '
+                        'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem'
+                    )
+            except DatabaseError:
+                # Extension non autorisée : stemming français seul
+                pass
+
+    # Expressions identiques à celles de website.search.PostgresSearchBackend
+    News = apps.get_model('website', 'News')
+    Company = apps.get_model('website', 'Company')
+    schema_editor.add_index(News, GinIndex(
+        SearchVector('title', 'excerpt', 'content', config=SEARCH_CONFIG),
+        name='website_news_search_gin',
+    ))
+    schema_editor.add_index(Company, GinIndex(
+        SearchVector('name', 'description', config=SEARCH_CONFIG),
+        name='website_company_search_gin',
+    ))
+
+
+def drop_postgres_search(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP INDEX IF EXISTS website_news_search_gin')
+        cursor.execute('DROP INDEX IF EXISTS website_company_search_gin')
+        cursor.execute(f'DROP TEXT SEARCH CONFIGURATION IF EXISTS {SEARCH_CONFIG}')
+
+
+def create_sqlite_search(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS website_news_fts '
+            "USING fts5(title, excerpt, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS website_company_fts '
+            "USING fts5(name, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            'INSERT INTO website_news_fts (rowid, title, excerpt, content) '
+            "SELECT id, title, COALESCE(excerpt, ''), content FROM website_news"
+        )
+        cursor.execute(
+            'INSERT INTO website_company_fts (rowid, name, description) '
+            'SELECT id, name, description FROM website_company'
+        )
+
+
+def drop_sqlite_search(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS website_news_fts')
+        cursor.execute('DROP TABLE IF EXISTS website_company_fts')
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        create_postgres_search(apps, schema_editor)
+    elif vendor == 'sqlite':
+        create_sqlite_search(apps, schema_editor)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        drop_postgres_search(apps, schema_editor)
+    elif vendor == 'sqlite':
+        drop_sqlite_search(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0005_alter_contact_service'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+def backfill_dimensions(apps, schema_editor):
+    """Renseigne les dimensions des images existantes (fichiers manquants ignorés)"""
+    from website.images import read_dimensions
+
+    CompanyProjectImage = apps.get_model('website', 'CompanyProjectImage')
+    for project in CompanyProjectImage.objects.filter(width__isnull=True).exclude(image=''):
+        width, height = read_dimensions(project.image)
+        if width:
+            CompanyProjectImage.objects.filter(pk=project.pk).update(width=width, height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0006_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyprojectimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Hauteur'),
+        ),
+        migrations.AddField(
+            model_name='companyprojectimage',
+            name='srcset',
+            field=models.TextField(blank=True, editable=False, verbose_name='srcset'),
+        ),
+        migrations.AddField(
+            model_name='companyprojectimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='company_projects/thumbs/', verbose_name='Miniature'),
+        ),
+        migrations.AddField(
+            model_name='companyprojectimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Largeur'),
+        ),
+        migrations.RunPython(backfill_dimensions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_project_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(db_index=True, max_length=255, verbose_name='Fichier source')),
+                ('width', models.PositiveIntegerField(verbose_name='Largeur')),
+                ('height', models.PositiveIntegerField(verbose_name='Hauteur')),
+                ('format', models.CharField(choices=[('avif', 'AVIF'), ('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10, verbose_name='Format')),
+                ('file', models.ImageField(upload_to='derivatives/', verbose_name='Fichier')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date de création')),
+            ],
+            options={
+                'verbose_name': "Dérivé d'image",
+                'verbose_name_plural': "Dérivés d'images",
+                'ordering': ['source', 'format', 'width'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='imagederivative',
+            constraint=models.UniqueConstraint(fields=('source', 'width', 'format'), name='unique_image_derivative'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:50
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0008_imagederivative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Tâche')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Arguments')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('failed', 'Échouée')], default='pending', max_length=10, verbose_name='Statut')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Tentatives maximum')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Exécuter à partir de')),
+                ('locked_until', models.DateTimeField(blank=True, help_text='Au-delà, une tâche en cours est considérée comme abandonnée', null=True, verbose_name="Verrouillée jusqu'à")),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': "Tâche d'arrière-plan",
+                'verbose_name_plural': "Tâches d'arrière-plan",
+                'ordering': ['run_at'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='website_task_status_run_at')],
+            },
+        ),
+    ]
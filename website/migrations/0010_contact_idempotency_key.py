@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0009_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, help_text='Fournie par les imports en masse pour ignorer les envois répétés', max_length=100, null=True, unique=True, verbose_name="Clé d'idempotence"),
+        ),
+    ]
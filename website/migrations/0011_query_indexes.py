@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0010_contact_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('active', True)), fields=['name'], name='website_company_active_name'),
+        ),
+        migrations.AddIndex(
+            model_name='companyprojectimage',
+            index=models.Index(fields=['company', 'order', 'created_at'], name='website_projimg_company_order'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(condition=models.Q(('published', True)), fields=['-created_at', '-id'], name='website_news_published_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-created_at'], name='website_testim_active_recent'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+def keep_latest_active(apps, schema_editor):
+    """Avant la contrainte : ne garde active que la ligne la plus récente de chaque modèle"""
+    for model_name in ('HomePageHero', 'NavigationLogo'):
+        model = apps.get_model('website', model_name)
+        latest = model.objects.filter(active=True).order_by('-created_at', '-id').first()
+        if latest is not None:
+            model.objects.filter(active=True).exclude(pk=latest.pk).update(active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0011_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_active, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='homepagehero',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True)), fields=('active',), name='website_homepagehero_single_active'),
+        ),
+        migrations.AddConstraint(
+            model_name='navigationlogo',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True)), fields=('active',), name='website_navigationlogo_single_active'),
+        ),
+    ]
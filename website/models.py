@@ -1,7 +1,14 @@
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.urls import reverse
 from django.core.validators import EmailValidator
+from .images import encode_derivatives, make_thumbnail, read_dimensions
+from .memo import forget, is_memoized, remember, request_memo
+from . import site_settings
+from .versions import bump_version, current_version
+import hashlib
 import json
 
 
@@ -42,6 +49,15 @@ class Contact(models.Model):
         default='nouveau', 
         verbose_name="Statut"
     )
+    idempotency_key = models.CharField(
+        max_length=100, 
+        unique=True, 
+        blank=True, 
+        null=True, 
+        editable=False, 
+        verbose_name="Clé d'idempotence",
+        help_text="Fournie par les imports en masse pour ignorer les envois répétés"
+    )
     
     class Meta:
         verbose_name = "Message de contact"
@@ -55,6 +71,11 @@ class Contact(models.Model):
         return reverse('admin:website_contact_change', args=[str(self.id)])
 
 
+# Version du format retourné par Company.to_card() ; l'incrémenter à chaque
+# changement de structure pour ignorer les cartes déjà en cache
+COMPANY_CARD_VERSION = 2
+
+
 class Company(models.Model):
     """Modèle pour les entreprises du groupe"""
     
@@ -96,6 +117,10 @@ class Company(models.Model):
         verbose_name = "Entreprise"
         verbose_name_plural = "Entreprises"
         ordering = ['name']
+        indexes = [
+            # Cartes, sitemap et API : entreprises actives triées par nom
+            models.Index(fields=['name'], condition=models.Q(active=True), name='website_company_active_name'),
+        ]
     
     def __str__(self):
         return self.name
@@ -120,6 +145,29 @@ class Company(models.Model):
             return json.loads(self.kpis)
         except (json.JSONDecodeError, TypeError):
             return []
+    
+    def to_card(self):
+        """
+        Retourne la représentation dénormalisée utilisée par la grille des
+        entreprises, le footer et l'API (voir ``COMPANY_CARD_VERSION``)
+        """
+        try:
+            logo_url = self.logo.url if self.logo else None
+        except ValueError:
+            logo_url = None
+        return {
+            'id': self.id,
+            'name': self.name,
+            'slug': self.slug,
+            'description': self.description,
+            'icon': self.icon,
+            'gradient': self.gradient,
+            'logo_url': logo_url,
+            'logo_name': self.logo.name if self.logo else None,
+            'services': self.get_services_list(),
+            'kpis': self.get_kpis_list(),
+            'url': self.get_absolute_url(),
+        }
 
 
 class CompanyProjectImage(models.Model):
@@ -148,15 +196,51 @@ class CompanyProjectImage(models.Model):
         default=0, 
         verbose_name="Ordre d'affichage"
     )
+    # Métadonnées calculées à l'upload : la galerie n'ouvre jamais les fichiers
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Largeur")
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Hauteur")
+    thumbnail = models.ImageField(
+        upload_to='company_projects/thumbs/', 
+        blank=True, 
+        editable=False,
+        verbose_name="Miniature"
+    )
+    srcset = models.TextField(blank=True, editable=False, verbose_name="srcset")
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
     
+    THUMBNAIL_WIDTH = 480
+    
     class Meta:
         verbose_name = "Image de projet"
         verbose_name_plural = "Images de projets"
         ordering = ['order', 'created_at']
+        indexes = [
+            # Galerie d'une entreprise dans l'ordre d'affichage
+            models.Index(fields=['company', 'order', 'created_at'], name='website_projimg_company_order'),
+        ]
     
     def __str__(self):
         return f"{self.company.name} - {self.title}"
+    
+    def save(self, *args, **kwargs):
+        # Nouvelle image envoyée : dimensions lues depuis l'en-tête du fichier,
+        # miniature générée en arrière-plan (voir website.tasks)
+        if self.image and not self.image._committed:
+            self.width, self.height = read_dimensions(self.image)
+        super().save(*args, **kwargs)
+    
+    def generate_thumbnail(self):
+        """Crée la miniature, précalcule l'attribut srcset de la galerie et les enregistre"""
+        try:
+            content, thumb_width, _ = make_thumbnail(self.image, self.THUMBNAIL_WIDTH)
+        except (OSError, ValueError):
+            return
+        self.thumbnail.save(content.name, content, save=False)
+        sources = [f"{self.thumbnail.url} {thumb_width}w"]
+        if self.width and self.width > thumb_width:
+            sources.append(f"{self.image.url} {self.width}w")
+        self.srcset = ", ".join(sources)
+        self.save(update_fields=['thumbnail', 'srcset'])
 
 
 class News(models.Model):
@@ -192,6 +276,15 @@ class News(models.Model):
         verbose_name = "Actualité"
         verbose_name_plural = "Actualités"
         ordering = ['-created_at']
+        indexes = [
+            # Partiel : sur SQLite, published=True est compilé en « WHERE published »,
+            # que seul un index partiel de même condition peut servir.
+            # -id départage la pagination de l'API
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(published=True),
+                name='website_news_published_recent',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -231,11 +324,8 @@ class Setting(models.Model):
     
     @classmethod
     def get_setting(cls, key, default=None):
-        """Récupère un paramètre par sa clé"""
-        try:
-            return cls.objects.get(key=key).value
-        except cls.DoesNotExist:
-            return default
+        """Récupère un paramètre par sa clé (snapshot de website.site_settings)"""
+        return site_settings.get(key, default)
     
     @classmethod
     def set_setting(cls, key, value, description=""):
@@ -276,6 +366,11 @@ class Testimonial(models.Model):
         verbose_name = "Témoignage"
         verbose_name_plural = "Témoignages"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['-created_at'], condition=models.Q(active=True), name='website_testim_active_recent',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.company}"
@@ -285,7 +380,103 @@ class Testimonial(models.Model):
         return "★" * self.rating + "☆" * (5 - self.rating)
 
 
-class NavigationLogo(models.Model):
+# Objet actif de chaque modèle « un seul actif », par processus :
+# {label: (version, instance)}
+_active_instances = {}
+
+
+class SingleActiveModel(models.Model):
+    """
+    Modèle dont une seule ligne peut être active à la fois.
+
+    L'unicité est garantie par une contrainte unique partielle sur
+    ``active=True`` ; ``save()`` désactive les autres lignes dans la même
+    transaction. ``get_active()`` mémoïse l'objet actif pour la requête et
+    pour le processus ; la version lue dans le cache, changée par les
+    signaux après chaque modification, invalide les autres processus (avec
+    un délai borné si le cache n'est pas partagé, voir ``website.versions``).
+    """
+
+    # Tentatives d'enregistrement face à une activation concurrente
+    SAVE_ATTEMPTS = 3
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(
+                fields=['active'], condition=models.Q(active=True), name='%(app_label)s_%(class)s_single_active',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.active:
+            return super().save(*args, **kwargs)
+        for attempt in range(1, self.SAVE_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    type(self).objects.filter(active=True).exclude(pk=self.pk).update(active=False)
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Une autre ligne a été activée entre-temps : la contrainte a refusé la nôtre
+                if attempt == self.SAVE_ATTEMPTS:
+                    raise
+                # Un INSERT annulé ne doit pas devenir un UPDATE à la tentative suivante
+                if self._state.adding:
+                    self.pk = None
+
+    def validate_constraints(self, exclude=None):
+        # Activer une ligne est permis (save() désactive l'ancienne) :
+        # la contrainte ne doit pas faire échouer la validation des formulaires
+        exclude = set(exclude or ()) | {'active'}
+        super().validate_constraints(exclude=exclude)
+
+    @classmethod
+    def active_version_key(cls):
+        return f'website:active:{cls._meta.label_lower}'
+
+    @classmethod
+    def invalidate_active(cls):
+        """Change la version partagée : chaque processus rechargera l'objet actif"""
+        bump_version(cls.active_version_key())
+        forget(cls.active_version_key())
+
+    @classmethod
+    def get_active(cls):
+        """Retourne l'objet actif (ou None), au plus une lecture du cache par requête"""
+        return request_memo(cls.active_version_key(), cls._load_active)
+
+    @staticmethod
+    def get_active_many(*models):
+        """
+        Retourne {modèle: objet actif} pour plusieurs modèles : les versions
+        sont lues par un seul ``cache.get_many`` au lieu d'une lecture par modèle
+        """
+        missing = [model for model in models if not is_memoized(model.active_version_key())]
+        versions = cache.get_many([model.active_version_key() for model in missing]) if missing else {}
+        active = {}
+        for model in models:
+            key = model.active_version_key()
+            if model in missing:
+                active[model] = model._load_active(versions.get(key))
+                remember(key, active[model])
+            else:
+                active[model] = model.get_active()
+        return active
+
+    @classmethod
+    def _load_active(cls, version=None):
+        key = cls.active_version_key()
+        if version is None:
+            version = current_version(key)
+        cached = _active_instances.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        instance = cls.objects.filter(active=True).first()
+        _active_instances[key] = (version, instance)
+        return instance
+
+
+class NavigationLogo(SingleActiveModel):
     """Modèle pour le logo de navigation programmable"""
     
     name = models.CharField(
@@ -306,7 +497,7 @@ class NavigationLogo(models.Model):
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
     
-    class Meta:
+    class Meta(SingleActiveModel.Meta):
         verbose_name = "Logo de navigation"
         verbose_name_plural = "Logos de navigation"
         ordering = ['-created_at']
@@ -314,22 +505,13 @@ class NavigationLogo(models.Model):
     def __str__(self):
         return f"Logo navigation - {self.name}"
     
-    def save(self, *args, **kwargs):
-        # S'assurer qu'il n'y a qu'un seul logo de navigation actif
-        if self.active:
-            NavigationLogo.objects.filter(active=True).exclude(id=self.id).update(active=False)
-        super().save(*args, **kwargs)
-    
     @classmethod
     def get_active_logo(cls):
         """Retourne le logo de navigation actif"""
-        try:
-            return cls.objects.get(active=True)
-        except cls.DoesNotExist:
-            return None
+        return cls.get_active()
 
 
-class HomePageHero(models.Model):
+class HomePageHero(SingleActiveModel):
     """Modèle pour la section hero de la page d'accueil"""
     
     title = models.CharField(
@@ -359,7 +541,7 @@ class HomePageHero(models.Model):
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
     
-    class Meta:
+    class Meta(SingleActiveModel.Meta):
         verbose_name = "Section Hero de la page d'accueil"
         verbose_name_plural = "Sections Hero de la page d'accueil"
         ordering = ['-created_at']
@@ -367,16 +549,163 @@ class HomePageHero(models.Model):
     def __str__(self):
         return f"Hero - {self.title}"
     
-    def save(self, *args, **kwargs):
-        # S'assurer qu'il n'y a qu'une seule section hero active
-        if self.active:
-            HomePageHero.objects.filter(active=True).exclude(id=self.id).update(active=False)
-        super().save(*args, **kwargs)
-    
     @classmethod
     def get_active_hero(cls):
         """Retourne la section hero active"""
-        try:
-            return cls.objects.get(active=True)
-        except cls.DoesNotExist:
-            return None
\ No newline at end of file
+        return cls.get_active()
+
+
+class ImageDerivative(models.Model):
+    """Version redimensionnée/réencodée d'une image envoyée (srcset, <picture>)"""
+    
+    FORMAT_CHOICES = [
+        ('avif', 'AVIF'),
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+    
+    source = models.CharField(max_length=255, db_index=True, verbose_name="Fichier source")
+    width = models.PositiveIntegerField(verbose_name="Largeur")
+    height = models.PositiveIntegerField(verbose_name="Hauteur")
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name="Format")
+    file = models.ImageField(upload_to='derivatives/', verbose_name="Fichier")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Dérivé d'image"
+        verbose_name_plural = "Dérivés d'images"
+        ordering = ['source', 'format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'width', 'format'], name='unique_image_derivative'),
+        ]
+    
+    def __str__(self):
+        return f"{self.source} - {self.width}w {self.format}"
+    
+    @staticmethod
+    def cache_key(source):
+        return f"website:derivatives:{hashlib.sha1(source.encode()).hexdigest()}"
+    
+    @classmethod
+    def generate(cls, field_file):
+        """Génère (ou régénère) les dérivés d'un fichier image envoyé"""
+        if not field_file:
+            return []
+        cls.delete_for_source(field_file.name)
+        derivatives = []
+        for width, height, fmt, content in encode_derivatives(
+            field_file,
+            settings.IMAGE_DERIVATIVE_WIDTHS,
+            settings.IMAGE_DERIVATIVE_FORMATS,
+        ):
+            derivative = cls(source=field_file.name, width=width, height=height, format=fmt)
+            derivative.file.save(content.name, content, save=False)
+            derivatives.append(derivative)
+        cls.objects.bulk_create(derivatives)
+        cache.delete(cls.cache_key(field_file.name))
+        forget(cls.cache_key(field_file.name))
+        return derivatives
+    
+    @classmethod
+    def delete_for_source(cls, source):
+        """Supprime les dérivés (et leurs fichiers) d'un fichier source"""
+        for derivative in cls.objects.filter(source=source):
+            derivative.file.delete(save=False)
+            derivative.delete()
+        cache.delete(cls.cache_key(source))
+        forget(cls.cache_key(source))
+    
+    @classmethod
+    def for_source(cls, source):
+        """
+        Retourne les dérivés d'un fichier sous forme de dictionnaires
+        (format, width, height, url), mis en cache par fichier source
+        """
+        return cls.for_sources([source]).get(source, [])
+    
+    @classmethod
+    def for_sources(cls, sources):
+        """
+        Retourne {fichier: dérivés} pour plusieurs fichiers (FieldFile ou nom) :
+        une lecture groupée du cache et au plus une requête pour les absents.
+        Le résultat est mémoïsé pour la requête : une vue qui résout d'avance
+        les images de sa page évite une lecture par balise {% picture %}.
+        """
+        names = {getattr(source, 'name', source) for source in sources} - {'', None}
+        found, missing = {}, []
+        for name in names:
+            key = cls.cache_key(name)
+            if is_memoized(key):
+                found[name] = request_memo(key, list)
+            else:
+                missing.append(name)
+        if not missing:
+            return found
+        
+        keys = {cls.cache_key(name): name for name in missing}
+        cached = cache.get_many(list(keys))
+        loaded = {keys[key]: derivatives for key, derivatives in cached.items()}
+        absent = [name for name in missing if name not in loaded]
+        if absent:
+            fetched = {name: [] for name in absent}
+            for derivative in cls.objects.filter(source__in=absent).order_by('source', 'width'):
+                fetched[derivative.source].append({
+                    'format': derivative.format,
+                    'width': derivative.width,
+                    'height': derivative.height,
+                    'url': derivative.file.url,
+                })
+            cache.set_many(
+                {cls.cache_key(name): derivatives for name, derivatives in fetched.items()},
+                settings.IMAGE_DERIVATIVE_CACHE_TIMEOUT,
+            )
+            loaded.update(fetched)
+        for name, derivatives in loaded.items():
+            remember(cls.cache_key(name), derivatives)
+        found.update(loaded)
+        return found
+
+
+class Task(models.Model):
+    """Tâche d'arrière-plan exécutée par ``manage.py run_worker``"""
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_FAILED, 'Échouée'),
+    ]
+    
+    name = models.CharField(max_length=200, verbose_name="Tâche")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Arguments")
+    status = models.CharField(
+        max_length=10, 
+        choices=STATUS_CHOICES, 
+        default=STATUS_PENDING, 
+        verbose_name="Statut"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentatives")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Tentatives maximum")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Exécuter à partir de")
+    locked_until = models.DateTimeField(
+        blank=True, 
+        null=True, 
+        verbose_name="Verrouillée jusqu'à",
+        help_text="Au-delà, une tâche en cours est considérée comme abandonnée"
+    )
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
+    class Meta:
+        verbose_name = "Tâche d'arrière-plan"
+        verbose_name_plural = "Tâches d'arrière-plan"
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='website_task_status_run_at'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
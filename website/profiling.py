@@ -0,0 +1,288 @@
+"""
+Instrumentation des requêtes (activée par ``REQUEST_PROFILING``).
+
+Pour chaque requête, ``RequestProfilingMiddleware`` mesure le nombre de
+requêtes SQL et leur durée, les connexions ouvertes à la base, le temps de
+rendu des templates, le temps des context processors et les hits/misses du
+cache. Les mesures sont envoyées
+dans l'en-tête ``Server-Timing`` et journalisées par le logger
+``website.profiling``.
+
+Une fraction des requêtes (``REQUEST_PROFILING_SAMPLE_RATE``) alimente des
+échantillons par nom d'URL, partagés via le cache Django ; leurs percentiles
+sont consultables par l'équipe sur ``/api/profiling/``.
+"""
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.template.context import RequestContext
+
+
+logger = logging.getLogger(__name__)
+
+PROFILING_CACHE_PREFIX = 'website:profiling'
+PROFILING_VIEWS_KEY = f'{PROFILING_CACHE_PREFIX}:views'
+
+# Mesures de la requête en cours (une par thread / tâche asyncio)
+_current_profile = ContextVar('website_request_profile', default=None)
+
+
+class RequestProfile:
+    """Compteurs d'une requête"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        # Connexions ouvertes pendant la requête (0 si réutilisées : CONN_MAX_AGE, pool)
+        self.connections = 0
+        self.template_time = 0.0
+        self.context_processor_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Profondeurs d'imbrication : seuls les appels les plus externes sont chronométrés
+        self.template_depth = 0
+        self.cache_depth = 0
+
+    def as_dict(self, total):
+        return {
+            'total_ms': round(total * 1000, 2),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'connections': self.connections,
+            # Le rendu englobe les context processors : ils sont décomptés à part
+            'template_ms': round(max(self.template_time - self.context_processor_time, 0) * 1000, 2),
+            'context_processors_ms': round(self.context_processor_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current_profile():
+    """Retourne les mesures de la requête en cours, ou None hors profilage"""
+    return _current_profile.get()
+
+
+# ---------------------------------------------------------------------------
+# Points d'instrumentation
+# ---------------------------------------------------------------------------
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - start
+        profile.queries += 1
+
+
+def _record_connection(sender, connection, **kwargs):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.connections += 1
+
+
+def _instrument_templates():
+    """Chronomètre Template.render et l'exécution des context processors"""
+    if getattr(Template.render, 'profiled', False):
+        return
+    original_render = Template.render
+    original_bind = RequestContext.bind_template
+
+    @wraps(original_render)
+    def render(self, context):
+        profile = _current_profile.get()
+        if profile is None or profile.template_depth:
+            return original_render(self, context)
+        profile.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            profile.template_time += time.perf_counter() - start
+            profile.template_depth -= 1
+
+    @contextmanager
+    @wraps(original_bind)
+    def bind_template(self, template):
+        profile = _current_profile.get()
+        with ExitStack() as stack:
+            start = time.perf_counter()
+            # Les context processors sont appelés à l'entrée du bloc
+            stack.enter_context(original_bind(self, template))
+            if profile is not None:
+                profile.context_processor_time += time.perf_counter() - start
+            yield
+
+    render.profiled = True
+    Template.render = render
+    RequestContext.bind_template = bind_template
+
+
+def _instrument_cache_method(backend_class, name):
+    original = getattr(backend_class, name)
+    if getattr(original, 'profiled', False):
+        return
+
+    @wraps(original)
+    def method(self, *args, **kwargs):
+        profile = _current_profile.get()
+        # get_many() de BaseCache appelle get() : ne compter qu'une fois
+        if profile is None or profile.cache_depth:
+            return original(self, *args, **kwargs)
+        profile.cache_depth += 1
+        try:
+            result = original(self, *args, **kwargs)
+        finally:
+            profile.cache_depth -= 1
+        if name == 'get':
+            default = args[1] if len(args) > 1 else kwargs.get('default')
+            if result is default:
+                profile.cache_misses += 1
+            else:
+                profile.cache_hits += 1
+        else:
+            keys = list(args[0] if args else kwargs.get('keys', ()))
+            profile.cache_hits += len(result)
+            profile.cache_misses += len(keys) - len(result)
+        return result
+
+    method.profiled = True
+    setattr(backend_class, name, method)
+
+
+def _instrument_caches():
+    for alias in settings.CACHES:
+        backend_class = type(caches[alias])
+        _instrument_cache_method(backend_class, 'get')
+        _instrument_cache_method(backend_class, 'get_many')
+
+
+# ---------------------------------------------------------------------------
+# Échantillons et percentiles
+# ---------------------------------------------------------------------------
+
+SAMPLE_FIELDS = ('total_ms', 'queries', 'db_ms', 'template_ms', 'context_processors_ms')
+
+
+def _samples_key(view_name):
+    return f'{PROFILING_CACHE_PREFIX}:samples:{view_name}'
+
+
+def record_sample(view_name, metrics):
+    """
+    Ajoute une mesure aux échantillons de la vue (fenêtre glissante de
+    ``REQUEST_PROFILING_MAX_SAMPLES``). Les écritures concurrentes peuvent
+    perdre un échantillon, ce qui est sans conséquence pour des percentiles.
+    """
+    max_samples = getattr(settings, 'REQUEST_PROFILING_MAX_SAMPLES', 500)
+    key = _samples_key(view_name)
+    samples = cache.get(key) or []
+    samples.append(tuple(metrics[field] for field in SAMPLE_FIELDS))
+    cache.set(key, samples[-max_samples:], None)
+    views = cache.get(PROFILING_VIEWS_KEY) or set()
+    if view_name not in views:
+        cache.set(PROFILING_VIEWS_KEY, views | {view_name}, None)
+
+
+def percentile(sorted_values, fraction):
+    """Percentile par rang le plus proche d'une liste triée"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def get_profile_stats():
+    """Retourne p50/p95/p99 de chaque mesure, par nom d'URL"""
+    views = sorted(cache.get(PROFILING_VIEWS_KEY) or ())
+    all_samples = cache.get_many([_samples_key(name) for name in views])
+    stats = {}
+    for name in views:
+        samples = all_samples.get(_samples_key(name))
+        if not samples:
+            continue
+        stats[name] = {'samples': len(samples)}
+        for position, field in enumerate(SAMPLE_FIELDS):
+            values = sorted(sample[position] for sample in samples)
+            stats[name][field] = {
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+            }
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def server_timing_header(metrics):
+    """Formate les mesures pour l'en-tête Server-Timing"""
+    return ', '.join([
+        f'db;dur={metrics["db_ms"]};desc="SQL x{metrics["queries"]}"',
+        f'conn;desc="connect x{metrics["connections"]}"',
+        f'tpl;dur={metrics["template_ms"]};desc="Templates"',
+        f'cp;dur={metrics["context_processors_ms"]};desc="Context processors"',
+        f'cache;desc="hits={metrics["cache_hits"]} misses={metrics["cache_misses"]}"',
+        f'total;dur={metrics["total_ms"]}',
+    ])
+
+
+class RequestProfilingMiddleware:
+    """
+    Mesure chaque requête (à placer en tête de MIDDLEWARE).
+
+    Désactivé, le middleware se retire de la chaîne au démarrage
+    (``MiddlewareNotUsed``) et n'a aucun coût.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 0.1)
+        _instrument_templates()
+        _instrument_caches()
+        connection_created.connect(_record_connection, dispatch_uid='website.profiling.connections')
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+
+        metrics = profile.as_dict(time.perf_counter() - profile.started)
+        response['Server-Timing'] = server_timing_header(metrics)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        logger.info(
+            'request_profile method=%s path=%s view=%s status=%s total_ms=%s queries=%s '
+            'db_ms=%s connections=%s template_ms=%s context_processors_ms=%s cache_hits=%s cache_misses=%s',
+            request.method, request.path, view_name, response.status_code, metrics['total_ms'],
+            metrics['queries'], metrics['db_ms'], metrics['connections'], metrics['template_ms'],
+            metrics['context_processors_ms'], metrics['cache_hits'], metrics['cache_misses'],
+            extra={'profile': {**metrics, 'view': view_name, 'status': response.status_code}},
+        )
+        if view_name and random.random() < self.sample_rate:
+            record_sample(view_name, metrics)
+        return response
@@ -0,0 +1,49 @@
+"""
+Budgets de requêtes SQL des vues et des listes de l'admin.
+
+``@query_budget(n)`` déclare, à côté du code, le nombre maximal de requêtes
+qu'une vue (ou la liste d'un ``ModelAdmin``) peut exécuter, quel que soit
+le volume de données. Le décorateur ne modifie pas la vue ; les tests
+(``QueryBudgetTests``) rejouent chaque route sur des jeux de données de
+tailles croissantes et échouent au premier dépassement, ce qui révèle les
+requêtes N+1 déclenchées depuis les templates.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def query_budget(max_queries):
+    """Déclare le budget de requêtes d'une vue ou d'une classe ModelAdmin"""
+    def decorator(obj):
+        obj.query_budget = max_queries
+        return obj
+    return decorator
+
+
+def get_query_budget(obj):
+    """Retourne le budget déclaré, ou None"""
+    return getattr(obj, 'query_budget', None)
+
+
+def count_queries(request_func, *args, **kwargs):
+    """
+    Exécute ``request_func`` (ex. ``client.get``) et retourne la réponse et
+    les requêtes exécutées, corps des réponses en flux compris.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = request_func(*args, **kwargs)
+        if response.streaming:
+            response.streaming_content = [b''.join(response.streaming_content)]
+    return response, context.captured_queries
+
+
+class QueryBudgetMixin:
+    """Assertions de budget pour les ``TestCase``"""
+
+    def assertWithinQueryBudget(self, budget, request_func, *args, msg=None, **kwargs):
+        """Exécute la requête et échoue si elle dépasse ``budget`` requêtes (SQL affiché)"""
+        response, queries = count_queries(request_func, *args, **kwargs)
+        if len(queries) > budget:
+            details = '\n'.join(f'  {index}. {query["sql"]}' for index, query in enumerate(queries, 1))
+            self.fail(f'{msg or "Budget dépassé"} : {len(queries)} requêtes > {budget}\n{details}')
+        return response, len(queries)
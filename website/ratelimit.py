@@ -0,0 +1,179 @@
+"""
+Limitation de débit des points d'entrée d'écriture (formulaires de contact).
+
+``@rate_limit('contact_ajax')`` compte les requêtes par adresse IP et par
+email dans le cache Django (locmem en développement, Redis en production)
+avec une fenêtre glissante approchée : le compteur de la fenêtre courante
+plus celui de la fenêtre précédente, pondéré par la part de celle-ci encore
+couverte. Chaque requête incrémente d'abord le compteur de sa fenêtre
+(``cache.add`` puis ``cache.incr``, atomiques) et compare la valeur
+retournée à la limite : deux requêtes concurrentes ne peuvent pas lire le
+même compteur et passer toutes les deux. Cela coûte trois allers-retours au
+cache par clé, sans aucune requête SQL.
+
+Seules les requêtes acceptées sont comptées : une requête refusée par l'une
+des clés (ex. l'email) rend l'incrément aux compteurs déjà passés (ex. l'IP).
+
+Au-delà de la limite, la vue n'est pas appelée : la réponse est un 429 avec
+l'en-tête ``Retry-After``. Les limites se règlent par vue via
+``settings.RATE_LIMITS`` (ex. ``{'contact_ajax': '5/m'}``).
+"""
+import hashlib
+import json
+import math
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+
+RATE_LIMIT_PREFIX = 'website:ratelimit'
+
+RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Convertit '5/m' ou '100/15m' en (nombre de requêtes, période en secondes)"""
+    match = RATE_RE.match(rate or '')
+    if not match:
+        raise ValueError(f"Limite de débit invalide : {rate!r} (attendu ex. '5/m')")
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * PERIODS[unit]
+
+
+def client_ip(request):
+    """
+    Adresse du client. Derrière ``RATE_LIMIT_PROXY_COUNT`` proxys de
+    confiance, elle est lue dans ``X-Forwarded-For`` (les entrées ajoutées
+    par le client lui-même sont ignorées).
+    """
+    proxies = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def submitted_email(request):
+    """Email envoyé dans le formulaire ou le corps JSON, normalisé"""
+    email = request.POST.get('email') if request.method == 'POST' else None
+    if email is None and request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except (ValueError, UnicodeDecodeError):
+            data = None
+        if isinstance(data, dict):
+            email = data.get('email')
+    if not isinstance(email, str):
+        return None
+    return email.strip().lower() or None
+
+
+IDENTITIES = {
+    'ip': client_ip,
+    'email': submitted_email,
+}
+
+
+def _counter_key(name, scope, identity, window):
+    # Empreinte : ni email ni IP en clair dans le cache, longueur de clé bornée
+    digest = hashlib.blake2b(identity.encode(), digest_size=12).hexdigest()
+    return f'{RATE_LIMIT_PREFIX}:{name}:{scope}:{digest}:{window}'
+
+
+def hit(name, scope, identity, limit, period, now=None):
+    """
+    Enregistre une requête ; retourne 0 si elle est acceptée, sinon le
+    nombre de secondes avant qu'une nouvelle requête le soit.
+
+    Une requête refusée n'est pas comptée (l'incrément est aussitôt rendu) :
+    un client qui respecte ``Retry-After`` retrouve son quota après l'attente.
+    """
+    now = time.time() if now is None else now
+    window, offset = divmod(now, period)
+    window = int(window)
+    current_key = _counter_key(name, scope, identity, window)
+    previous_key = _counter_key(name, scope, identity, window - 1)
+
+    # Compteur créé si besoin puis incrémenté : la valeur retournée inclut
+    # cette requête et les requêtes concurrentes déjà comptées
+    cache.add(current_key, 0, period * 2)
+    current = cache.incr(current_key)
+    previous = cache.get(previous_key, 0)
+    # Part de la fenêtre précédente encore couverte par la fenêtre glissante
+    overlap = 1 - offset / period
+    if previous * overlap + current > limit:
+        release(name, scope, identity, period, now)
+        return _retry_after(previous, current - 1, limit, period, offset)
+    return 0
+
+
+def release(name, scope, identity, period, now):
+    """Rend l'incrément d'une requête finalement refusée (par une autre clé)"""
+    key = _counter_key(name, scope, identity, int(now // period))
+    try:
+        cache.decr(key)
+    except ValueError:
+        # Compteur expiré entre-temps : rien à rendre
+        pass
+
+
+def _retry_after(previous, current, limit, period, offset):
+    """Secondes avant que le poids de la fenêtre précédente laisse passer une requête"""
+    if current + 1 <= limit and previous:
+        # previous * (1 - t / period) + current + 1 <= limit
+        wait = period * (1 - (limit - current - 1) / previous) - offset
+    else:
+        # La fenêtre courante est pleine : attendre la suivante
+        wait = period - offset
+    return max(1, math.ceil(wait))
+
+
+def too_many_requests(request, retry_after):
+    """Réponse 429 : JSON pour les API, texte pour les formulaires HTML"""
+    message = f"Trop de requêtes. Veuillez réessayer dans {retry_after} secondes."
+    if request.content_type == 'application/json' or not request.accepts('text/html'):
+        response = JsonResponse({'success': False, 'message': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(name, keys=('ip',), methods=('POST',)):
+    """
+    Limite le débit d'une vue pour chaque identité de ``keys`` ('ip',
+    'email'). La limite est lue dans ``settings.RATE_LIMITS[name]`` à chaque
+    requête ; une vue absente de ce réglage n'est pas limitée.
+    """
+    for key in keys:
+        if key not in IDENTITIES:
+            raise ValueError(f"Clé de limitation inconnue : {key!r}")
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            rate = getattr(settings, 'RATE_LIMITS', {}).get(name)
+            if request.method in methods and rate and getattr(settings, 'RATE_LIMIT_ENABLED', True):
+                limit, period = parse_rate(rate)
+                now = time.time()
+                admitted = []
+                for scope in keys:
+                    identity = IDENTITIES[scope](request)
+                    if not identity:
+                        continue
+                    retry_after = hit(name, scope, identity, limit, period, now)
+                    if retry_after:
+                        # Seules les requêtes acceptées consomment le quota des autres clés
+                        for admitted_scope, admitted_identity in admitted:
+                            release(name, admitted_scope, admitted_identity, period, now)
+                        return too_many_requests(request, retry_after)
+                    admitted.append((scope, identity))
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,327 @@
+"""
+Moteurs de recherche plein texte pour les actualités et les entreprises.
+
+Le moteur est choisi selon la base de données :
+
+* PostgreSQL : ``SearchVector``/``SearchRank`` avec la configuration
+  ``french_unaccent`` (stemming français, accents ignorés) et un index GIN ;
+* SQLite : tables virtuelles FTS5 tenues à jour par les signaux ;
+* autres bases : repli sur ``icontains``.
+
+Le réglage ``SEARCH_BACKEND`` permet d'imposer un moteur (chemin Python).
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Company, News
+
+
+NEWS_FTS_TABLE = 'website_news_fts'
+COMPANY_FTS_TABLE = 'website_company_fts'
+
+# Tables FTS5 et colonnes indexées par modèle (cf. migration 0006)
+FTS_INDEXES = {
+    News: (NEWS_FTS_TABLE, ('title', 'excerpt', 'content')),
+    Company: (COMPANY_FTS_TABLE, ('name', 'description')),
+}
+
+# Marqueurs de surlignage insérés par la base puis convertis en <mark>
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+FRENCH_STOP_WORDS = {
+    'au', 'aux', 'avec', 'ce', 'ces', 'dans', 'de', 'des', 'du', 'en', 'et',
+    'la', 'le', 'les', 'leur', 'mais', 'ou', 'par', 'pour', 'sur', 'un', 'une',
+}
+
+# Suffixes retirés par le stemming léger (texte sans accents)
+FRENCH_SUFFIXES = (
+    'issements', 'issement', 'ements', 'ement', 'ations', 'ation',
+    'euses', 'euse', 'eaux', 'es', 's', 'x', 'e',
+)
+
+
+def strip_accents(text):
+    """Supprime les accents (é -> e, ç -> c)"""
+    normalized = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+
+def french_stem(word):
+    """Stemming léger du français : retire les suffixes flexionnels courants"""
+    for suffix in FRENCH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Découpe une requête en termes normalisés (minuscules, sans accents)"""
+    words = re.findall(r'\w+', strip_accents(text).lower())
+    return [word for word in words if len(word) > 1 and word not in FRENCH_STOP_WORDS]
+
+
+def render_highlight(text):
+    """Échappe le texte et convertit les marqueurs de surlignage en <mark>"""
+    html = escape(text or '')
+    html = html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+    return mark_safe(html)
+
+
+class SearchHits:
+    """
+    Séquence paresseuse de résultats classés, compatible avec ``Paginator``.
+
+    ``count_func()`` retourne le nombre total de résultats et
+    ``fetch_func(offset, limit)`` la tranche demandée, déjà classée.
+    """
+
+    def __init__(self, count_func, fetch_func):
+        self._count_func = count_func
+        self._fetch_func = fetch_func
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self._count_func()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = key.start or 0
+            stop = key.stop if key.stop is not None else self.count()
+            if stop <= start:
+                return []
+            return self._fetch_func(start, stop - start)
+        return self._fetch_func(key, 1)[0]
+
+
+class BaseSearchBackend:
+    """Interface commune des moteurs de recherche"""
+
+    company_limit = 20
+
+    def search_news(self, query):
+        """Retourne les actualités publiées correspondant à la requête (SearchHits)"""
+        raise NotImplementedError
+
+    def search_companies(self, query):
+        """Retourne la liste classée des entreprises actives correspondantes"""
+        raise NotImplementedError
+
+    def index_object(self, instance):
+        """Met à jour l'index pour une instance (sans effet par défaut)"""
+
+    def remove_object(self, instance):
+        """Retire une instance de l'index (sans effet par défaut)"""
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """Repli sans index : filtre ``icontains`` et surlignage en Python"""
+
+    def _highlight(self, text, query):
+        terms = [re.escape(term) for term in query.split() if term]
+        if not terms:
+            return render_highlight(text)
+        pattern = re.compile('|'.join(terms), re.IGNORECASE)
+        return render_highlight(pattern.sub(
+            lambda match: f'{HIGHLIGHT_START}{match.group(0)}{HIGHLIGHT_STOP}', text
+        ))
+
+    def search_news(self, query):
+        queryset = News.objects.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(excerpt__icontains=query),
+            published=True
+        ).order_by('-created_at')
+
+        def fetch(offset, limit):
+            results = list(queryset[offset:offset + limit])
+            for news in results:
+                news.highlight = self._highlight(news.get_excerpt(), query)
+            return results
+
+        return SearchHits(queryset.count, fetch)
+
+    def search_companies(self, query):
+        results = list(Company.objects.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query),
+            active=True
+        )[:self.company_limit])
+        for company in results:
+            company.highlight = self._highlight(company.description, query)
+        return results
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Recherche PostgreSQL classée, servie par les index GIN de la migration 0006"""
+
+    def __init__(self):
+        from django.contrib.postgres.search import (
+            SearchHeadline, SearchQuery, SearchRank, SearchVector,
+        )
+        self.SearchHeadline = SearchHeadline
+        self.SearchQuery = SearchQuery
+        self.SearchRank = SearchRank
+        self.SearchVector = SearchVector
+        self.config = getattr(settings, 'SEARCH_CONFIG', 'french_unaccent')
+
+    def news_vector(self):
+        # Doit rester identique à l'expression indexée dans la migration 0006
+        return self.SearchVector('title', 'excerpt', 'content', config=self.config)
+
+    def company_vector(self):
+        return self.SearchVector('name', 'description', config=self.config)
+
+    def _query(self, query):
+        return self.SearchQuery(query, config=self.config, search_type='websearch')
+
+    def _headline(self, field, search_query):
+        return self.SearchHeadline(
+            field, search_query, config=self.config,
+            start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP, max_words=35,
+        )
+
+    def search_news(self, query):
+        search_query = self._query(query)
+        queryset = News.objects.annotate(
+            search=self.news_vector(),
+        ).filter(search=search_query, published=True)
+
+        def fetch(offset, limit):
+            ranked = queryset.annotate(
+                rank=self.SearchRank(F('search'), search_query),
+                headline=self._headline('content', search_query),
+            ).order_by('-rank', '-created_at')[offset:offset + limit]
+            results = list(ranked)
+            for news in results:
+                news.highlight = render_highlight(news.headline)
+            return results
+
+        return SearchHits(queryset.count, fetch)
+
+    def search_companies(self, query):
+        search_query = self._query(query)
+        results = list(Company.objects.annotate(
+            search=self.company_vector(),
+        ).filter(search=search_query, active=True).annotate(
+            rank=self.SearchRank(F('search'), search_query),
+            headline=self._headline('description', search_query),
+        ).order_by('-rank', 'name')[:self.company_limit])
+        for company in results:
+            company.highlight = render_highlight(company.headline)
+        return results
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """Recherche SQLite FTS5 classée par bm25, index tenu à jour par les signaux"""
+
+    def match_expression(self, query):
+        """Transforme la requête en expression FTS5 (termes stemmés, préfixes)"""
+        return ' '.join(f'"{french_stem(term)}"*' for term in tokenize(query))
+
+    def search_news(self, query):
+        match = self.match_expression(query)
+        if not match:
+            return SearchHits(lambda: 0, lambda offset, limit: [])
+
+        def count():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {NEWS_FTS_TABLE} '
+                    f'JOIN website_news ON website_news.id = {NEWS_FTS_TABLE}.rowid '
+                    f'WHERE {NEWS_FTS_TABLE} MATCH %s AND website_news.published',
+                    [match],
+                )
+                return cursor.fetchone()[0]
+
+        def fetch(offset, limit):
+            with connection.cursor() as cursor:
+                # Poids bm25 : titre > extrait > contenu
+                cursor.execute(
+                    f'SELECT {NEWS_FTS_TABLE}.rowid, '
+                    f"snippet({NEWS_FTS_TABLE}, 2, %s, %s, '…', 30) "
+                    f'FROM {NEWS_FTS_TABLE} '
+                    f'JOIN website_news ON website_news.id = {NEWS_FTS_TABLE}.rowid '
+                    f'WHERE {NEWS_FTS_TABLE} MATCH %s AND website_news.published '
+                    f'ORDER BY bm25({NEWS_FTS_TABLE}, 10.0, 5.0, 1.0), website_news.created_at DESC '
+                    f'LIMIT %s OFFSET %s',
+                    [HIGHLIGHT_START, HIGHLIGHT_STOP, match, limit, offset],
+                )
+                rows = cursor.fetchall()
+            return self._load(News, rows)
+
+        return SearchHits(count, fetch)
+
+    def search_companies(self, query):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {COMPANY_FTS_TABLE}.rowid, '
+                f"snippet({COMPANY_FTS_TABLE}, 1, %s, %s, '…', 30) "
+                f'FROM {COMPANY_FTS_TABLE} '
+                f'JOIN website_company ON website_company.id = {COMPANY_FTS_TABLE}.rowid '
+                f'WHERE {COMPANY_FTS_TABLE} MATCH %s AND website_company.active '
+                f'ORDER BY bm25({COMPANY_FTS_TABLE}, 10.0, 1.0) LIMIT %s',
+                [HIGHLIGHT_START, HIGHLIGHT_STOP, match, self.company_limit],
+            )
+            rows = cursor.fetchall()
+        return self._load(Company, rows)
+
+    def _load(self, model, rows):
+        """Charge les instances en conservant l'ordre du classement"""
+        objects = model.objects.in_bulk([pk for pk, _ in rows])
+        results = []
+        for pk, snippet in rows:
+            if pk in objects:
+                instance = objects[pk]
+                instance.highlight = render_highlight(snippet)
+                results.append(instance)
+        return results
+
+    def index_object(self, instance):
+        if type(instance) not in FTS_INDEXES:
+            return
+        table, fields = FTS_INDEXES[type(instance)]
+        placeholders = ', '.join(['%s'] * len(fields))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, {", ".join(fields)}) VALUES (%s, {placeholders})',
+                [instance.pk, *(getattr(instance, field) or '' for field in fields)],
+            )
+
+    def remove_object(self, instance):
+        if type(instance) not in FTS_INDEXES:
+            return
+        table, _ = FTS_INDEXES[type(instance)]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [instance.pk])
+
+
+BACKENDS_BY_VENDOR = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteFTSSearchBackend,
+}
+
+
+def get_search_backend():
+    """Retourne le moteur de recherche adapté à la base de données courante"""
+    backend_path = getattr(settings, 'SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    return BACKENDS_BY_VENDOR.get(connection.vendor, IcontainsSearchBackend)()
@@ -0,0 +1,148 @@
+"""
+Signaux d'invalidation des caches du site.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+
+from . import site_settings
+from .cache import invalidate_site_chrome, model_tag, purge_tags, refresh_company_cards
+from .search import get_search_backend
+from .suggest import invalidate_suggest_index
+from .versions import cache_is_shared
+from .models import (
+    Contact, Company, CompanyProjectImage, News, Testimonial, HomePageHero, NavigationLogo,
+    ImageDerivative, Setting,
+)
+from . import tasks
+
+# Champs image pour lesquels des dérivés responsive sont générés
+RESPONSIVE_IMAGE_FIELDS = {
+    Company: ('logo',),
+    CompanyProjectImage: ('image',),
+    News: ('image',),
+    Testimonial: ('image',),
+    NavigationLogo: ('logo',),
+    HomePageHero: ('background_image',),
+}
+
+# Modèles dont dépendent les pages publiques mises en cache
+PAGE_CACHE_MODELS = (Company, CompanyProjectImage, News, Testimonial, HomePageHero, NavigationLogo)
+
+
+@receiver(post_save, sender=NavigationLogo)
+@receiver(post_delete, sender=NavigationLogo)
+@receiver(post_save, sender=HomePageHero)
+@receiver(post_delete, sender=HomePageHero)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def clear_site_chrome(sender, **kwargs):
+    """Invalide le snapshot logo/navbar/footer après une modification"""
+    if sender is Company:
+        # Cartes recalculées à l'enregistrement plutôt qu'à la requête suivante
+        refresh_company_cards()
+    invalidate_site_chrome()
+
+
+@receiver(post_save, sender=NavigationLogo)
+@receiver(post_delete, sender=NavigationLogo)
+@receiver(post_save, sender=HomePageHero)
+@receiver(post_delete, sender=HomePageHero)
+def invalidate_active_singleton(sender, **kwargs):
+    """
+    Invalide l'objet actif mémoïsé : tout de suite pour la transaction en
+    cours, puis après le commit pour les processus qui l'auraient relu entre-temps
+    """
+    sender.invalidate_active()
+    transaction.on_commit(sender.invalidate_active)
+
+
+@receiver(post_save, sender=Setting)
+@receiver(post_delete, sender=Setting)
+def invalidate_site_settings(sender, **kwargs):
+    """Nouvelle version du snapshot des paramètres, tout de suite puis après le commit"""
+    site_settings.invalidate()
+    transaction.on_commit(site_settings.invalidate)
+
+
+def purge_page_cache(sender, **kwargs):
+    """
+    Purge les pages étiquetées avec le modèle modifié ; avec un cache
+    partagé, planifie aussi le préchauffage des caches applicatifs
+    """
+    purge_tags(model_tag(sender))
+    if cache_is_shared():
+        transaction.on_commit(lambda: tasks.warm_caches.delay(unique=True, countdown=5))
+
+
+for _model in PAGE_CACHE_MODELS:
+    post_save.connect(purge_page_cache, sender=_model, dispatch_uid=f'purge_page_cache_save_{_model.__name__}')
+    post_delete.connect(purge_page_cache, sender=_model, dispatch_uid=f'purge_page_cache_delete_{_model.__name__}')
+
+
+@receiver(post_save, sender=News)
+@receiver(post_save, sender=Company)
+def update_search_index(sender, instance, **kwargs):
+    """Tient les index de recherche et d'autocomplétion à jour"""
+    get_search_backend().index_object(instance)
+    transaction.on_commit(invalidate_suggest_index)
+
+
+@receiver(post_delete, sender=News)
+@receiver(post_delete, sender=Company)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Retire l'objet supprimé des index de recherche et d'autocomplétion"""
+    get_search_backend().remove_object(instance)
+    transaction.on_commit(invalidate_suggest_index)
+
+
+def detect_new_images(sender, instance, **kwargs):
+    """Repère les fichiers image envoyés avant leur enregistrement"""
+    instance._new_image_fields = [
+        name for name in RESPONSIVE_IMAGE_FIELDS[sender]
+        if getattr(instance, name) and not getattr(instance, name)._committed
+    ]
+    # Fichiers remplacés : leurs dérivés seront supprimés après l'enregistrement
+    instance._replaced_images = []
+    if instance._new_image_fields and instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values(*instance._new_image_fields).first() or {}
+        instance._replaced_images = [name for name in previous.values() if name]
+
+
+def generate_image_derivatives(sender, instance, **kwargs):
+    """Planifie la génération des dérivés des images nouvellement envoyées"""
+    for source in getattr(instance, '_replaced_images', ()):
+        ImageDerivative.delete_for_source(source)
+    for name in getattr(instance, '_new_image_fields', ()):
+        tasks.enqueue_on_commit(
+            tasks.generate_image_derivatives,
+            model=sender._meta.label,
+            pk=instance.pk,
+            field=name,
+            source=getattr(instance, name).name,
+        )
+        if sender is CompanyProjectImage:
+            tasks.enqueue_on_commit(tasks.generate_project_thumbnail, pk=instance.pk)
+    instance._new_image_fields = []
+    instance._replaced_images = []
+
+
+def delete_image_derivatives(sender, instance, **kwargs):
+    """Supprime les dérivés des images d'un objet supprimé"""
+    for name in RESPONSIVE_IMAGE_FIELDS[sender]:
+        field_file = getattr(instance, name)
+        if field_file:
+            ImageDerivative.delete_for_source(field_file.name)
+
+
+for _model in RESPONSIVE_IMAGE_FIELDS:
+    pre_save.connect(detect_new_images, sender=_model, dispatch_uid=f'detect_new_images_{_model.__name__}')
+    post_save.connect(generate_image_derivatives, sender=_model, dispatch_uid=f'generate_image_derivatives_{_model.__name__}')
+    post_delete.connect(delete_image_derivatives, sender=_model, dispatch_uid=f'delete_image_derivatives_{_model.__name__}')
+
+
+@receiver(post_save, sender=Contact)
+def notify_new_contact(sender, instance, created, **kwargs):
+    """Notifie l'équipe d'un nouveau message, hors du cycle de la requête"""
+    if created:
+        tasks.enqueue_on_commit(tasks.notify_new_contact, contact_id=instance.pk)
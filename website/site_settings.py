@@ -0,0 +1,113 @@
+"""
+Registre des paramètres du site (modèle ``Setting``).
+
+Tous les paramètres sont chargés en une seule requête dans un dict immuable
+(le snapshot), partagé entre processus via le cache Django sous une clé
+versionnée. ``Setting.set_setting`` et les signaux ``post_save`` /
+``post_delete`` changent la version : chaque processus recharge alors le
+snapshot à la lecture suivante (avec un retard borné si le cache n'est pas
+partagé, voir ``website.versions``). Entre deux modifications, lire N
+paramètres ne coûte aucune requête SQL (une lecture du cache par requête HTTP).
+
+Usage ::
+
+    from website import site_settings
+    site_settings.get_int('news_per_page', 9)
+    site_settings.get_bool('maintenance')
+"""
+import json
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .memo import forget, request_memo
+from .versions import bump_version, current_version
+
+
+SETTINGS_VERSION_KEY = 'website:settings:version'
+SETTINGS_SNAPSHOT_PREFIX = 'website:settings:snapshot'
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on', 'oui', 'vrai'}
+FALSE_VALUES = {'0', 'false', 'no', 'off', 'non', 'faux', ''}
+
+# Snapshot du processus : (version, dict immuable)
+_local_snapshot = (None, MappingProxyType({}))
+
+
+def load_settings():
+    """Charge tous les paramètres en une requête"""
+    from .models import Setting
+
+    return MappingProxyType(dict(Setting.objects.values_list('key', 'value')))
+
+
+def _load_snapshot():
+    global _local_snapshot
+    version = current_version(SETTINGS_VERSION_KEY)
+    cached_version, snapshot = _local_snapshot
+    if version is not None and version == cached_version:
+        return snapshot
+
+    key = f'{SETTINGS_SNAPSHOT_PREFIX}:{version}'
+    values = cache.get(key)
+    if values is None:
+        snapshot = load_settings()
+        cache.set(key, dict(snapshot), getattr(settings, 'SITE_SETTINGS_CACHE_TIMEOUT', 3600))
+    else:
+        snapshot = MappingProxyType(values)
+    _local_snapshot = (version, snapshot)
+    return snapshot
+
+
+def get_snapshot():
+    """Retourne le dict immuable {clé: valeur}, lu au plus une fois par requête"""
+    return request_memo(SETTINGS_VERSION_KEY, _load_snapshot)
+
+
+def invalidate():
+    """Change la version : le snapshot sera rechargé par tous les processus"""
+    bump_version(SETTINGS_VERSION_KEY)
+    forget(SETTINGS_VERSION_KEY)
+
+
+def get(key, default=None):
+    """Valeur brute (texte) d'un paramètre"""
+    return get_snapshot().get(key, default)
+
+
+def get_int(key, default=None):
+    """Paramètre converti en entier ; ``default`` si absent ou invalide"""
+    try:
+        return int(get_snapshot()[key].strip())
+    except (KeyError, ValueError):
+        return default
+
+
+def get_bool(key, default=False):
+    """Paramètre booléen (« true », « 1 », « oui »... / « false », « 0 », « non »...)"""
+    value = get_snapshot().get(key)
+    if value is None:
+        return default
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return default
+
+
+def get_json(key, default=None):
+    """Paramètre JSON décodé ; ``default`` si absent ou invalide"""
+    try:
+        return json.loads(get_snapshot()[key])
+    except (KeyError, ValueError):
+        return default
+
+
+GETTERS = {
+    'str': get,
+    'int': get_int,
+    'bool': get_bool,
+    'json': get_json,
+}
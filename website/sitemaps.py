@@ -0,0 +1,238 @@
+"""
+Sitemap XML du site, généré en flux et mis en cache.
+
+Chaque section (pages, entreprises, actualités) ne lit que
+``values_list('slug', 'updated_at')``. Tant que le nombre total d'URL reste
+sous ``SITEMAP_MAX_URLS``, ``/sitemap.xml`` est un ``<urlset>`` unique ;
+au-delà, il devient un ``<sitemapindex>`` pointant vers des fichiers
+``/sitemap-<section>-<page>.xml``.
+
+Le XML est mis en cache par hôte, avec les versions des tags ``website.company``
+et ``website.news`` dans la clé : les signaux qui purgent le cache des pages
+invalident aussi le sitemap.
+"""
+import hashlib
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from .cache import get_tag_versions, model_tag
+from .models import Company, News
+from .streaming import STREAM_BUFFER_SIZE
+
+
+SITEMAP_CACHE_PREFIX = 'website:sitemap'
+SITEMAP_TAGS = sorted(model_tag(model) for model in (Company, News))
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def max_urls():
+    """Nombre d'URL par fichier (marge sous la limite de 50 000 du protocole)"""
+    return getattr(settings, 'SITEMAP_MAX_URLS', 45000)
+
+
+class SitemapSection:
+    """Section du sitemap adossée à un modèle publié"""
+
+    changefreq = 'monthly'
+    priority = '0.5'
+    url_name = None
+
+    def __init__(self, name):
+        self.name = name
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def stats(self):
+        """Retourne (nombre d'URL, dernière modification) en une requête"""
+        stats = self.get_queryset().aggregate(count=Count('id'), last_modified=Max('updated_at'))
+        return stats['count'], stats['last_modified']
+
+    def entries(self, offset, limit):
+        """Retourne les couples (chemin, dernière modification) de la tranche (``limit=None`` : tout)"""
+        # reverse() une seule fois : le slug est substitué dans le chemin
+        path = reverse(self.url_name, args=['__slug__'])
+        rows = self.get_queryset().order_by('id').values_list('slug', 'updated_at')
+        if limit is not None:
+            rows = rows[offset:offset + limit]
+        for slug, updated_at in rows.iterator(chunk_size=2000):
+            yield path.replace('__slug__', slug), updated_at
+
+
+class StaticSection(SitemapSection):
+    """Pages fixes du site"""
+
+    pages = (
+        ('website:index', 'daily', '1.0'),
+        ('website:about', 'monthly', '0.8'),
+        ('website:companies', 'monthly', '0.8'),
+        ('website:news_list', 'weekly', '0.7'),
+        ('website:testimonials', 'monthly', '0.6'),
+        ('website:contact', 'monthly', '0.6'),
+    )
+
+    def stats(self):
+        return len(self.pages), None
+
+    def entries(self, offset, limit):
+        for url_name, changefreq, priority in self.pages[offset:None if limit is None else offset + limit]:
+            yield reverse(url_name), None, changefreq, priority
+
+
+class CompanySection(SitemapSection):
+    priority = '0.7'
+    url_name = 'website:company_detail'
+
+    def get_queryset(self):
+        return Company.objects.filter(active=True)
+
+
+class NewsSection(SitemapSection):
+    priority = '0.6'
+    url_name = 'website:news_detail'
+
+    def get_queryset(self):
+        return News.objects.filter(published=True)
+
+
+SECTIONS = {
+    'pages': StaticSection('pages'),
+    'companies': CompanySection('companies'),
+    'news': NewsSection('news'),
+}
+
+
+def _versions_key():
+    return '|'.join(f'{tag}={version}' for tag, version in zip(SITEMAP_TAGS, get_tag_versions(SITEMAP_TAGS)))
+
+
+def _cache_key(*parts):
+    raw = '|'.join([_versions_key(), *map(str, parts)])
+    return f'{SITEMAP_CACHE_PREFIX}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def _timeout():
+    return getattr(settings, 'SITEMAP_CACHE_TIMEOUT', 3600)
+
+
+def get_sitemap_stats():
+    """
+    Retourne ``{section: (nombre d'URL, dernière modification)}``, mis en
+    cache jusqu'à la prochaine modification d'une entreprise ou actualité.
+    """
+    key = _cache_key('stats')
+    stats = cache.get(key)
+    if stats is None:
+        stats = {name: section.stats() for name, section in SECTIONS.items()}
+        cache.set(key, stats, _timeout())
+    return stats
+
+
+def sitemap_last_modified(section=None):
+    """Dernière modification du sitemap entier ou d'une section"""
+    stats = get_sitemap_stats()
+    names = [section] if section else stats
+    dates = [stats[name][1] for name in names if name in stats and stats[name][1]]
+    return max(dates) if dates else None
+
+
+def sitemap_etag(request, section=None):
+    """ETag dépendant de l'hôte et des versions des tags (suppressions comprises)"""
+    raw = '|'.join([request.build_absolute_uri('/'), _versions_key(), section or ''])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def needs_index():
+    """Indique si le sitemap doit être découpé en plusieurs fichiers"""
+    return sum(count for count, _ in get_sitemap_stats().values()) > max_urls()
+
+
+def section_pages(name):
+    """Nombre de fichiers nécessaires à une section"""
+    count = get_sitemap_stats()[name][0]
+    return max(1, -(-count // max_urls()))
+
+
+def _url_element(base, entry, section):
+    path, lastmod, *extra = entry
+    changefreq, priority = extra or (section.changefreq, section.priority)
+    lines = [f'<url><loc>{escape(base + path)}</loc>']
+    if lastmod:
+        lines.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+    lines.append(f'<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>\n')
+    return ''.join(lines)
+
+
+def _buffered(chunks):
+    """Regroupe les fragments en blocs d'environ STREAM_BUFFER_SIZE caractères"""
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_urlset(base, parts):
+    """Produit un ``<urlset>`` à partir de couples (section, page)"""
+    yield f'{XML_HEADER}<urlset xmlns="{SITEMAP_NS}">\n'
+    for name, page in parts:
+        section = SECTIONS[name]
+        offset = (page - 1) * max_urls() if page else 0
+        limit = max_urls() if page else None
+        for entry in section.entries(offset, limit):
+            yield _url_element(base, entry, section)
+    yield '</urlset>\n'
+
+
+def render_index(base):
+    """Produit le ``<sitemapindex>`` listant les fichiers de chaque section"""
+    stats = get_sitemap_stats()
+    yield f'{XML_HEADER}<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    for name in SECTIONS:
+        lastmod = stats[name][1]
+        for page in range(1, section_pages(name) + 1):
+            loc = reverse('website:sitemap_section', kwargs={'section': name, 'page': page})
+            yield f'<sitemap><loc>{escape(base + loc)}</loc>'
+            if lastmod:
+                yield f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+            yield '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def cached_xml_response(request, key_parts, chunks):
+    """
+    Sert le XML depuis le cache, ou le produit en flux en le mettant en
+    cache une fois l'envoi terminé.
+    """
+    base = request.build_absolute_uri('/').rstrip('/')
+    key = _cache_key(base, *key_parts)
+    content = cache.get(key)
+    if content is not None:
+        response = HttpResponse(content, content_type='application/xml')
+        response['X-Page-Cache'] = 'HIT'
+        return response
+
+    def stream():
+        sent = []
+        for block in _buffered(chunks(base)):
+            sent.append(block)
+            yield block
+        # Réponse complète uniquement : un client déconnecté n'alimente pas le cache
+        cache.set(key, ''.join(sent), _timeout())
+
+    response = StreamingHttpResponse(stream(), content_type='application/xml')
+    response['X-Page-Cache'] = 'MISS'
+    return response
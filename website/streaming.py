@@ -0,0 +1,93 @@
+"""
+Réponses JSON en flux pour les API volumineuses.
+
+Les éléments sont sérialisés un à un pendant l'itération du queryset
+(``.iterator(chunk_size=...)``) : la mémoire reste constante quel que soit
+le nombre de lignes.
+"""
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+# Taille approximative (caractères) des blocs envoyés au serveur WSGI
+STREAM_BUFFER_SIZE = 16 * 1024
+
+
+def streaming_json_enabled():
+    """Indique si les API doivent répondre en flux (réglage STREAMING_JSON_API)"""
+    return getattr(settings, 'STREAMING_JSON_API', False)
+
+
+def iterator_chunk_size():
+    return getattr(settings, 'STREAMING_JSON_CHUNK_SIZE', 2000)
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """
+    Réponse de la forme ``{"<key>": [...], ...}`` produite au fil de l'eau.
+
+    ``items`` est un itérable d'objets sérialisables, ou un itérable
+    asynchrone (``aiterator()``) pour les vues asynchrones servies en ASGI.
+    ``extra`` est un callable facultatif appelé une fois la liste terminée ;
+    il retourne les clés supplémentaires de l'objet racine (ex. curseur de
+    page suivante).
+    """
+
+    def __init__(self, items, key, extra=None, encoder=DjangoJSONEncoder, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        stream = self._astream if hasattr(items, '__aiter__') else self._stream
+        super().__init__(stream(items, key, extra, encoder), **kwargs)
+
+    @staticmethod
+    def _stream(items, key, extra, encoder):
+        writer = _JsonListWriter(key, encoder)
+        for item in items:
+            chunk = writer.add(item)
+            if chunk:
+                yield chunk
+        yield writer.close(extra)
+
+    @staticmethod
+    async def _astream(items, key, extra, encoder):
+        writer = _JsonListWriter(key, encoder)
+        async for item in items:
+            chunk = writer.add(item)
+            if chunk:
+                yield chunk
+        yield writer.close(extra)
+
+
+class _JsonListWriter:
+    """Sérialise ``{"<key>": [...]}`` élément par élément, par blocs de STREAM_BUFFER_SIZE"""
+
+    def __init__(self, key, encoder):
+        self.dumps = encoder().encode
+        self.buffer = [f'{{{self.dumps(key)}: [']
+        self.size = 0
+        self.separator = ''
+
+    def add(self, item):
+        """Ajoute un élément ; retourne un bloc à envoyer lorsque le tampon est plein"""
+        chunk = self.separator + self.dumps(item)
+        self.buffer.append(chunk)
+        self.size += len(chunk)
+        self.separator = ', '
+        if self.size >= STREAM_BUFFER_SIZE:
+            return self._flush()
+        return None
+
+    def close(self, extra):
+        """Termine la liste, ajoute les clés de ``extra()`` et retourne le dernier bloc"""
+        self.buffer.append(']')
+        for extra_key, value in (extra() if extra else {}).items():
+            self.buffer.append(f', {self.dumps(extra_key)}: {self.dumps(value)}')
+        self.buffer.append('}')
+        return self._flush()
+
+    def _flush(self):
+        chunk = ''.join(self.buffer)
+        self.buffer = []
+        self.size = 0
+        return chunk
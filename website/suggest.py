@@ -0,0 +1,150 @@
+"""
+Index inversé en mémoire pour l'autocomplétion de la recherche.
+
+Chaque processus garde une copie locale de l'index. Un snapshot sérialisé
+est partagé via le cache Django sous une clé versionnée, de sorte que tous
+les workers gunicorn servent le même index sans interroger la base.
+
+Une modification n'édite pas le snapshot : une fois la transaction validée,
+elle change la version (``invalidate_suggest_index``) et l'index est
+reconstruit depuis la base à la lecture suivante. Deux modifications
+concurrentes ne peuvent donc pas s'écraser, et une transaction annulée ne
+laisse pas de suggestion fantôme. Un index construit avant un changement de
+version est publié sous l'ancienne version et n'est plus lu.
+"""
+import bisect
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Company, News
+from .search import tokenize
+from .versions import bump_version, current_version
+
+
+SUGGEST_INDEX_KEY = 'website:suggest_index'
+SUGGEST_VERSION_KEY = 'website:suggest_index:version'
+
+# Copie locale au processus : (version, index)
+_local_index = (None, None)
+
+
+class SuggestIndex:
+    """
+    Index inversé : terme -> ensemble de clés de documents, plus la liste
+    triée des termes pour la recherche par préfixe (bisect).
+    """
+
+    def __init__(self, documents=None):
+        # clé ('news'|'company', id) -> (type, titre, url)
+        self.documents = {}
+        self.postings = {}
+        self.sorted_terms = []
+        for key, document in (documents or {}).items():
+            self.add(key, *document)
+
+    @classmethod
+    def build(cls):
+        """Construit l'index à partir des actualités publiées et entreprises actives"""
+        index = cls()
+        for news in News.objects.filter(published=True).only('id', 'title', 'slug'):
+            index.add_instance(news)
+        for company in Company.objects.filter(active=True).only('id', 'name', 'slug'):
+            index.add_instance(company)
+        return index
+
+    @staticmethod
+    def instance_key(instance):
+        return ('news' if isinstance(instance, News) else 'company', instance.pk)
+
+    def add_instance(self, instance):
+        kind, pk = self.instance_key(instance)
+        title = instance.title if kind == 'news' else instance.name
+        self.add((kind, pk), kind, title, instance.get_absolute_url())
+
+    def add(self, key, kind, title, url):
+        self.remove(key)
+        self.documents[key] = (kind, title, url)
+        for term in set(tokenize(title)):
+            if term not in self.postings:
+                self.postings[term] = set()
+                bisect.insort(self.sorted_terms, term)
+            self.postings[term].add(key)
+
+    def remove(self, key):
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        for term in set(tokenize(document[1])):
+            keys = self.postings.get(term)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.postings[term]
+                position = bisect.bisect_left(self.sorted_terms, term)
+                del self.sorted_terms[position]
+
+    def prefix_matches(self, prefix):
+        """Retourne les clés des documents ayant un terme commençant par ``prefix``"""
+        matches = set()
+        position = bisect.bisect_left(self.sorted_terms, prefix)
+        while position < len(self.sorted_terms) and self.sorted_terms[position].startswith(prefix):
+            matches |= self.postings[self.sorted_terms[position]]
+            position += 1
+        return matches
+
+    def suggest(self, query, limit=8):
+        """Retourne les documents dont les termes commencent par chaque mot de la requête"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        keys = None
+        for term in terms:
+            matches = self.prefix_matches(term)
+            keys = matches if keys is None else keys & matches
+            if not keys:
+                return []
+        # Titres courts d'abord, puis ordre alphabétique
+        ranked = sorted(keys, key=lambda key: (len(self.documents[key][1]), self.documents[key][1]))
+        return [
+            {'type': kind, 'title': title, 'url': url}
+            for kind, title, url in (self.documents[key] for key in ranked[:limit])
+        ]
+
+
+def _timeout():
+    return getattr(settings, 'SUGGEST_INDEX_TIMEOUT', 3600)
+
+
+def _snapshot_key(version):
+    return f'{SUGGEST_INDEX_KEY}:{version}'
+
+
+def get_suggest_index():
+    """Retourne l'index à jour : copie locale, snapshot partagé ou reconstruction"""
+    global _local_index
+    version = current_version(SUGGEST_VERSION_KEY)
+    local_version, local_index = _local_index
+    if version == local_version:
+        return local_index
+
+    documents = cache.get(_snapshot_key(version))
+    if documents is not None:
+        index = SuggestIndex(documents)
+    else:
+        index = SuggestIndex.build()
+        cache.set(_snapshot_key(version), index.documents, _timeout())
+    _local_index = (version, index)
+    return index
+
+
+def invalidate_suggest_index():
+    """Change la version : l'index sera reconstruit depuis la base à la lecture suivante"""
+    bump_version(SUGGEST_VERSION_KEY)
+
+
+def rebuild_suggest_index():
+    """Reconstruit entièrement l'index (après des imports en masse)"""
+    invalidate_suggest_index()
+    return get_suggest_index()
@@ -0,0 +1,221 @@
+"""
+File de tâches d'arrière-plan stockée en base de données (sans broker).
+
+Les fonctions décorées par ``@task`` sont mises en file avec
+``fonction.delay(**kwargs)`` (ou ``enqueue_on_commit``) et exécutées par
+``manage.py run_worker``. Une tâche réservée par un worker est verrouillée
+pendant ``TASK_VISIBILITY_TIMEOUT`` secondes ; si le worker disparaît, elle
+redevient disponible à l'expiration du verrou. Les échecs sont retentés
+avec un délai exponentiel jusqu'à ``max_attempts``.
+"""
+from datetime import timedelta
+from functools import partial
+import logging
+import traceback
+
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import get_company_cards, get_site_chrome
+from .models import Contact, CompanyProjectImage, ImageDerivative, Task
+from .suggest import get_suggest_index
+from .versions import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+# Registre des tâches : nom -> fonction
+TASKS = {}
+
+
+def task(func=None, *, max_attempts=5, retry_backoff=30):
+    """Enregistre une fonction comme tâche d'arrière-plan"""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.retry_backoff = retry_backoff
+        func.delay = partial(enqueue, func.task_name)
+        TASKS[func.task_name] = func
+        return func
+    return decorator(func) if func else decorator
+
+
+def enqueue(name, unique=False, countdown=0, **kwargs):
+    """
+    Met une tâche en file. ``unique`` évite les doublons en attente (mêmes
+    arguments) ; avec ``TASKS_ALWAYS_EAGER`` la tâche est exécutée sur place.
+    """
+    func = TASKS[name]
+    if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+        func(**kwargs)
+        return None
+    if unique and Task.objects.filter(name=name, payload=kwargs, status=Task.STATUS_PENDING).exists():
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=kwargs,
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=countdown),
+    )
+
+
+def enqueue_on_commit(func, **kwargs):
+    """Met une tâche en file une fois la transaction courante validée"""
+    transaction.on_commit(lambda: func.delay(**kwargs))
+
+
+def claim_tasks(limit, visibility_timeout):
+    """
+    Réserve jusqu'à ``limit`` tâches disponibles et retourne leurs ids.
+
+    Chaque réservation est un UPDATE conditionnel : deux workers ne peuvent
+    pas obtenir la même tâche, quelle que soit la base de données.
+    """
+    now = timezone.now()
+    available = (
+        Q(status=Task.STATUS_PENDING, run_at__lte=now) |
+        Q(status=Task.STATUS_RUNNING, locked_until__lt=now)
+    )
+    candidates = Task.objects.filter(available).order_by('run_at').values_list('id', flat=True)[:limit]
+    claimed = []
+    for task_id in list(candidates):
+        updated = Task.objects.filter(available, id=task_id).update(
+            status=Task.STATUS_RUNNING,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if updated:
+            claimed.append(task_id)
+    return claimed
+
+
+def execute_task(task_id):
+    """
+    Exécute une tâche réservée ; la supprime en cas de succès, sinon la
+    replanifie. L'état final n'est écrit que si la réservation tient encore :
+    après expiration du verrou, la tâche a pu être reprise par un autre worker.
+    """
+    close_old_connections()
+    try:
+        task_obj = Task.objects.filter(id=task_id).first()
+        if task_obj is None:
+            logger.warning("Tâche %s supprimée avant son exécution", task_id)
+            return False
+        # Réservation du worker : chaque réservation incrémente attempts
+        claimed = Task.objects.filter(
+            id=task_id, status=Task.STATUS_RUNNING, attempts=task_obj.attempts, locked_until=task_obj.locked_until,
+        )
+        func = TASKS.get(task_obj.name)
+        try:
+            if func is None:
+                raise LookupError(f"Tâche inconnue : {task_obj.name}")
+            func(**task_obj.payload)
+        except Exception:
+            error = traceback.format_exc()
+            if task_obj.attempts >= task_obj.max_attempts or func is None:
+                logger.error("Tâche %s (%s) abandonnée :\n%s", task_obj.id, task_obj.name, error)
+                updated = claimed.update(status=Task.STATUS_FAILED, locked_until=None, last_error=error)
+            else:
+                delay = func.retry_backoff * 2 ** (task_obj.attempts - 1)
+                logger.warning("Tâche %s (%s) en échec, nouvel essai dans %ss", task_obj.id, task_obj.name, delay)
+                updated = claimed.update(
+                    status=Task.STATUS_PENDING,
+                    locked_until=None,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                    last_error=error,
+                )
+            if not updated:
+                logger.warning("Tâche %s (%s) : verrou expiré, état laissé au worker suivant", task_id, task_obj.name)
+            return False
+        deleted, _ = claimed.delete()
+        if not deleted:
+            logger.warning("Tâche %s (%s) : verrou expiré, état laissé au worker suivant", task_id, task_obj.name)
+        return True
+    finally:
+        close_old_connections()
+
+
+# ---------------------------------------------------------------------------
+# Tâches du site
+# ---------------------------------------------------------------------------
+
+@task
+def generate_image_derivatives(model, pk, field, source):
+    """Génère les dérivés responsive d'une image envoyée"""
+    instance = apps.get_model(model).objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field)
+    # Image remplacée entre-temps : une autre tâche s'en charge
+    if field_file.name != source:
+        return
+    ImageDerivative.generate(field_file)
+
+
+@task
+def generate_project_thumbnail(pk):
+    """Génère la miniature et le srcset d'une image de projet"""
+    project = CompanyProjectImage.objects.filter(pk=pk).first()
+    if project is not None and project.image:
+        project.generate_thumbnail()
+
+
+@task(max_attempts=8, retry_backoff=60)
+def notify_new_contact(contact_id):
+    """Envoie la notification e-mail d'un nouveau message de contact"""
+    recipients = getattr(settings, 'CONTACT_NOTIFICATION_EMAILS', [])
+    contact = Contact.objects.filter(id=contact_id).first()
+    if not recipients or contact is None:
+        return
+    send_mail(
+        subject=f"Nouveau message de contact - {contact.name}",
+        message=(
+            f"Nom : {contact.name}\n"
+            f"Email : {contact.email}\n"
+            f"Téléphone : {contact.phone or '-'}\n"
+            f"Entreprise : {contact.company or '-'}\n"
+            f"Service : {contact.get_service_display() or '-'}\n\n"
+            f"{contact.message}"
+        ),
+        from_email=None,
+        recipient_list=recipients,
+    )
+
+
+@task(max_attempts=8, retry_backoff=60)
+def notify_bulk_contacts(contact_ids):
+    """Envoie une notification récapitulative pour un import en masse"""
+    recipients = getattr(settings, 'CONTACT_NOTIFICATION_EMAILS', [])
+    if not recipients or not contact_ids:
+        return
+    contacts = Contact.objects.filter(id__in=contact_ids).order_by('id')
+    lines = [f"- {contact.name} <{contact.email}> : {contact.message[:80]}" for contact in contacts[:50]]
+    if len(contact_ids) > 50:
+        lines.append(f"… et {len(contact_ids) - 50} autres (voir l'admin)")
+    send_mail(
+        subject=f"{len(contact_ids)} nouveaux messages de contact importés",
+        message='\n'.join(lines),
+        from_email=None,
+        recipient_list=recipients,
+    )
+
+
+@task(max_attempts=3)
+def warm_caches():
+    """
+    Reconstruit les caches applicatifs (cartes des entreprises, snapshot du
+    site, index d'autocomplétion) par leurs accesseurs habituels ; les pages
+    sont remises en cache à leur prochaine visite.
+
+    Sans effet avec un cache propre au processus (locmem) : le worker ne
+    remplirait que le sien, pas celui des processus web.
+    """
+    if not cache_is_shared():
+        return
+    get_company_cards()
+    get_site_chrome()
+    get_suggest_index()
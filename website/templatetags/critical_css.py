@@ -0,0 +1,43 @@
+"""
+Feuille de style d'une page avec son CSS critique (``website.critical_css``).
+
+Usage, dans ``<head>`` ::
+
+    {% load critical_css %}
+    {% critical_css %}                  {# page déduite du nom d'URL #}
+    {% critical_css "index" %}
+
+Si un CSS critique a été construit pour la page (``manage.py
+build_critical_css``), il est inséré dans un ``<style>`` et la feuille
+complète est préchargée puis appliquée sans bloquer le rendu ; sinon la
+balise produit un simple ``<link rel="stylesheet">``.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from ..critical_css import load_critical_css
+
+register = template.Library()
+
+STYLESHEET = 'css/style.css'
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context, page=None, stylesheet=STYLESHEET):
+    """CSS critique inline et feuille ``stylesheet`` chargée en asynchrone"""
+    if page is None:
+        match = getattr(context.get('request'), 'resolver_match', None)
+        page = match.url_name if match else None
+    href = static(stylesheet)
+    css = load_critical_css(page) if page else None
+    if not css:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>\n'
+        '    <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '    <noscript><link rel="stylesheet" href="{}"></noscript>',
+        # Le contenu d'un <style> n'est pas échappé : seule une fermeture de balise est à neutraliser
+        mark_safe(css.replace('</', '<\\/')), href, href,
+    )
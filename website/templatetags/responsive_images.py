@@ -0,0 +1,97 @@
+"""
+Balises d'affichage des images responsive (dérivés AVIF/WebP/JPEG).
+
+Usage ::
+
+    {% load responsive_images %}
+    {% picture company.logo alt=company.name class="logo-img" sizes="120px" %}
+    <section style="{% background_image hero_section.background_image %}">
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from ..images import DERIVATIVE_FORMATS
+from ..models import ImageDerivative
+
+register = template.Library()
+
+
+def _source_name(source):
+    """Accepte un FieldFile ou le nom du fichier dans le stockage"""
+    return getattr(source, 'name', source) or ''
+
+
+def _original_url(source):
+    url = getattr(source, 'url', None)
+    return url if url is not None else default_storage.url(source)
+
+
+def _srcset(derivatives):
+    return ', '.join(f"{derivative['url']} {derivative['width']}w" for derivative in derivatives)
+
+
+def _by_format(source):
+    grouped = {}
+    for derivative in ImageDerivative.for_source(_source_name(source)):
+        grouped.setdefault(derivative['format'], []).append(derivative)
+    return grouped
+
+
+@register.simple_tag
+def picture(source, sizes='100vw', **attrs):
+    """
+    Rend un élément <picture> avec une <source> par format moderne et une
+    balise <img> JPEG de repli ; sans dérivés, rend l'image originale
+    """
+    if not _source_name(source):
+        return ''
+    grouped = _by_format(source)
+    img_attrs = {key: value for key, value in attrs.items() if value not in ('', None)}
+    fallback = grouped.get('jpeg')
+    if fallback:
+        img_attrs.setdefault('width', fallback[-1]['width'])
+        img_attrs.setdefault('height', fallback[-1]['height'])
+        img_attrs.update(src=fallback[-1]['url'], srcset=_srcset(fallback), sizes=sizes)
+    else:
+        img_attrs['src'] = _original_url(source)
+        # srcset de repli éventuellement fourni par l'appelant
+        if 'srcset' in img_attrs:
+            img_attrs['sizes'] = sizes
+    img = format_html(
+        '<img {}>',
+        mark_safe(' '.join(f'{key}="{escape(value)}"' for key, value in img_attrs.items())),
+    )
+    if not grouped:
+        return img
+
+    sources = [
+        format_html('<source type="{}" srcset="{}" sizes="{}">', DERIVATIVE_FORMATS[fmt][2], _srcset(grouped[fmt]), sizes)
+        for fmt in DERIVATIVE_FORMATS if fmt != 'jpeg' and fmt in grouped
+    ]
+    return format_html('<picture>{}{}</picture>', mark_safe(''.join(sources)), img)
+
+
+@register.simple_tag
+def background_image(source):
+    """
+    Déclarations CSS ``background-image`` : l'original pour les anciens
+    navigateurs puis ``image-set()`` avec la plus grande variante de chaque format
+    """
+    if not _source_name(source):
+        return ''
+    declarations = [f"background-image: url('{_css_url(_original_url(source))}');"]
+    grouped = _by_format(source)
+    candidates = [
+        f"url('{_css_url(grouped[fmt][-1]['url'])}') type('{DERIVATIVE_FORMATS[fmt][2]}')"
+        for fmt in DERIVATIVE_FORMATS if fmt in grouped
+    ]
+    if candidates:
+        declarations.append(f"background-image: image-set({', '.join(candidates)});")
+    return escape(' '.join(declarations))
+
+
+def _css_url(url):
+    """Protège une URL placée dans une chaîne CSS entre apostrophes"""
+    return url.replace("'", '%27')
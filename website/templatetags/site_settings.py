@@ -0,0 +1,28 @@
+"""
+Lecture des paramètres du site (``Setting``) dans les templates, depuis le
+snapshot de ``website.site_settings`` : aucune requête SQL une fois chargé.
+
+Usage ::
+
+    {% load site_settings %}
+    {% setting "contact_phone" "+223 XX XX XX XX" %}
+    {% setting "news_per_page" 9 cast="int" as per_page %}
+    {% setting "footer_links" cast="json" as links %}
+"""
+from django import template
+
+from .. import site_settings
+
+register = template.Library()
+
+
+@register.simple_tag
+def setting(key, default='', cast='str'):
+    """Valeur du paramètre ``key`` convertie selon ``cast`` (str, int, bool, json)"""
+    try:
+        getter = site_settings.GETTERS[cast]
+    except KeyError:
+        raise template.TemplateSyntaxError(
+            f"setting : cast doit valoir {', '.join(site_settings.GETTERS)} (reçu {cast!r})"
+        )
+    return getter(key, default)
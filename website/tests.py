@@ -1,3 +1,1568 @@
-from django.test import TestCase
+import asyncio
+import importlib.util
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from types import MappingProxyType
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, include, path, reverse
+from django.utils import timezone
+
+from . import site_settings
+from .cache import (
+    CSRF_PLACEHOLDER, PRIVATE_CARD_FIELDS, cache_page_tagged, get_company_cards, get_site_chrome, model_tag, purge_tags,
+    site_chrome_cache_key,
+)
+from .critical_css import extract_critical_css
+from .bench import check_database_profile, database_profile, route_urls, seed_dataset
+from .models import (
+    Company, CompanyProjectImage, Contact, HomePageHero, ImageDerivative, NavigationLogo, News, Setting,
+    SingleActiveModel, Task, Testimonial,
+)
+from .loaders import Batch, DataDependencies
+from .memo import RequestMemoMiddleware, request_memo, request_memo_scope
+from .profiling import RequestProfilingMiddleware, get_profile_stats
+from .query_budget import QueryBudgetMixin, get_query_budget
+from .ratelimit import hit
+from .search import IcontainsSearchBackend, SQLiteFTSSearchBackend, french_stem, get_search_backend
+from .suggest import (
+    SUGGEST_INDEX_KEY, SUGGEST_VERSION_KEY, SuggestIndex, get_suggest_index, invalidate_suggest_index,
+)
+from .tasks import claim_tasks, execute_task, task, warm_caches
+from .urls import build_urlpatterns, urlpatterns
+from .versions import cache_is_shared, current_version, version_timeout
+
+
+class SiteChromeTests(TestCase):
+    """Snapshot logo/navbar/footer : lu sans requête, invalidé par les modèles qui le composent"""
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_rebuilt_after(self, change):
+        get_site_chrome()
+        with self.assertNumQueries(0):
+            get_site_chrome()
+        self.assertIsNotNone(cache.get(site_chrome_cache_key()))
+        change()
+        self.assertIsNone(cache.get(site_chrome_cache_key()))
+        return get_site_chrome()
+
+    def test_saving_or_deleting_a_navigation_logo_invalidates_the_snapshot(self):
+        chrome = self.assert_rebuilt_after(lambda: NavigationLogo.objects.create(logo='navigation/a.png'))
+        self.assertEqual(chrome['navbar_logo_name'], 'navigation/a.png')
+        chrome = self.assert_rebuilt_after(lambda: NavigationLogo.objects.get().delete())
+        self.assertIsNone(chrome['navbar_logo_name'])
+
+    def test_saving_a_hero_invalidates_the_snapshot(self):
+        chrome = self.assert_rebuilt_after(
+            lambda: HomePageHero.objects.create(background_image='homepage/hero.jpg'),
+        )
+        self.assertEqual(chrome['navbar_logo_name'], 'homepage/hero.jpg')
+
+    def test_saving_a_company_invalidates_the_snapshot(self):
+        chrome = self.assert_rebuilt_after(
+            lambda: Company.objects.create(name='Alpha', slug='alpha', description='A', icon='🏢'),
+        )
+        self.assertEqual([card['name'] for card in chrome['footer_companies']], ['Alpha'])
+
+        company = Company.objects.get(slug='alpha')
+
+        def rename():
+            company.name = 'Beta'
+            company.save()
+
+        chrome = self.assert_rebuilt_after(rename)
+        self.assertEqual([card['name'] for card in chrome['footer_companies']], ['Beta'])
+        chrome = self.assert_rebuilt_after(company.delete)
+        self.assertEqual(chrome['footer_companies'], [])
+
+    @override_settings(LOCAL_VERSION_TIMEOUT=1, PAGE_CACHE_ENABLED=True, ALLOWED_HOSTS=['testserver'])
+    def test_local_cache_versions_expire_for_other_workers(self):
+        Company.objects.create(name='Alpha', slug='alpha', description='A', icon='🏢')
+        url = reverse('website:companies')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        self.assertEqual(get_site_chrome()['footer_companies'][0]['name'], 'Alpha')
+        # Modification faite par un autre worker : son cache local seul a changé de version
+        Company.objects.update(name='Beta')
+        get_site_chrome.forget()
+        get_company_cards.forget()
+        self.assertEqual(get_company_cards()[0]['name'], 'Alpha')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'HIT')
+        time.sleep(1.1)
+        get_site_chrome.forget()
+        get_company_cards.forget()
+        self.assertEqual(get_company_cards()[0]['name'], 'Beta')
+        self.assertEqual(get_site_chrome()['footer_companies'][0]['name'], 'Beta')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Beta')
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, ALLOWED_HOSTS=['testserver'])
+class PageCacheTests(TestCase):
+    """Cache des pages étiquetées : HIT/MISS, purge par modèle, contournements et jeton CSRF"""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def counting_view(self, request):
+        self.calls += 1
+        return HttpResponse(f'rendu {self.calls}')
+
+    def test_hit_after_miss_until_a_tag_is_purged(self):
+        News.objects.create(title="Première", slug='premiere', content='Contenu', published=True)
+        url = reverse('website:news_list')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url)['X-Page-Cache'], 'HIT')
+
+        # Enregistrer une actualité purge les pages étiquetées website.news
+        News.objects.create(title="Seconde", slug='seconde', content='Contenu', published=True)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, "Seconde")
+
+        view = cache_page_tagged(Testimonial)(self.counting_view)
+        request = RequestFactory().get('/temoignages/')
+        request._messages = CookieStorage(request)
+        view(request), view(request)
+        self.assertEqual(self.calls, 1)
+        purge_tags(model_tag(Testimonial))
+        self.assertEqual(view(request).content, b'rendu 2')
+
+    def test_post_and_flash_messages_bypass_the_cache(self):
+        view = cache_page_tagged(News)(self.counting_view)
+        factory = RequestFactory()
+        for _ in range(2):
+            request = factory.post('/actualites/')
+            request._messages = CookieStorage(request)
+            self.assertNotIn('X-Page-Cache', view(request))
+        request = factory.get('/actualites/')
+        request._messages = CookieStorage(request)
+        messages.success(request, "Message envoyé")
+        self.assertNotIn('X-Page-Cache', view(request))
+        self.assertEqual(self.calls, 3)
+        # Rien n'a été mis en cache par ces requêtes
+        request = factory.get('/actualites/')
+        request._messages = CookieStorage(request)
+        self.assertEqual(view(request)['X-Page-Cache'], 'MISS')
+
+    def test_cached_page_carries_a_fresh_csrf_token(self):
+        url = reverse('website:index')
+        response = Client(enforce_csrf_checks=True).get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+
+        # Autre visiteur servi depuis le cache : son propre jeton, accepté au POST
+        second = Client(enforce_csrf_checks=True)
+        response = second.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        self.assertNotIn(CSRF_PLACEHOLDER, token)
+        response = second.post(reverse('website:contact'), {'csrfmiddlewaretoken': token, 'name': 'Awa'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(second.post(reverse('website:contact'), {'name': 'Awa'}).status_code, 403)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver', 'example.org', 'www.example.org'])
+class SitemapTests(TestCase):
+    """Sitemap : urlset ou index découpé, URL de l'hôte demandé, réponses conditionnelles"""
+
+    def setUp(self):
+        cache.clear()
+        for i in range(4):
+            Company.objects.create(name=f'Entreprise {i}', slug=f'entreprise-{i}', description='D', icon='🏢')
+        for i in range(3):
+            News.objects.create(title=f'Actualité {i}', slug=f'actualite-{i}', content='Contenu', published=True)
+        News.objects.create(title='Brouillon', slug='brouillon', content='Contenu', published=False)
+
+    def get(self, url, host='example.org', **headers):
+        response = self.client.get(url, HTTP_HOST=host, **headers)
+        if response.status_code == 200:
+            response.text = response.getvalue().decode()
+        return response
+
+    def test_single_urlset_with_request_host_urls(self):
+        response = self.get(reverse('website:sitemap'))
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertIn('<urlset', response.text)
+        # 6 pages fixes, 4 entreprises, 3 actualités publiées
+        self.assertEqual(response.text.count('<url>'), 13)
+        news_url = reverse('website:news_detail', args=['actualite-0'])
+        self.assertIn(f'<loc>http://example.org{news_url}</loc>', response.text)
+        self.assertNotIn('brouillon', response.text)
+
+        self.assertEqual(self.get(reverse('website:sitemap'))['X-Page-Cache'], 'HIT')
+        # Autre hôte : son propre XML, pas celui du premier
+        other = self.get(reverse('website:sitemap'), host='www.example.org')
+        self.assertEqual(other['X-Page-Cache'], 'MISS')
+        self.assertIn('<loc>http://www.example.org/</loc>', other.text)
+        self.assertNotIn('http://example.org/', other.text)
+
+    @override_settings(SITEMAP_MAX_URLS=5)
+    def test_large_sites_get_an_index_of_section_files(self):
+        response = self.get(reverse('website:sitemap'))
+        self.assertIn('<sitemapindex', response.text)
+        locs = re.findall(r'<loc>http://example.org(/[^<]+)</loc>', response.text)
+        self.assertEqual(locs, [
+            reverse('website:sitemap_section', kwargs={'section': section, 'page': page})
+            for section, page in (('pages', 1), ('pages', 2), ('companies', 1), ('news', 1))
+        ])
+        self.assertEqual(self.get(locs[0]).text.count('<url>'), 5)
+        self.assertEqual(self.get(locs[1]).text.count('<url>'), 1)
+        self.assertEqual(self.get(locs[2]).text.count('<url>'), 4)
+        self.assertEqual(self.get('/sitemap-pages-3.xml').status_code, 404)
+        self.assertEqual(self.get('/sitemap-inconnue-1.xml').status_code, 404)
+
+    def test_conditional_requests_until_content_changes(self):
+        url = reverse('website:sitemap')
+        response = self.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        # L'ETag dépend de l'hôte
+        self.assertEqual(self.get(url, host='www.example.org', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        News.objects.create(title='Nouvelle', slug='nouvelle', content='Contenu', published=True)
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.text.count('<url>'), 14)
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SAMPLE_RATE=1, ALLOWED_HOSTS=['testserver'])
+class RequestProfilingTests(TestCase):
+    """En-tête Server-Timing, comptage du cache et échantillons par vue"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_counts_queries_and_cache_hits(self):
+        def view(request):
+            cache.set('present', 1)
+            cache.get('present'), cache.get('absent')
+            # Un seul comptage par clé, bien que get_many appelle get()
+            cache.get_many(['present', 'absent', 'autre'])
+            list(News.objects.all())
+            return HttpResponse('ok')
+
+        with self.assertLogs('website.profiling', 'INFO') as logs:
+            response = RequestProfilingMiddleware(view)(RequestFactory().get('/'))
+        header = response['Server-Timing']
+        self.assertIn('desc="SQL x1"', header)
+        self.assertIn('desc="hits=2 misses=3"', header)
+        self.assertIn('conn;desc="connect x0"', header)
+        self.assertRegex(header, r'total;dur=[\d.]+$')
+        self.assertEqual(logs.records[0].profile['queries'], 1)
+
+    def test_pages_are_sampled_per_url_name(self):
+        with self.assertLogs('website.profiling', 'INFO'):
+            response = self.client.get(reverse('website:about'))
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        stats = get_profile_stats()
+        self.assertEqual(stats['website:about']['samples'], 1)
+        self.assertEqual(set(stats['website:about']['queries']), {'p50', 'p95', 'p99'})
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_disabled_middleware_is_removed_from_the_chain(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RequestProfilingMiddleware(lambda request: HttpResponse())
+        self.assertNotIn('Server-Timing', Client().get(reverse('website:about')))
+
+
+@override_settings(STREAMING_JSON_API=True, ALLOWED_HOSTS=['testserver'])
+class StreamingJsonApiTests(TestCase):
+    """Les API en flux doivent garder une mémoire constante"""
+
+    ROWS = 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        Company.objects.bulk_create(
+            (
+                Company(
+                    name=f"Entreprise {i}",
+                    slug=f"entreprise-{i}",
+                    description="Description",
+                    icon="🏢",
+                    services=["Service A", "Service B"],
+                    kpis=["KPI"],
+                )
+                for i in range(cls.ROWS)
+            ),
+            batch_size=2000,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_api_companies_memory_is_bounded(self):
+        response = self.client.get(reverse('website:api_companies'))
+        self.assertTrue(response.streaming)
+        tracemalloc.start()
+        try:
+            total = rows = 0
+            for chunk in response.streaming_content:
+                total += len(chunk)
+                rows += chunk.count(b'"slug": ')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(rows, self.ROWS)
+        # Plus de 10 Mo de JSON produits pour un pic de quelques Mo au plus
+        self.assertGreater(total, 10 * 1024 * 1024)
+        self.assertLess(peak, 5 * 1024 * 1024)
+
+    def test_api_news_stream_keeps_cursor(self):
+        News.objects.bulk_create(
+            News(title=f"Actualité {i}", slug=f"actualite-{i}", content="Contenu")
+            for i in range(5)
+        )
+        response = self.client.get(reverse('website:api_news'), {'limit': 3})
+        payload = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(payload['news']), 3)
+        self.assertIsNotNone(payload['next_cursor'])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class NewsApiTests(TestCase):
+    """api_news : pagination par curseur, sélection des champs, erreurs et GET conditionnel"""
+
+    @classmethod
+    def setUpTestData(cls):
+        News.objects.bulk_create(
+            News(title=f"Actualité {i}", slug=f"actualite-{i}", content=f"Contenu complet {i}")
+            for i in range(7)
+        )
+        # Dates identiques : l'ordre repose sur l'id
+        News.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('website:api_news')
+
+    def test_cursor_walks_every_row_once_with_equal_dates(self):
+        slugs, cursor = [], None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            payload = self.client.get(self.url, params).json()
+            slugs += [item['slug'] for item in payload['news']]
+            cursor = payload['next_cursor']
+            if cursor is None:
+                break
+        expected = list(News.objects.order_by('-created_at', '-id').values_list('slug', flat=True))
+        self.assertEqual(slugs, expected)
+
+    def test_content_is_only_read_when_requested(self):
+        with CaptureQueriesContext(connection) as queries:
+            payload = self.client.get(self.url, {'fields': 'title'}).json()
+        self.assertEqual(set(payload['news'][0]), {'title'})
+        self.assertNotIn('"content"', queries[-1]['sql'])
+
+        with CaptureQueriesContext(connection) as queries:
+            payload = self.client.get(self.url, {'fields': 'content'}).json()
+        self.assertTrue(payload['news'][0]['content'].startswith('Contenu complet'))
+        self.assertIn('"content"', queries[-1]['sql'])
+
+    def test_invalid_parameters_are_rejected_before_conditional_headers(self):
+        etag = self.client.get(self.url)['ETag']
+        for params in ({'fields': 'title,secret'}, {'limit': 'abc'}, {'cursor': 'pas-un-curseur'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+                self.assertNotIn('ETag', response)
+                self.assertNotIn('Last-Modified', response)
+
+    def test_if_none_match_returns_304(self):
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, {'limit': 2}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        # Une autre page n'a pas le même ETag
+        self.assertEqual(self.client.get(self.url, {'limit': 3}, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, ALLOWED_HOSTS=['testserver'])
+class CompanyDetailQueryTests(TestCase):
+    """La galerie de projets ne doit pas générer de requêtes par image"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(
+            name="Global Songhoy Services",
+            slug="gss",
+            description="BTP",
+            icon="🏗️",
+        )
+
+    def add_projects(self, count):
+        # Un fichier distinct par projet, chacun avec ses dérivés
+        CompanyProjectImage.objects.bulk_create(
+            CompanyProjectImage(
+                company=self.company,
+                image=f"company_projects/projet-{i}.jpg",
+                title=f"Projet {i}",
+                order=i,
+                width=1600,
+                height=900,
+            )
+            for i in range(count)
+        )
+        ImageDerivative.objects.bulk_create(
+            ImageDerivative(
+                source=f"company_projects/projet-{i}.jpg",
+                width=width,
+                height=width * 9 // 16,
+                format=fmt,
+                file=f"derivatives/projet-{i}_{width}w.{fmt}",
+            )
+            for i in range(count)
+            for width in (640, 1600)
+            for fmt in ('webp', 'jpeg')
+        )
+
+    def assert_detail_queries(self, gallery_size):
+        url = reverse('website:company_detail', args=[self.company.slug])
+        # Caches vides : entreprise + galerie préchargée, objets actifs du
+        # snapshot (logo, hero), cartes des entreprises et dérivés de toutes
+        # les images en une requête
+        cache.clear()
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertContains(response, 'class="project-img"', count=gallery_size)
+        self.assertContains(response, 'type="image/webp"', count=gallery_size)
+        # Caches remplis : entreprise + galerie
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    def test_queries_with_small_gallery(self):
+        self.add_projects(1)
+        self.assert_detail_queries(1)
+
+    def test_queries_with_large_gallery(self):
+        self.add_projects(25)
+        self.assert_detail_queries(25)
+
+
+def jpeg_file(name, size=(800, 400)):
+    """Enregistre une image JPEG dans le stockage et retourne son nom"""
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, (102, 126, 234)).save(buffer, 'JPEG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+@override_settings(IMAGE_DERIVATIVE_WIDTHS=[320, 640, 1600], IMAGE_DERIVATIVE_FORMATS=['webp', 'jpeg'])
+class ResponsiveImageTests(TestCase):
+    """Dérivés d'images, balise {% picture %} et résolution groupée"""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp(prefix='azigroup-images-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def render_picture(self, source):
+        return Template(
+            '{% load responsive_images %}{% picture source alt="Projet" sizes="50vw" %}'
+        ).render(Context({'source': source}))
+
+    def test_generate_creates_each_width_and_format_without_upscaling(self):
+        name = jpeg_file('company_projects/chantier.jpg')
+        ImageDerivative.generate(CompanyProjectImage(image=name).image)
+
+        derivatives = ImageDerivative.for_source(name)
+        self.assertEqual(
+            [(d['format'], d['width'], d['height']) for d in derivatives if d['format'] == 'jpeg'],
+            [('jpeg', 320, 160), ('jpeg', 640, 320), ('jpeg', 800, 400)],
+        )
+        self.assertEqual(sum(d['format'] == 'webp' for d in derivatives), 3)
+        for derivative in ImageDerivative.objects.filter(source=name):
+            self.assertTrue(default_storage.exists(derivative.file.name))
+
+    def test_picture_lists_modern_sources_and_jpeg_fallback(self):
+        name = jpeg_file('company_projects/chantier.jpg')
+        ImageDerivative.generate(CompanyProjectImage(image=name).image)
+        jpeg = {d['width']: d['url'] for d in ImageDerivative.for_source(name) if d['format'] == 'jpeg'}
+
+        html = self.render_picture(name)
+        self.assertTrue(html.startswith('<picture><source type="image/webp" srcset="'))
+        self.assertIn(f'src="{jpeg[800]}"', html)
+        self.assertIn(f'srcset="{jpeg[320]} 320w, {jpeg[640]} 640w, {jpeg[800]} 800w"', html)
+        self.assertIn('width="800" height="400"', html)
+        self.assertEqual(html.count('sizes="50vw"'), 2)
+
+    def test_picture_without_derivatives_renders_the_original(self):
+        html = self.render_picture('company_projects/sans-derives.jpg')
+        self.assertEqual(html, '<img alt="Projet" src="/media/company_projects/sans-derives.jpg">')
+        self.assertEqual(self.render_picture(''), '')
+
+    def test_for_sources_resolves_many_files_with_one_query(self):
+        names = [jpeg_file(f'company_projects/projet-{i}.jpg', (400, 200)) for i in range(3)]
+        for name in names[:2]:
+            ImageDerivative.generate(CompanyProjectImage(image=name).image)
+        cache.clear()
+        sources = [f'company_projects/absent-{i}.jpg' for i in range(20)] + names
+
+        with self.assertNumQueries(1):
+            found = ImageDerivative.for_sources(sources)
+        self.assertEqual(len(found), 23)
+        self.assertEqual(len(found[names[0]]), 4)
+        self.assertEqual(found[names[2]], [])
+        # Cache rempli : plus aucune requête, même pour les fichiers sans dérivés
+        with self.assertNumQueries(0):
+            self.assertEqual(ImageDerivative.for_sources(sources), found)
+
+    def test_prefetched_derivatives_are_reused_by_the_tags(self):
+        name = jpeg_file('company_projects/chantier.jpg')
+        ImageDerivative.generate(CompanyProjectImage(image=name).image)
+        with request_memo_scope():
+            ImageDerivative.for_sources([name])
+            with patch.object(cache, 'get_many') as get_many, self.assertNumQueries(0):
+                self.assertIn('<picture>', self.render_picture(name))
+            get_many.assert_not_called()
+
+
+@skipUnless(connection.vendor == 'sqlite', "Tables FTS5 : SQLite uniquement")
+class SQLiteSearchTests(TestCase):
+    """Recherche FTS5 : stemming, préfixes, classement bm25 et surlignage"""
+
+    def setUp(self):
+        self.backend = SQLiteFTSSearchBackend()
+        self.title_hit = News.objects.create(
+            title="Énergie solaire", slug='solaire', published=True,
+            content="Une centrale est en service.",
+        )
+        self.content_hit = News.objects.create(
+            title="Rapport annuel", slug='rapport', published=True,
+            content="Les énergies renouvelables progressent au Mali.",
+        )
+        News.objects.create(title="Énergie (brouillon)", slug='brouillon', content="Énergie", published=False)
+        Company.objects.create(
+            name='Azi Solar', slug='azi-solar', icon='☀️', description="Installations d'énergie solaire",
+        )
+        Company.objects.create(
+            name='Ancienne', slug='ancienne', icon='☀️', description="Énergie", active=False,
+        )
+
+    def test_match_expression_stems_terms_for_the_tokenizer(self):
+        self.assertEqual(french_stem('installations'), 'install')
+        self.assertEqual(french_stem('energies'), 'energi')
+        # Sans accents ni mots vides, comme le tokenizer unicode61 remove_diacritics 2
+        self.assertEqual(self.backend.match_expression("Les Énergies du Mali"), '"energi"* "mali"*')
+        self.assertEqual(self.backend.match_expression("de la"), '')
+
+    def test_plural_and_accentless_queries_find_published_news_ranked_by_field(self):
+        hits = self.backend.search_news('energies')
+        self.assertEqual(hits.count(), 2)
+        # Titre (poids 10) avant contenu (poids 1)
+        self.assertEqual(list(hits[0:10]), [self.title_hit, self.content_hit])
+        self.assertEqual(self.backend.search_news('de la').count(), 0)
+
+    def test_matches_are_highlighted_and_escaped(self):
+        News.objects.create(
+            title="Forage", slug='forage', published=True, content="<b>Forages</b> réalisés à Gao",
+        )
+        news = self.backend.search_news('forage')[0:1][0]
+        self.assertEqual(news.highlight, '&lt;b&gt;<mark>Forages</mark>&lt;/b&gt; réalisés à Gao')
+        companies = self.backend.search_companies('installation energie')
+        self.assertEqual([company.slug for company in companies], ['azi-solar'])
+        self.assertEqual(
+            companies[0].highlight, "<mark>Installations</mark> d&#x27;<mark>énergie</mark> solaire",
+        )
+
+    def test_index_follows_saves_and_deletes(self):
+        self.title_hit.title = "Centrale"
+        self.title_hit.content = "Mise en service"
+        self.title_hit.save()
+        self.assertEqual(list(self.backend.search_news('energie')[0:10]), [self.content_hit])
+        self.content_hit.delete()
+        self.assertEqual(self.backend.search_news('energie').count(), 0)
+
+
+@override_settings(SEARCH_BACKEND='website.search.IcontainsSearchBackend', ALLOWED_HOSTS=['testserver'])
+class FallbackSearchTests(TestCase):
+    """Repli icontains des bases sans moteur plein texte"""
+
+    def test_substring_search_with_case_insensitive_highlight(self):
+        News.objects.create(title="Projet", slug='projet', published=True, content="Pompes SOLAIRES <i>")
+        News.objects.create(title="Brouillon", slug='brouillon', published=False, content="solaire")
+        backend = get_search_backend()
+        self.assertIsInstance(backend, IcontainsSearchBackend)
+
+        hits = backend.search_news('solaire')
+        self.assertEqual(hits.count(), 1)
+        self.assertEqual(hits[0:1][0].highlight, 'Pompes <mark>SOLAIRE</mark>S &lt;i&gt;')
+
+    def test_search_page_uses_the_configured_backend(self):
+        Company.objects.create(name='Azi Transport', slug='azi-transport', icon='🚚', description="Logistique")
+        response = self.client.get(reverse('website:search'), {'q': 'logist'})
+        self.assertContains(response, '<mark>Logist</mark>ique')
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class SuggestIndexTests(TestCase):
+    """Index d'autocomplétion : préfixes, classement et reconstruction après commit"""
+
+    def setUp(self):
+        cache.clear()
+
+    def add_news(self, title, slug, published=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return News.objects.create(title=title, slug=slug, content='Contenu', published=published)
+
+    def suggest(self, query):
+        return self.client.get(reverse('website:api_search_suggest'), {'q': query}).json()['suggestions']
+
+    def test_prefix_matches_every_word_shortest_titles_first(self):
+        self.add_news("Énergie solaire à Bamako", 'energie-solaire-bamako')
+        self.add_news("Énergie", 'energie')
+        self.add_news("Brouillon énergie", 'brouillon', published=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.create(name='Energie Plus', slug='energie-plus', description='E', icon='⚡')
+
+        self.assertEqual(
+            [item['title'] for item in self.suggest('ener')],
+            ["Énergie", 'Energie Plus', "Énergie solaire à Bamako"],
+        )
+        self.assertEqual(self.suggest('ÉNER sol'), [
+            {'type': 'news', 'title': "Énergie solaire à Bamako", 'url': reverse('website:news_detail', args=['energie-solaire-bamako'])},
+        ])
+        # Un seul caractère : pas de suggestion
+        self.assertEqual(self.suggest('e'), [])
+
+    def test_index_follows_committed_changes_only(self):
+        news = self.add_news("Forage au Mali", 'forage')
+        self.assertEqual(len(self.suggest('forage')), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            news.title = "Puits au Mali"
+            news.save()
+        self.assertEqual(self.suggest('forage'), [])
+        self.assertEqual(len(self.suggest('puits')), 1)
+
+        # Transaction annulée : aucune suggestion fantôme
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            News.objects.create(title="Annulée", slug='annulee', content='Contenu', published=True)
+            transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.suggest('annul'), [])
+
+    def test_concurrent_changes_are_not_lost(self):
+        self.add_news("Transport", 'transport')
+        get_suggest_index()
+        # Deux workers modifient chacun une ligne : l'index est relu en base
+        # au lieu d'une copie éditée puis republiée par chacun
+        News.objects.create(title="Transport fluvial", slug='fluvial', content='Contenu', published=True)
+        invalidate_suggest_index()
+        News.objects.create(title="Transport aérien", slug='aerien', content='Contenu', published=True)
+        invalidate_suggest_index()
+        self.assertEqual(len(self.suggest('transport')), 3)
+
+    def test_index_built_before_an_invalidation_is_not_served(self):
+        self.add_news("Logistique", 'logistique')
+        version = current_version(SUGGEST_VERSION_KEY)
+        stale = SuggestIndex.build()
+        News.objects.create(title="Logistique urbaine", slug='urbaine', content='Contenu', published=True)
+        invalidate_suggest_index()
+        # Index obsolète publié après coup sous l'ancienne version : ignoré
+        cache.set(f'{SUGGEST_INDEX_KEY}:{version}', stale.documents)
+        self.assertEqual(len(get_suggest_index().suggest('logistique')), 2)
+
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='azigroup-tests-')
+
+
+@override_settings(
+    PAGE_CACHE_ENABLED=False, ALLOWED_HOSTS=['testserver'], MEDIA_ROOT=MEDIA_ROOT,
+    CONTACT_BULK_API_TOKENS=['jeton'],
+)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Chaque vue et chaque liste de l'admin respecte le budget déclaré par
+    @query_budget, caches vides, pour 1, 10 et 1000 lignes par modèle
+    """
+
+    SCALES = (1, 10, 1000)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def website_admins(self):
+        return [
+            (model, model_admin) for model, model_admin in admin.site._registry.items()
+            if model._meta.app_label == 'website'
+        ]
+
+    def seed(self, scale):
+        # Un logo par entreprise et un fichier par image de projet ; galerie
+        # croissante elle aussi, plafonnée pour garder des tests rapides
+        dataset = seed_dataset(
+            companies=scale, news=scale, testimonials=scale, images=min(scale, 25), contacts=scale,
+        )
+        # Modèles visibles uniquement dans l'admin
+        for model in (Setting, Task, NavigationLogo, HomePageHero):
+            model.objects.all().delete()
+        Setting.objects.bulk_create(Setting(key=f'cle_{i}', value='valeur') for i in range(scale))
+        Task.objects.bulk_create(Task(name='website.tasks.warm_caches') for _ in range(scale))
+        NavigationLogo.objects.bulk_create(
+            NavigationLogo(logo=f'navigation/logo-{i}.png', active=i == 0) for i in range(scale)
+        )
+        HomePageHero.objects.bulk_create(
+            HomePageHero(background_image=f'homepage/hero-{i}.jpg', active=i == 0) for i in range(scale)
+        )
+        return dataset
+
+    def test_every_view_declares_a_budget(self):
+        for pattern in urlpatterns:
+            if isinstance(pattern, URLPattern):
+                self.assertIsNotNone(get_query_budget(pattern.callback), pattern.name)
+        for model, model_admin in self.website_admins():
+            self.assertIsNotNone(get_query_budget(model_admin), model.__name__)
+
+    def test_views_and_admin_changelists_stay_within_budget(self):
+        staff = User.objects.create_superuser('budget', 'budget@example.com', 'motdepasse')
+        callbacks = {f'website:{pattern.name}': pattern.callback for pattern in urlpatterns}
+        contact_payload = json.dumps({
+            'name': 'Awa Traoré',
+            'email': 'awa@example.com',
+            'message': 'Bonjour, je souhaite un devis.',
+        })
+        for scale in self.SCALES:
+            dataset = self.seed(scale)
+            public = [
+                (name, callbacks[name], self.client.get, url)
+                for name, url in route_urls(dataset).items()
+            ]
+            public.append((
+                'website:contact_ajax', callbacks['website:contact_ajax'],
+                lambda url: self.client.post(url, contact_payload, content_type='application/json'),
+                reverse('website:contact_ajax'),
+            ))
+            bulk_payload = json.dumps([
+                {'name': f'Lead {i}', 'email': f'lead{i}@example.com', 'message': 'Merci de me rappeler.',
+                 'idempotency_key': f'{scale}-{i}'}
+                for i in range(min(scale, 100))
+            ])
+            public.append((
+                'website:api_contacts_bulk', callbacks['website:api_contacts_bulk'],
+                lambda url, payload=bulk_payload: self.client.post(
+                    url, payload, content_type='application/json', HTTP_AUTHORIZATION='Bearer jeton',
+                ),
+                reverse('website:api_contacts_bulk'),
+            ))
+            staff_only = [
+                (
+                    f'admin {model.__name__}', model_admin, self.client.get,
+                    reverse(f'admin:website_{model._meta.model_name}_changelist'),
+                )
+                for model, model_admin in self.website_admins()
+            ]
+            staff_only.append((
+                'website:api_profiling', callbacks['website:api_profiling'],
+                self.client.get, reverse('website:api_profiling'),
+            ))
+
+            self.client.logout()
+            self.assert_budgets(scale, public)
+            self.client.force_login(staff)
+            # Le thème admin_interface est créé à la première visite de l'admin
+            self.client.get(reverse('admin:index'))
+            self.assert_budgets(scale, staff_only)
+
+    def assert_budgets(self, scale, requests):
+        for name, target, request_func, url in requests:
+            cache.clear()
+            with self.subTest(scale=scale, view=name):
+                response, _ = self.assertWithinQueryBudget(
+                    get_query_budget(target), request_func, url, msg=f'{name} ({scale} lignes)',
+                )
+                self.assertEqual(response.status_code, 200)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], CONTACT_BULK_API_TOKENS=['jeton'], CONTACT_BULK_MAX_ROWS=50)
+class BulkContactApiTests(TestCase):
+    """Import en masse : authentification, résultats par ligne et idempotence"""
+
+    def post(self, body, content_type='application/json', token='jeton'):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        return self.client.post(reverse('website:api_contacts_bulk'), body, content_type=content_type, **headers)
+
+    def rows(self, count, start=0):
+        return [
+            {'name': f'Lead {i}', 'email': f'lead{i}@example.com', 'message': 'Merci de me rappeler.'}
+            for i in range(start, start + count)
+        ]
+
+    def test_requires_a_valid_token(self):
+        self.assertEqual(self.post('[]', token=None).status_code, 401)
+        self.assertEqual(self.post('[]', token='autre').status_code, 401)
+
+    def test_rejects_malformed_and_oversized_payloads(self):
+        self.assertEqual(self.post('[{').status_code, 400)
+        self.assertEqual(self.post(json.dumps(self.rows(51))).status_code, 413)
+
+    def test_reports_each_row_and_ignores_resent_rows(self):
+        rows = self.rows(3)
+        rows[1]['idempotency_key'] = 'crm-42'
+        rows.append({'name': 'Sans email', 'message': 'Bonjour'})
+        rows.append(dict(rows[1]))
+        # Sans clé, deux messages identiques sont deux contacts
+        rows.append(dict(rows[0]))
+        data = self.post(json.dumps(rows)).json()
+        self.assertEqual((data['created'], data['duplicates'], data['invalid']), (4, 1, 1))
+        self.assertEqual(
+            [result['status'] for result in data['results']],
+            ['created', 'created', 'created', 'invalid', 'duplicate', 'created'],
+        )
+        self.assertIn('email', data['results'][3]['errors'])
+        self.assertEqual(data['results'][1]['key'], 'crm-42')
+        self.assertIsNone(data['results'][0]['key'])
+        self.assertEqual(data['results'][4]['id'], data['results'][1]['id'])
+        self.assertNotEqual(data['results'][5]['id'], data['results'][0]['id'])
+
+        # Renvoi du lot en NDJSON : seule la ligne avec clé est reconnue
+        ndjson = '\n'.join(json.dumps(row) for row in rows[:3])
+        data = self.post(ndjson, content_type='application/x-ndjson').json()
+        self.assertEqual((data['created'], data['duplicates']), (2, 1))
+        self.assertEqual(Contact.objects.count(), 6)
+
+
+@task(max_attempts=2, retry_backoff=10)
+def flaky_task(fail):
+    """Tâche de test : échoue si ``fail``"""
+    if fail:
+        raise RuntimeError("échec demandé")
+
+
+@task(max_attempts=2, retry_backoff=10)
+def reclaimed_task(fail):
+    """Tâche de test : son verrou expire et un autre worker la reprend pendant l'exécution"""
+    Task.objects.filter(name=reclaimed_task.task_name).update(locked_until=timezone.now() - timedelta(seconds=1))
+    claim_tasks(1, visibility_timeout=60)
+    if fail:
+        raise RuntimeError("échec demandé")
+
+
+class TaskQueueTests(TestCase):
+    """File de tâches en base : réservation, verrou de visibilité et nouvelles tentatives"""
+
+    def test_claim_reserves_available_tasks_once(self):
+        later = Task.objects.create(name=flaky_task.task_name, run_at=timezone.now() - timedelta(seconds=1))
+        first = Task.objects.create(name=flaky_task.task_name, run_at=timezone.now() - timedelta(seconds=5))
+        Task.objects.create(name=flaky_task.task_name, run_at=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(claim_tasks(10, visibility_timeout=60), [first.pk, later.pk])
+        # Déjà réservées, ou pas encore dues
+        self.assertEqual(claim_tasks(10, visibility_timeout=60), [])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (Task.STATUS_RUNNING, 1))
+        self.assertGreater(first.locked_until, timezone.now() + timedelta(seconds=55))
+
+    def test_abandoned_task_is_claimed_again_after_visibility_timeout(self):
+        job = Task.objects.create(name=flaky_task.task_name)
+        self.assertEqual(claim_tasks(1, visibility_timeout=60), [job.pk])
+        # Worker disparu : le verrou expire
+        Task.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_tasks(1, visibility_timeout=60), [job.pk])
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+
+    @patch('website.tasks.close_old_connections')
+    def test_failures_are_retried_with_backoff_then_abandoned(self, _):
+        job = flaky_task.delay(fail=True)
+        claim_tasks(1, visibility_timeout=60)
+        with self.assertLogs('website.tasks', 'WARNING'):
+            self.assertFalse(execute_task(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.STATUS_PENDING)
+        self.assertIsNone(job.locked_until)
+        self.assertIn("échec demandé", job.last_error)
+        # Premier échec : retry_backoff secondes
+        delay = (job.run_at - timezone.now()).total_seconds()
+        self.assertTrue(8 < delay <= 10, delay)
+
+        Task.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        claim_tasks(1, visibility_timeout=60)
+        with self.assertLogs('website.tasks', 'ERROR'):
+            self.assertFalse(execute_task(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.STATUS_FAILED, 2))
+
+    @patch('website.tasks.close_old_connections')
+    def test_successful_task_is_deleted(self, _):
+        job = flaky_task.delay(fail=False)
+        claim_tasks(1, visibility_timeout=60)
+        self.assertTrue(execute_task(job.pk))
+        self.assertFalse(Task.objects.filter(pk=job.pk).exists())
+
+    @patch('website.tasks.close_old_connections')
+    def test_deleted_task_is_skipped(self, _):
+        job = flaky_task.delay(fail=False)
+        claim_tasks(1, visibility_timeout=60)
+        Task.objects.filter(pk=job.pk).delete()
+        with self.assertLogs('website.tasks', 'WARNING'):
+            self.assertFalse(execute_task(job.pk))
+
+    @patch('website.tasks.close_old_connections')
+    def test_expired_lock_leaves_the_task_to_the_new_worker(self, _):
+        for fail in (False, True):
+            with self.subTest(fail=fail):
+                job = reclaimed_task.delay(fail=fail)
+                claim_tasks(1, visibility_timeout=60)
+                with self.assertLogs('website.tasks', 'WARNING') as logs:
+                    self.assertEqual(execute_task(job.pk), not fail)
+                self.assertIn('verrou expiré', logs.output[-1])
+                # Ni supprimée ni replanifiée : la réservation du second worker est intacte
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.attempts, job.last_error), (Task.STATUS_RUNNING, 2, ''))
+                self.assertGreater(job.locked_until, timezone.now())
+                job.delete()
+
+    def test_worker_survives_errors_escaping_execute_task(self):
+        flaky_task.delay(fail=False), flaky_task.delay(fail=False)
+        stdout = StringIO()
+        with patch('website.management.commands.run_worker.execute_task', side_effect=[Task.DoesNotExist, True]), \
+                self.assertLogs('website.tasks', 'ERROR'):
+            call_command('run_worker', burst=True, pool='thread', concurrency=1, stdout=stdout)
+        self.assertIn('2 tâche(s) exécutée(s), 1 en échec', stdout.getvalue())
+
+    def test_cache_warming_is_only_scheduled_with_a_shared_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.create(name='Alpha', slug='alpha', description='A', icon='🏢', services=[], kpis=[])
+        self.assertFalse(Task.objects.filter(name=warm_caches.task_name).exists())
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], RATE_LIMITS={'contact_ajax': '2/m', 'contact': '2/m'})
+class RateLimitTests(TestCase):
+    """Limitation de débit des formulaires de contact, par IP et par email"""
+
+    def setUp(self):
+        cache.clear()
+
+    def post_ajax(self, email, ip='10.0.0.1'):
+        payload = json.dumps({'name': 'Awa', 'email': email, 'message': 'Bonjour, un devis svp.'})
+        return self.client.post(
+            reverse('website:contact_ajax'), payload, content_type='application/json', REMOTE_ADDR=ip,
+        )
+
+    def test_limits_by_ip_and_by_email(self):
+        self.assertEqual(self.post_ajax('a@example.com').status_code, 200)
+        self.assertEqual(self.post_ajax('b@example.com').status_code, 200)
+        # Même IP, nouvel email
+        response = self.post_ajax('c@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertFalse(response.json()['success'])
+        # Même email, autres IP
+        self.assertEqual(self.post_ajax('A@example.com ', ip='10.0.0.2').status_code, 200)
+        self.assertEqual(self.post_ajax('a@example.com', ip='10.0.0.3').status_code, 429)
+        self.assertEqual(Contact.objects.count(), 3)
+
+    def test_html_form_gets_a_plain_429(self):
+        for _ in range(2):
+            self.client.post(reverse('website:contact'), {'name': 'Awa'}, HTTP_ACCEPT='text/html')
+        response = self.client.post(reverse('website:contact'), {'name': 'Awa'}, HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        # Les GET ne sont pas limités
+        self.assertEqual(self.client.get(reverse('website:contact')).status_code, 200)
+
+    def test_sliding_window_and_retry_after(self):
+        # 2 requêtes en fin de fenêtre : la fenêtre suivante reste chargée au prorata
+        self.assertEqual(hit('test', 'ip', '1.2.3.4', 2, 60, now=59), 0)
+        self.assertEqual(hit('test', 'ip', '1.2.3.4', 2, 60, now=59), 0)
+        self.assertEqual(hit('test', 'ip', '1.2.3.4', 2, 60, now=59.5), 1)
+        # À t=60, la fenêtre précédente pèse 2 ; à t=90, 2 * 0.5 = 1 : une requête passe
+        self.assertEqual(hit('test', 'ip', '1.2.3.4', 2, 60, now=60), 30)
+        self.assertEqual(hit('test', 'ip', '1.2.3.4', 2, 60, now=90), 0)
+        self.assertGreater(hit('test', 'ip', '1.2.3.4', 2, 60, now=91), 0)
+
+    def test_rejected_requests_do_not_consume_other_buckets(self):
+        self.assertEqual(self.post_ajax('a@example.com').status_code, 200)
+        self.assertEqual(self.post_ajax('a@example.com', ip='10.0.0.2').status_code, 200)
+        # Refusée par l'email : le quota de 10.0.0.3 reste entier
+        self.assertEqual(self.post_ajax('a@example.com', ip='10.0.0.3').status_code, 429)
+        self.assertEqual(self.post_ajax('b@example.com', ip='10.0.0.3').status_code, 200)
+        self.assertEqual(self.post_ajax('c@example.com', ip='10.0.0.3').status_code, 200)
+        self.assertEqual(self.post_ajax('d@example.com', ip='10.0.0.3').status_code, 429)
+
+    def test_concurrent_hits_never_exceed_the_limit(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: hit('test', 'ip', '1.2.3.4', 5, 60, now=30), range(40)))
+        self.assertEqual(results.count(0), 5)
+        # Les refus ne sont pas comptés
+        self.assertEqual(hit('test', 'ip', '1.2.3.4', 6, 60, now=31), 0)
+
+    def test_overhead_is_a_few_microseconds(self):
+        started = time.perf_counter()
+        for index in range(1000):
+            hit('test', 'ip', f'10.1.{index // 250}.{index % 250}', 1000, 60)
+        # Quelques µs par appel avec le cache locmem ; marge large pour les CI lentes
+        self.assertLess((time.perf_counter() - started) / 1000, 0.0005)
+
+
+class IndexUsageTests(TestCase):
+    """Les requêtes publiques s'appuient sur les index de 0011_query_indexes (EXPLAIN)"""
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tables quasi vides : sans cela, PostgreSQL préfère un parcours séquentiel
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        # L'index fournit aussi l'ordre : pas de tri supplémentaire
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_public_queries_use_indexes(self):
+        cases = [
+            (News.objects.filter(published=True).order_by('-created_at')[:3], 'website_news_published_recent'),
+            (News.objects.filter(published=True).order_by('-created_at', '-id')[:20], 'website_news_published_recent'),
+            (Testimonial.objects.filter(active=True).order_by('-created_at')[:3], 'website_testim_active_recent'),
+            (Company.objects.filter(active=True).order_by('name'), 'website_company_active_name'),
+            (
+                CompanyProjectImage.objects.filter(company_id__in=[1]).order_by('order', 'created_at'),
+                'website_projimg_company_order',
+            ),
+        ]
+        for queryset, index_name in cases:
+            with self.subTest(index=index_name):
+                self.assertUsesIndex(queryset, index_name)
+
+
+class SingleActiveTests(TestCase):
+    """Un seul logo / hero actif, objet actif mémoïsé par requête et par processus"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_save_deactivates_the_previous_active_row(self):
+        first = HomePageHero.objects.create(background_image='homepage/a.jpg')
+        second = HomePageHero.objects.create(background_image='homepage/b.jpg')
+        first.refresh_from_db()
+        self.assertFalse(first.active)
+        self.assertEqual(list(HomePageHero.objects.filter(active=True)), [second])
+        self.assertEqual(HomePageHero.get_active_hero(), second)
+
+    def test_database_rejects_a_second_active_row(self):
+        NavigationLogo.objects.create(logo='navigation/a.png')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            NavigationLogo.objects.bulk_create([NavigationLogo(logo='navigation/b.png', active=True)])
+
+    def test_admin_form_may_activate_another_row(self):
+        NavigationLogo.objects.create(logo='navigation/a.png')
+        other = NavigationLogo(logo='navigation/b.png', active=True)
+        other.full_clean()
+
+    def test_active_row_is_memoized_and_invalidated_on_save(self):
+        hero = HomePageHero.objects.create(background_image='homepage/a.jpg')
+        HomePageHero.get_active_hero()
+        # Mémoire du processus : aucune requête SQL tant que rien ne change
+        with self.assertNumQueries(0):
+            self.assertEqual(HomePageHero.get_active_hero(), hero)
+        hero.title = 'Nouveau titre'
+        hero.save()
+        self.assertEqual(HomePageHero.get_active_hero().title, 'Nouveau titre')
+        hero.delete()
+        self.assertIsNone(HomePageHero.get_active_hero())
+
+    def test_active_row_is_read_once_per_request(self):
+        HomePageHero.objects.create(background_image='homepage/a.jpg')
+
+        def view(request):
+            with self.assertNumQueries(0), patch.object(cache, 'get', wraps=cache.get) as cache_get:
+                for _ in range(3):
+                    HomePageHero.get_active_hero()
+            return cache_get.call_count
+
+        HomePageHero.get_active_hero()
+        self.assertEqual(RequestMemoMiddleware(view)(RequestFactory().get('/')), 1)
+
+    def test_get_active_many_reads_versions_in_one_cache_call(self):
+        hero = HomePageHero.objects.create(background_image='homepage/a.jpg')
+        logo = NavigationLogo.objects.create(logo='navigation/a.png')
+        HomePageHero.get_active_hero(), NavigationLogo.get_active_logo()
+
+        def view(request):
+            with patch.object(cache, 'get_many', wraps=cache.get_many) as cache_get_many:
+                active = SingleActiveModel.get_active_many(HomePageHero, NavigationLogo)
+            # Le context processor retrouve ensuite le logo sans relire le cache
+            with self.assertNumQueries(0), patch.object(cache, 'get') as cache_get:
+                self.assertEqual(NavigationLogo.get_active_logo(), logo)
+            cache_get.assert_not_called()
+            return active, cache_get_many.call_args_list
+
+        active, calls = RequestMemoMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(active, {HomePageHero: hero, NavigationLogo: logo})
+        self.assertEqual(len(calls), 1)
+        self.assertCountEqual(
+            calls[0].args[0], [HomePageHero.active_version_key(), NavigationLogo.active_version_key()],
+        )
+
+    @override_settings(LOCAL_VERSION_TIMEOUT=1)
+    def test_local_cache_version_expires_for_other_workers(self):
+        HomePageHero.objects.create(background_image='homepage/a.jpg', title='Ancien')
+        HomePageHero.get_active_hero()
+        # Modification faite par un autre worker : son cache local seul a changé de version
+        HomePageHero.objects.update(title='Nouveau')
+        self.assertEqual(HomePageHero.get_active_hero().title, 'Ancien')
+        time.sleep(1.1)
+        self.assertEqual(HomePageHero.get_active_hero().title, 'Nouveau')
+
+    def test_version_timeout_depends_on_the_cache_backend(self):
+        self.assertEqual(version_timeout(), settings.LOCAL_VERSION_TIMEOUT)
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with override_settings(CACHES=redis):
+            self.assertTrue(cache_is_shared())
+            self.assertIsNone(version_timeout())
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class RequestMemoTests(TestCase):
+    """Magasin de mémoïsation par requête (ContextVar), en WSGI comme en ASGI"""
+
+    def test_processor_does_not_override_the_view_companies(self):
+        Company.objects.create(name='Alpha', slug='alpha', description='A', icon='🏢', services=[], kpis=[])
+        response = self.client.get(reverse('website:companies'))
+        self.assertEqual([card['slug'] for card in response.context['companies']], ['alpha'])
+        self.assertEqual([card['slug'] for card in response.context['footer_companies']], ['alpha'])
+
+    def test_async_requests_get_separate_stores(self):
+        async def view(request):
+            value = request_memo('key', object)
+            await asyncio.sleep(0)
+            # Une vue synchrone exécutée dans un thread voit le même magasin
+            same = await sync_to_async(request_memo)('key', object)
+            return value, same
+
+        middleware = RequestMemoMiddleware(view)
+
+        async def serve_two():
+            return await asyncio.gather(middleware(RequestFactory().get('/')), middleware(RequestFactory().get('/')))
+
+        (first, first_again), (second, second_again) = async_to_sync(serve_two)()
+        self.assertIs(first, first_again)
+        self.assertIs(second, second_again)
+        self.assertIsNot(first, second)
+
+
+class DataDependenciesTests(SimpleTestCase):
+    """Dépendances d'une vue : en lot en synchrone, en parallèle en asynchrone"""
+
+    DELAY = 0.2
+
+    def slow(self, value):
+        def load():
+            time.sleep(self.DELAY)
+            return value
+        return load
+
+    def dependencies(self):
+        return DataDependencies(
+            Batch(('hero',), self.slow({'hero': 'h', 'logo': 'l'})),
+            news=self.slow(['n']),
+            testimonials=self.slow(['t']),
+        )
+
+    def test_sync_load_runs_each_dependency_once(self):
+        self.assertEqual(self.dependencies().load(), {'hero': 'h', 'news': ['n'], 'testimonials': ['t']})
+
+    def test_async_load_takes_the_slowest_dependency(self):
+        started = time.perf_counter()
+        data = async_to_sync(self.dependencies().aload)()
+        elapsed = time.perf_counter() - started
+        self.assertEqual(data, {'hero': 'h', 'news': ['n'], 'testimonials': ['t']})
+        # Trois attentes de DELAY : la somme serait 3 * DELAY
+        self.assertLess(elapsed, 2 * self.DELAY)
+
+
+class SiteSettingsTests(TestCase):
+    """Snapshot des paramètres : une requête au chargement, zéro ensuite"""
+
+    def setUp(self):
+        cache.clear()
+        Setting.objects.bulk_create([
+            Setting(key='site_name', value='AZI GROUP'),
+            Setting(key='news_per_page', value=' 9 '),
+            Setting(key='maintenance', value='Oui'),
+            Setting(key='footer_links', value='["a", "b"]'),
+            Setting(key='broken_json', value='{'),
+        ])
+        site_settings.invalidate()
+
+    def test_all_settings_load_in_one_query_then_none(self):
+        with request_memo_scope(), self.assertNumQueries(1):
+            self.assertEqual(Setting.get_setting('site_name'), 'AZI GROUP')
+            self.assertEqual(Setting.get_setting('absent', 'défaut'), 'défaut')
+            self.assertEqual(site_settings.get_int('news_per_page'), 9)
+        # Requête suivante : snapshot du processus, version lue dans le cache
+        with request_memo_scope(), self.assertNumQueries(0):
+            self.assertEqual(site_settings.get('site_name'), 'AZI GROUP')
+            self.assertTrue(site_settings.get_bool('maintenance'))
+
+    def test_typed_getters(self):
+        self.assertEqual(site_settings.get_int('site_name', 3), 3)
+        self.assertFalse(site_settings.get_bool('absent'))
+        self.assertIsNone(site_settings.get_bool('site_name', None))
+        self.assertEqual(site_settings.get_json('footer_links'), ['a', 'b'])
+        self.assertEqual(site_settings.get_json('broken_json', {}), {})
+        with self.assertRaises(TypeError):
+            site_settings.get_snapshot()['site_name'] = 'autre'
+
+    def test_changes_bump_the_version(self):
+        self.assertEqual(Setting.get_setting('site_name'), 'AZI GROUP')
+        Setting.set_setting('site_name', 'AZI')
+        self.assertEqual(Setting.get_setting('site_name'), 'AZI')
+        Setting.objects.get(key='site_name').delete()
+        self.assertIsNone(Setting.get_setting('site_name'))
+        # Autre processus : le snapshot partagé dans le cache suffit
+        site_settings._local_snapshot = (None, MappingProxyType({}))
+        with self.assertNumQueries(0):
+            self.assertEqual(site_settings.get_int('news_per_page'), 9)
+
+    @override_settings(LOCAL_VERSION_TIMEOUT=1)
+    def test_local_cache_version_expires_for_other_workers(self):
+        site_settings.invalidate()
+        self.assertEqual(site_settings.get('site_name'), 'AZI GROUP')
+        # Modification faite par un autre worker : son cache local seul a changé de version
+        Setting.objects.filter(key='site_name').update(value='AZI')
+        self.assertEqual(site_settings.get('site_name'), 'AZI GROUP')
+        time.sleep(1.1)
+        self.assertEqual(site_settings.get('site_name'), 'AZI')
+
+    def test_template_tag_reads_the_snapshot(self):
+        template = Template(
+            '{% load site_settings %}{% setting "site_name" %}|{% setting "absent" "—" %}|'
+            '{% setting "news_per_page" cast="int" as per_page %}{{ per_page|add:1 }}|'
+            '{% setting "footer_links" cast="json" as links %}{{ links|join:"," }}'
+        )
+        template.render(Context())
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render(Context()), 'AZI GROUP|—|10|a,b')
+
+
+class AsyncUrlconf:
+    """Urlconf du projet avec les vues de website.async_views (ASYNC_VIEWS=True)"""
+
+    urlpatterns = [path('', include((build_urlpatterns(use_async_views=True), 'website')))]
+
+
+@override_settings(ROOT_URLCONF=AsyncUrlconf, ALLOWED_HOSTS=['testserver'], PAGE_CACHE_ENABLED=False)
+class AsyncViewsTests(QueryBudgetMixin, TestCase):
+    """Les vues asynchrones rendent les mêmes pages que les vues synchrones, dans le même budget"""
+
+    ROUTES = ('index', 'news_list', 'news_detail', 'search', 'api_companies', 'api_news')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(companies=3, news=8, testimonials=3, images=0)
+
+    def setUp(self):
+        cache.clear()
+        self.urls = route_urls(self.dataset, AsyncUrlconf.urlpatterns[0].url_patterns)
+
+    def test_async_routes_match_sync_views(self):
+        async def async_get(url):
+            return await self.async_client.get(url)
+
+        callbacks = {pattern.name: pattern.callback for pattern in build_urlpatterns(use_async_views=True)}
+        for name in self.ROUTES:
+            url = self.urls[f'website:{name}']
+            with self.subTest(view=name):
+                self.assertTrue(asyncio.iscoroutinefunction(callbacks[name]))
+                with override_settings(ROOT_URLCONF='azigroup_project.urls'):
+                    expected = self.client.get(url)
+                cache.clear()
+                # Client ASGI : chaîne de middlewares asynchrone, comme sous uvicorn
+                response, queries = self.assertWithinQueryBudget(
+                    get_query_budget(callbacks[name]), async_to_sync(async_get), url,
+                )
+                # Requêtes de l'ORM asynchrone exécutées sur la connexion du test, donc comptées
+                self.assertGreater(queries, 0)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], expected['Content-Type'])
+                if name.startswith('api_'):
+                    self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    def test_news_detail_404_and_api_news_conditional_get(self):
+        self.assertEqual(self.client.get(reverse('website:news_detail', args=['absente'])).status_code, 404)
+        url = reverse('website:api_news')
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        invalid = self.client.get(url, {'cursor': 'pas-un-curseur'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(invalid.status_code, 400)
+        self.assertNotIn('ETag', invalid)
+
+    @override_settings(STREAMING_JSON_API=True)
+    def test_async_streaming_apis(self):
+        for name, key in (('api_companies', 'companies'), ('api_news', 'news')):
+            with self.subTest(view=name):
+                response = self.client.get(self.urls[f'website:{name}'])
+                self.assertTrue(response.is_async)
+                body = b''.join(async_to_sync(self._consume)(response))
+                self.assertEqual(len(json.loads(body)[key]), 3 if name == 'api_companies' else 8)
+
+    @staticmethod
+    async def _consume(response):
+        return [chunk async for chunk in response.streaming_content]
+
+    def test_api_companies_payload_is_public_and_identical_when_streamed(self):
+        Company.objects.filter(slug=self.dataset['company_slug']).update(logo='company_logos/interne.png')
+        # Dernière créée mais première par nom : l'ordre des cartes ne suit pas les ids
+        Company.objects.filter(pk=Company.objects.order_by('-pk').values('pk')[:1]).update(name='AAA')
+        payloads = []
+        for streaming in (False, True):
+            for urlconf in ('azigroup_project.urls', AsyncUrlconf):
+                with self.subTest(streaming=streaming, urlconf=urlconf), \
+                        override_settings(STREAMING_JSON_API=streaming, ROOT_URLCONF=urlconf):
+                    cache.clear()
+                    response = self.client.get(self.urls['website:api_companies'])
+                    self.assertEqual(response.streaming, streaming)
+                    if response.streaming:
+                        body = b''.join(
+                            async_to_sync(self._consume)(response) if response.is_async else response.streaming_content
+                        )
+                    else:
+                        body = response.content
+                    cards = json.loads(body)['companies']
+                    self.assertTrue(any(card['logo_url'] for card in cards))
+                    self.assertFalse([card for card in cards if PRIVATE_CARD_FIELDS & card.keys()])
+                    payloads.append(cards)
+        # Même contenu et même ordre, en flux comme depuis les cartes précalculées
+        self.assertEqual(payloads[0][0]['name'], 'AAA')
+        for cards in payloads[1:]:
+            self.assertEqual(cards, payloads[0])
+        # Les gabarits disposent toujours du chemin (variantes d'images)
+        self.assertIn('company_logos/interne.png', [card['logo_name'] for card in get_company_cards()])
+
+
+class DatabaseProfileTests(TestCase):
+    """Réglages de connexion : PRAGMA SQLite, connexions persistantes, pool PostgreSQL"""
+
+    def test_sqlite_init_command_is_applied(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite uniquement')
+        profile = database_profile()
+        self.assertEqual(profile['synchronous'], 'normal')
+        # Base de test en mémoire : ni journal WAL ni mmap, la vérification doit le signaler
+        problems = check_database_profile({'database': profile})
+        self.assertEqual([problem.split(' :')[0] for problem in problems], ['PRAGMA journal_mode', 'PRAGMA mmap_size'])
+
+    def test_check_flags_connections_reopened_despite_conn_max_age(self):
+        profile = {'conn_max_age': 60, 'pool': None}
+        measures = {
+            'website:index': {'connections': 30, 'requests': 30},
+            'website:about': {'connections': 1, 'requests': 30},
+        }
+        with patch.dict(connection.settings_dict, OPTIONS={}):
+            problems = check_database_profile({'database': profile, 'gunicorn': measures, 'asgi': measures})
+            self.assertEqual(problems, [
+                'gunicorn website:index : 30 connexions ouvertes pour 30 requêtes malgré les connexions persistantes',
+            ])
+            # Un pool reprend une connexion à chaque requête : rien à vérifier
+            self.assertEqual(check_database_profile({'database': {**profile, 'pool': {}}, 'gunicorn': measures}), [])
+
+    @skipUnless(importlib.util.find_spec('psycopg_pool'), 'psycopg 3 et psycopg-pool requis')
+    def test_postgresql_pool_options(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from website.db.postgresql.base import DatabaseWrapper
+
+        settings_dict = {
+            'ENGINE': 'website.db.postgresql', 'NAME': 'azigroup', 'USER': 'azigroup', 'PASSWORD': 'secret',
+            'HOST': 'localhost', 'PORT': 5432, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'pool': {'min_size': 1, 'max_size': 4}}, 'TIME_ZONE': None, 'AUTOCOMMIT': True,
+            'ATOMIC_REQUESTS': False, 'TEST': {},
+        }
+        wrapper = DatabaseWrapper(settings_dict, 'pool_test')
+        try:
+            pool = wrapper.pool
+            self.assertIs(DatabaseWrapper(settings_dict, 'pool_test').pool, pool)
+            self.assertEqual((pool.min_size, pool.max_size), (1, 4))
+            self.assertNotIn('pool', pool.kwargs)
+            self.assertTrue(pool.kwargs['autocommit'])
+            # Pool ouvert à la première connexion seulement
+            self.assertTrue(pool.closed)
+        finally:
+            wrapper.close_pool()
+
+        with self.assertRaises(ImproperlyConfigured):
+            DatabaseWrapper({**settings_dict, 'CONN_MAX_AGE': 60}, 'pool_test').pool
+        self.assertIsNone(DatabaseWrapper({**settings_dict, 'OPTIONS': {}}, 'pool_test').pool)
+
+
+class BenchCommandTests(TestCase):
+    """manage.py bench : garde-fou sur la base, cache du site préservé, données supprimées"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='azigroup-bench-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root, ALLOWED_HOSTS=['localhost'])
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_refuses_to_seed_without_allow_live(self):
+        with self.assertRaisesMessage(CommandError, '--allow-live'):
+            call_command('bench', mode='client', stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Company.objects.exists())
+
+    @patch('website.management.commands.bench.check_database_profile', return_value=[])
+    def test_client_mode_measures_routes_and_keeps_the_site_cache(self, _):
+        cache.set('website:test:sentinel', 'conservé')
+        stdout = StringIO()
+        call_command(
+            'bench', mode='client', allow_live=True, requests=2, companies=2, news=3, testimonials=1, images=1,
+            routes='index,company_detail,api_news', baseline=os.path.join(settings.MEDIA_ROOT, 'absente.json'),
+            stdout=stdout, stderr=StringIO(),
+        )
+        results = json.loads(stdout.getvalue())
+        self.assertEqual(set(results['client']), {'website:index', 'website:company_detail', 'website:api_news'})
+        for route in results['client'].values():
+            self.assertEqual(route['status'], 200)
+            self.assertEqual(route['requests'], 2)
+        self.assertEqual(cache.get('website:test:sentinel'), 'conservé')
+        # Jeu de données et fichiers images supprimés à la fin
+        self.assertFalse(Company.objects.exists())
+        self.assertEqual(default_storage.listdir('company_logos'), ([], []))
+
+
+class StaticBuildTests(SimpleTestCase):
+    """collectstatic : CSS/JS minifiés, noms hachés, copies .gz/.br servies en cache immuable"""
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        build = override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'website.assets.AssetStorage'}},
+        )
+        build.enable()
+        self.addCleanup(build.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_assets_are_minified_hashed_and_precompressed(self):
+        for name in ('css/style.css', 'js/main.js'):
+            with self.subTest(name=name):
+                hashed = staticfiles_storage.stored_name(name)
+                self.assertRegex(hashed, r'\.[0-9a-f]{12}\.(css|js)$')
+                self.assertEqual(staticfiles_storage.url(name), f'/static/{hashed}')
+                source = (settings.BASE_DIR / 'static' / name).stat().st_size
+                self.assertLess(staticfiles_storage.size(hashed), source * 0.9)
+                self.assertTrue(staticfiles_storage.exists(f'{hashed}.gz'))
+                if importlib.util.find_spec('brotli'):
+                    self.assertTrue(staticfiles_storage.exists(f'{hashed}.br'))
+        # Fichier absent du build : lien non haché plutôt qu'une erreur
+        self.assertEqual(staticfiles_storage.url('images/absente.png'), '/static/images/absente.png')
+
+    def test_hashed_files_are_served_compressed_and_immutable(self):
+        from whitenoise.middleware import WhiteNoiseMiddleware
+
+        middleware = WhiteNoiseMiddleware(lambda request: None)
+        url = staticfiles_storage.url('css/style.css')
+        response = middleware(RequestFactory().get(url, HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CriticalCssTests(TestCase):
+    """CSS critique : analyse hors ligne du HTML rendu, inséré par {% critical_css %}"""
+
+    def setUp(self):
+        cache.clear()
+        self.critical_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.critical_dir, ignore_errors=True)
+        directory = override_settings(CRITICAL_CSS_DIR=self.critical_dir)
+        directory.enable()
+        self.addCleanup(directory.disable)
+
+    def test_extract_keeps_rules_of_the_first_screen(self):
+        html = (
+            '<html><body><header><nav class="menu"><a href="/">A</a></nav></header>'
+            '<main><section class="hero"><h1>Titre</h1></section><section class="intro"></section>'
+            '<section class="late"></section></main><footer class="footer"></footer></body></html>'
+        )
+        css = (
+            'body{margin:0} .menu a{color:red} .menu a:hover{color:blue} .hero h1, .other{font-size:3rem}'
+            ' .late{color:gray} .footer{color:black}'
+            ' @media (max-width: 768px){.hero{padding:0} .footer{padding:0}}'
+            ' .intro{animation: fadeIn 1s} @keyframes fadeIn{from{opacity:0}to{opacity:1}}'
+            ' @keyframes unused{from{opacity:0}}'
+        )
+        critical = extract_critical_css(html, css)
+        self.assertEqual(critical, (
+            'body{margin:0}.menu a{color:red}.hero h1,.other{font-size:3rem}'
+            '@media (max-width:768px){.hero{padding:0}}.intro{animation:fadeIn 1s}'
+            '@keyframes fadeIn{from{opacity:0}to{opacity:1}}'
+        ))
+
+    def test_tag_inlines_critical_css_and_loads_the_stylesheet_async(self):
+        with open(f'{self.critical_dir}/index.css', 'w', encoding='utf-8') as handle:
+            handle.write('.hero{color:red}\n')
+        content = self.client.get(reverse('website:index')).content.decode()
+        self.assertIn('<style>.hero{color:red}\n</style>', content)
+        self.assertIn('<link rel="preload" href="/static/css/style.css" as="style"', content)
+        self.assertIn('<noscript><link rel="stylesheet" href="/static/css/style.css"></noscript>', content)
+
+        # Page sans CSS critique construit : feuille bloquante habituelle
+        content = self.client.get(reverse('website:about')).content.decode()
+        self.assertIn('<link rel="stylesheet" href="/static/css/style.css">', content)
+        self.assertNotIn('rel="preload"', content)
+
+    def test_build_command_writes_and_checks_critical_css(self):
+        call_command('build_critical_css', pages='index,news_detail', stdout=StringIO())
+        stylesheet = (settings.BASE_DIR / 'static' / 'css' / 'style.css').stat().st_size
+        with open(f'{self.critical_dir}/index.css', encoding='utf-8') as handle:
+            critical = handle.read()
+        self.assertIn('.nav-links{', critical)
+        self.assertIn('.hero{', critical)
+        self.assertNotIn('footer', critical)
+        self.assertLess(len(critical), stylesheet / 4)
+        # Jeu de données annulé avec la transaction
+        self.assertFalse(Company.objects.filter(slug__startswith='critical-').exists())
+
+        call_command('build_critical_css', pages='index,news_detail', check=True)
+        with open(f'{self.critical_dir}/index.css', 'a', encoding='utf-8') as handle:
+            handle.write('.stale{}')
+        with self.assertRaisesMessage(CommandError, 'index'):
+            call_command('build_critical_css', pages='index,news_detail', check=True)
@@ -1,26 +1,38 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'website'
 
-urlpatterns = [
-    # Pages principales
-    path('', views.index, name='index'),
-    path('about/', views.about, name='about'),
-    path('companies/', views.companies, name='companies'),
-    path('companies/<slug:slug>/', views.company_detail, name='company_detail'),
-    path('news/', views.news_list, name='news_list'),
-    path('news/<slug:slug>/', views.news_detail, name='news_detail'),
-    path('contact/', views.contact, name='contact'),
-    path('testimonials/', views.testimonials, name='testimonials'),
-    path('search/', views.search, name='search'),
-    
-    # API endpoints
-    path('api/contact/', views.contact_ajax, name='contact_ajax'),
-    path('api/companies/', views.api_companies, name='api_companies'),
-    path('api/news/', views.api_news, name='api_news'),
-    
-    # SEO
-    path('sitemap.xml', views.sitemap, name='sitemap'),
-    path('robots.txt', views.robots_txt, name='robots_txt'),
-]
+
+def build_urlpatterns(use_async_views=False):
+    """Routes du site ; ``use_async_views`` sert les versions de website.async_views (ASGI)"""
+    pages = async_views if use_async_views else views
+    return [
+        # Pages principales
+        path('', pages.index, name='index'),
+        path('about/', views.about, name='about'),
+        path('companies/', views.companies, name='companies'),
+        path('companies/<slug:slug>/', views.company_detail, name='company_detail'),
+        path('news/', pages.news_list, name='news_list'),
+        path('news/<slug:slug>/', pages.news_detail, name='news_detail'),
+        path('contact/', views.contact, name='contact'),
+        path('testimonials/', views.testimonials, name='testimonials'),
+        path('search/', pages.search, name='search'),
+
+        # API endpoints
+        path('api/contact/', views.contact_ajax, name='contact_ajax'),
+        path('api/contacts/bulk/', views.api_contacts_bulk, name='api_contacts_bulk'),
+        path('api/companies/', pages.api_companies, name='api_companies'),
+        path('api/news/', pages.api_news, name='api_news'),
+        path('api/search/suggest/', views.api_search_suggest, name='api_search_suggest'),
+        path('api/profiling/', views.api_profiling, name='api_profiling'),
+
+        # SEO
+        path('sitemap.xml', views.sitemap, name='sitemap'),
+        path('sitemap-<slug:section>-<int:page>.xml', views.sitemap_section, name='sitemap_section'),
+        path('robots.txt', views.robots_txt, name='robots_txt'),
+    ]
+
+
+urlpatterns = build_urlpatterns(getattr(settings, 'ASYNC_VIEWS', False))
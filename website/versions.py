@@ -0,0 +1,66 @@
+"""
+Versions partagées entre processus, lues dans le cache Django.
+
+Une valeur gardée en mémoire par chaque processus (objet actif des modèles
+« un seul actif », snapshot des paramètres) ou rangée dans le cache sous une
+clé versionnée (snapshot du site, cartes des entreprises, pages) est associée
+à une version : le processus la recharge dès que la version lue dans le
+cache change, et toute modification change la version (``bump_version``).
+
+La version n'est vue par tous les workers que si le cache est partagé
+(Redis, Memcached, base de données, fichiers). Avec un cache propre au
+processus (``LocMemCache``, ``DummyCache``), un enregistrement traité par un
+worker ne change la version que dans ce worker : elle expire alors après
+``LOCAL_VERSION_TIMEOUT`` secondes, et chaque worker relit la base au plus
+avec ce retard au lieu de servir indéfiniment une valeur périmée.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared():
+    """Indique si le cache ``default`` est commun à tous les processus"""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def version_timeout():
+    """Durée de vie d'une version : illimitée avec un cache partagé"""
+    if cache_is_shared():
+        return None
+    return getattr(settings, 'LOCAL_VERSION_TIMEOUT', 30)
+
+
+def current_version(key):
+    """Retourne la version courante, créée si elle est absente ou expirée"""
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, version_timeout())
+        version = cache.get(key, version)
+    return version
+
+
+def current_versions(keys):
+    """Comme ``current_version``, pour plusieurs clés lues en un appel au cache"""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        created = time.time_ns()
+        for key in missing:
+            cache.add(key, created, version_timeout())
+        # Version posée entre-temps par un autre processus, sinon la nôtre
+        versions.update({key: created for key in missing}, **cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    """Change la version : les processus rechargeront leur valeur"""
+    cache.set(key, time.time_ns(), version_timeout())
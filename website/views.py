@@ -1,34 +1,110 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
+from django.core.files.storage import default_storage
 from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import Contact, Company, News, Setting, Testimonial, HomePageHero, NavigationLogo
+from django.db.models import Count, Max, Prefetch, Q
+from django.db.models.functions import Substr
+from django.urls import reverse
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from .models import (
+    Contact, Company, CompanyProjectImage, News, Setting, Testimonial, HomePageHero, NavigationLogo,
+    ImageDerivative, SingleActiveModel,
+)
 from .forms import ContactForm
+from .contacts import BulkPayloadError, ingest_contacts, parse_rows
+from .cache import (
+    active_companies, cache_page_tagged, get_company_card, get_company_cards, get_site_chrome, public_company_card,
+)
+from .loaders import Batch, DataDependencies
+from .search import get_search_backend
+from .suggest import get_suggest_index
+from .profiling import get_profile_stats
+from .ratelimit import rate_limit
+from .query_budget import query_budget
+from .sitemaps import (
+    SECTIONS, cached_xml_response, needs_index, render_index, render_urlset,
+    section_pages, sitemap_etag, sitemap_last_modified,
+)
+from .streaming import StreamingJsonResponse, iterator_chunk_size, streaming_json_enabled
+from .tasks import enqueue_on_commit, notify_bulk_contacts
+from datetime import datetime
+import hashlib
+import hmac
 import json
 
 
+def load_site_singletons():
+    """Hero et logo actifs en un seul passage (voir SingleActiveModel.get_active_many)"""
+    active = SingleActiveModel.get_active_many(HomePageHero, NavigationLogo)
+    return {'hero_section': active[HomePageHero], 'navigation_logo': active[NavigationLogo]}
+
+
+def load_recent_news():
+    return list(News.objects.filter(published=True).order_by('-created_at')[:3])
+
+
+def load_recent_testimonials():
+    return list(Testimonial.objects.filter(active=True).order_by('-created_at')[:3])
+
+
+# Données de la page d'accueil, indépendantes les unes des autres : chargées en
+# parallèle par la vue asynchrone. Le logo, lu avec le hero, et le snapshot du
+# site sont ensuite repris par le context processor sans nouvelle lecture.
+HOME_DATA = DataDependencies(
+    Batch(('hero_section',), load_site_singletons),
+    companies=get_company_cards,
+    news=load_recent_news,
+    testimonials=load_recent_testimonials,
+    site_chrome=get_site_chrome,
+)
+
+def prefetch_pictures(*sources):
+    """
+    Résout en un lot les dérivés des images de la page, logo de la navbar
+    compris : les balises {% picture %} et {% background_image %} les lisent
+    ensuite dans la mémoïsation de la requête (une lecture du cache et au
+    plus une requête, quel que soit le nombre d'images)
+    """
+    ImageDerivative.for_sources([get_site_chrome()['navbar_logo_name'], *sources])
+
+
+def hero_and_card_pictures(data):
+    """Images du hero et logos des cartes d'entreprises d'un contexte chargé"""
+    return [
+        getattr(data['hero_section'], 'background_image', None),
+        *(card['logo_name'] for card in data['companies']),
+    ]
+
+
+def home_pictures(data):
+    return [*hero_and_card_pictures(data), *(item.image for item in data['news'])]
+
+
+COMPANIES_DATA = DataDependencies(
+    Batch(('hero_section',), load_site_singletons),
+    companies=get_company_cards,
+)
+
+
+@query_budget(6)
+@cache_page_tagged(Company, News, Testimonial, HomePageHero)
 def index(request):
     """Page d'accueil"""
-    companies = Company.objects.filter(active=True)
-    recent_news = News.objects.filter(published=True).order_by('-created_at')[:3]
-    testimonials = Testimonial.objects.filter(active=True).order_by('-created_at')[:3]
-    hero_section = HomePageHero.get_active_hero()
-    
-    context = {
-        'companies': companies,
-        'news': recent_news,
-        'testimonials': testimonials,
-        'hero_section': hero_section,
-    }
+    context = HOME_DATA.load()
+    prefetch_pictures(*home_pictures(context))
     return render(request, 'website/index.html', context)
 
 
+@query_budget(4)
+@cache_page_tagged(Company)
 def about(request):
     """Page À propos"""
-    companies = Company.objects.filter(active=True)
+    companies = get_company_cards()
     
     context = {
         'companies': companies,
@@ -36,28 +112,41 @@ def about(request):
     return render(request, 'website/about.html', context)
 
 
+@query_budget(4)
+@cache_page_tagged(Company, HomePageHero)
 def companies(request):
     """Page des entreprises"""
-    companies = Company.objects.filter(active=True)
-    hero_section = HomePageHero.get_active_hero()
-    
-    context = {
-        'companies': companies,
-        'hero_section': hero_section,
-    }
+    context = COMPANIES_DATA.load()
+    prefetch_pictures(*hero_and_card_pictures(context))
     return render(request, 'website/companies.html', context)
 
 
+@query_budget(7)
+@cache_page_tagged(Company, CompanyProjectImage)
 def company_detail(request, slug):
     """Détail d'une entreprise"""
-    company = get_object_or_404(Company, slug=slug, active=True)
+    # Galerie chargée en une seule requête, dans l'ordre d'affichage
+    company = get_object_or_404(
+        Company.objects.prefetch_related(Prefetch(
+            'project_images',
+            queryset=CompanyProjectImage.objects.order_by('order', 'created_at'),
+        )),
+        slug=slug,
+        active=True,
+    )
+    
+    card = get_company_card(company)
+    prefetch_pictures(card['logo_name'], *(project.image for project in company.project_images.all()))
     
     context = {
         'company': company,
+        'card': card,
     }
     return render(request, 'website/company_detail.html', context)
 
 
+@query_budget(6)
+@cache_page_tagged(News)
 def news_list(request):
     """Liste des actualités"""
     news_list = News.objects.filter(published=True).order_by('-created_at')
@@ -66,6 +155,7 @@ def news_list(request):
     paginator = Paginator(news_list, 6)  # 6 articles par page
     page_number = request.GET.get('page')
     news = paginator.get_page(page_number)
+    prefetch_pictures(*(item.image for item in news))
     
     context = {
         'news': news,
@@ -73,6 +163,8 @@ def news_list(request):
     return render(request, 'website/news_list.html', context)
 
 
+@query_budget(5)
+@cache_page_tagged(News)
 def news_detail(request, slug):
     """Détail d'une actualité"""
     news = get_object_or_404(News, slug=slug, published=True)
@@ -81,6 +173,7 @@ def news_detail(request, slug):
     related_news = News.objects.filter(
         published=True
     ).exclude(id=news.id).order_by('-created_at')[:3]
+    prefetch_pictures(news.image)
     
     context = {
         'news': news,
@@ -89,6 +182,8 @@ def news_detail(request, slug):
     return render(request, 'website/news_detail.html', context)
 
 
+@query_budget(4)
+@rate_limit('contact', keys=('ip', 'email'))
 def contact(request):
     """Page de contact"""
     if request.method == 'POST':
@@ -109,8 +204,10 @@ def contact(request):
     return render(request, 'website/contact.html', context)
 
 
+@query_budget(4)
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limit('contact_ajax', keys=('ip', 'email'))
 def contact_ajax(request):
     """API AJAX pour le formulaire de contact"""
     try:
@@ -136,40 +233,83 @@ def contact_ajax(request):
         })
 
 
+@query_budget(6)
+@csrf_exempt
+@require_http_methods(["POST"])
+@rate_limit('api_contacts_bulk')
+def api_contacts_bulk(request):
+    """
+    Import en masse de messages de contact (tableau JSON ou NDJSON), réservé
+    aux partenaires munis d'un jeton (en-tête ``Authorization: Bearer ...``)
+    """
+    if not _has_bulk_contact_token(request):
+        return JsonResponse({'success': False, 'message': 'Jeton invalide'}, status=401)
+    try:
+        rows = parse_rows(request.body, request.content_type)
+    except BulkPayloadError as error:
+        return JsonResponse({'success': False, 'message': str(error)}, status=error.status)
+
+    results = ingest_contacts(rows)
+    created = [result['id'] for result in results if result['status'] == 'created']
+    if created:
+        enqueue_on_commit(notify_bulk_contacts, contact_ids=created)
+    return JsonResponse({
+        'success': True,
+        'created': len(created),
+        'duplicates': sum(result['status'] == 'duplicate' for result in results),
+        'invalid': sum(result['status'] == 'invalid' for result in results),
+        'results': results,
+    })
+
+
+def _has_bulk_contact_token(request):
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    return any(
+        hmac.compare_digest(token.encode(), allowed.encode())
+        for allowed in getattr(settings, 'CONTACT_BULK_API_TOKENS', [])
+    )
+
+
+@query_budget(9)
 def search(request):
     """Page de recherche"""
-    query = request.GET.get('q', '')
-    results = []
-    
-    if query:
-        # Recherche dans les actualités
-        news_results = News.objects.filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query) | 
-            Q(excerpt__icontains=query),
-            published=True
-        )
-        
-        # Recherche dans les entreprises
-        company_results = Company.objects.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query),
-            active=True
-        )
-        
-        results = {
-            'news': news_results,
-            'companies': company_results,
-            'query': query,
-        }
-    
+    query = request.GET.get('q', '').strip()
     context = {
-        'results': results,
+        'results': search_results(query, request.GET.get('page')),
         'query': query,
     }
     return render(request, 'website/search.html', context)
 
 
+def search_results(query, page_number):
+    """Résultats de la recherche (liste vide sans requête), partagés avec la vue asynchrone"""
+    if not query:
+        return []
+    backend = get_search_backend()
+    
+    # Actualités classées par pertinence, 10 par page
+    paginator = Paginator(backend.search_news(query), 10)
+    news_results = paginator.get_page(page_number)
+    
+    return {
+        'news': news_results,
+        'companies': backend.search_companies(query),
+        'query': query,
+    }
+
+
+@query_budget(2)
+def api_search_suggest(request):
+    """API d'autocomplétion servie par l'index en mémoire (sans requête SQL)"""
+    query = request.GET.get('q', '').strip()
+    suggestions = get_suggest_index().suggest(query) if len(query) >= 2 else []
+    return JsonResponse({'suggestions': suggestions})
+
+
+@query_budget(6)
+@cache_page_tagged(Testimonial)
 def testimonials(request):
     """Page des témoignages"""
     testimonials = Testimonial.objects.filter(active=True).order_by('-created_at')
@@ -185,59 +325,265 @@ def testimonials(request):
     return render(request, 'website/testimonials.html', context)
 
 
+def _sitemap_etag(request, section=None, page=None):
+    return sitemap_etag(request, section)
+
+
+def _sitemap_last_modified(request, section=None, page=None):
+    return sitemap_last_modified(section)
+
+
+@query_budget(4)
+@condition(etag_func=_sitemap_etag, last_modified_func=_sitemap_last_modified)
 def sitemap(request):
-    """Génération simple du sitemap"""
-    companies = Company.objects.filter(active=True)
-    news = News.objects.filter(published=True)
-    
-    context = {
-        'companies': companies,
-        'news': news,
-    }
-    return render(request, 'website/sitemap.xml', context, content_type='application/xml')
+    """Sitemap complet, ou index des sitemaps par section au-delà de SITEMAP_MAX_URLS"""
+    if needs_index():
+        return cached_xml_response(request, ['index'], render_index)
+    return cached_xml_response(
+        request, ['all'], lambda base: render_urlset(base, [(name, None) for name in SECTIONS]),
+    )
+
 
+@query_budget(3)
+@condition(etag_func=_sitemap_etag, last_modified_func=_sitemap_last_modified)
+def sitemap_section(request, section, page):
+    """Fichier ``page`` du sitemap d'une section (référencé par l'index)"""
+    if section not in SECTIONS or not 1 <= page <= section_pages(section):
+        raise Http404("Sitemap introuvable")
+    return cached_xml_response(
+        request, [section, page], lambda base: render_urlset(base, [(section, page)]),
+    )
 
+
+@query_budget(3)
 def robots_txt(request):
     """Fichier robots.txt"""
-    return render(request, 'website/robots.txt', content_type='text/plain')
+    context = {'sitemap_url': request.build_absolute_uri(reverse('website:sitemap'))}
+    return render(request, 'website/robots.txt', context, content_type='text/plain')
 
 
 # Vues pour l'API (optionnel)
+@query_budget(1)
 def api_companies(request):
-    """API pour les entreprises"""
-    companies = Company.objects.filter(active=True)
-    data = []
-    
-    for company in companies:
-        data.append({
-            'id': company.id,
-            'name': company.name,
-            'slug': company.slug,
-            'description': company.description,
-            'icon': company.icon,
-            'gradient': company.gradient,
-            'services': company.get_services_list(),
-            'kpis': company.get_kpis_list(),
-            'url': company.get_absolute_url(),
-        })
+    """
+    API pour les entreprises (cartes précalculées, voir Company.to_card).
+
+    En flux, les cartes sont construites à chaque ligne lue plutôt que
+    prises dans le cache : la liste précalculée chargerait toute la table
+    en mémoire, ce que le flux doit éviter. Ordre et format sont identiques.
+    """
+    if streaming_json_enabled():
+        return StreamingJsonResponse(
+            (
+                public_company_card(company.to_card())
+                for company in active_companies().iterator(chunk_size=iterator_chunk_size())
+            ),
+            'companies',
+        )
     
-    return JsonResponse({'companies': data})
+    return JsonResponse({'companies': [public_company_card(card) for card in get_company_cards()]})
+
+
+# Champs exposés par api_news : colonnes nécessaires à chacun
+NEWS_API_FIELDS = {
+    'id': ('id',),
+    'title': ('title',),
+    'slug': ('slug',),
+    'excerpt': ('excerpt', 'content_head'),
+    'image_url': ('image', 'image_url'),
+    'created_at': ('created_at',),
+    'url': ('slug',),
+    'content': ('content',),
+}
+NEWS_API_DEFAULT_FIELDS = ['id', 'title', 'slug', 'excerpt', 'image_url', 'created_at', 'url']
+NEWS_API_PAGE_SIZE = 20
+NEWS_API_MAX_PAGE_SIZE = 100
+
 
+def _encode_news_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def _decode_news_cursor(cursor):
+    """Retourne (created_at, id) ou None si le curseur est invalide"""
+    try:
+        created_at, pk = urlsafe_base64_decode(cursor).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
 
+
+# Agrégats de l'état des actualités publiées (ETag / Last-Modified d'api_news)
+NEWS_API_STATE = {
+    'last_modified': Max('updated_at'),
+    'total': Count('id'),
+}
+
+
+def _news_api_state(request):
+    """Dernière modification et nombre d'actualités publiées (une requête par appel d'API)"""
+    if not hasattr(request, '_news_api_state'):
+        request._news_api_state = News.objects.filter(published=True).aggregate(**NEWS_API_STATE)
+    return request._news_api_state
+
+
+def news_api_etag(request):
+    state = _news_api_state(request)
+    raw = '|'.join([
+        str(state['last_modified']),
+        str(state['total']),
+        request.GET.get('fields', ''),
+        request.GET.get('cursor', ''),
+        request.GET.get('limit', ''),
+    ])
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def news_api_last_modified(request):
+    return _news_api_state(request)['last_modified']
+
+
+def _serialize_news_row(row, fields):
+    """Construit l'entrée JSON d'une actualité à partir d'une ligne .values()"""
+    data = {}
+    for field in fields:
+        if field == 'excerpt':
+            head = row['content_head']
+            data['excerpt'] = row['excerpt'] or (head[:150] + "..." if len(head) > 150 else head)
+        elif field == 'image_url':
+            data['image_url'] = default_storage.url(row['image']) if row['image'] else row['image_url']
+        elif field == 'created_at':
+            data['created_at'] = row['created_at'].isoformat()
+        elif field == 'url':
+            data['url'] = reverse('website:news_detail', args=[row['slug']])
+        else:
+            data[field] = row[field]
+    return data
+
+
+@query_budget(2)
 def api_news(request):
-    """API pour les actualités"""
-    news = News.objects.filter(published=True).order_by('-created_at')
-    data = []
-    
-    for article in news:
-        data.append({
-            'id': article.id,
-            'title': article.title,
-            'slug': article.slug,
-            'excerpt': article.get_excerpt(),
-            'image_url': article.get_image_url(),
-            'created_at': article.created_at.isoformat(),
-            'url': article.get_absolute_url(),
-        })
+    """
+    API pour les actualités.
+
+    Pagination par curseur sur (created_at, id) via ``?cursor=`` et
+    ``?limit=``, sélection des champs via ``?fields=title,slug,...``.
+    Le contenu complet n'est lu que si le champ ``content`` est demandé.
+    Les paramètres sont validés avant les en-têtes conditionnels : une
+    requête invalide reçoit toujours son erreur 400, sans ETag.
+    """
+    query = news_api_query(request)
+    if isinstance(query, JsonResponse):
+        return query
+    request._news_api_query = query
+    return _news_api_response(request)
+
+
+@condition(etag_func=news_api_etag, last_modified_func=news_api_last_modified)
+def _news_api_response(request):
+    """Page d'api_news pour une requête validée (``request._news_api_query``)"""
+    rows, fields, limit = request._news_api_query
+    
+    if streaming_json_enabled():
+        return stream_news_page(rows, fields, limit)
+    
+    return JsonResponse(news_api_page(list(rows), fields, limit))
+
+
+def news_api_query(request):
+    """
+    Retourne (lignes à lire, champs, limite) pour api_news, ou la réponse
+    d'erreur 400 ; partagé avec la vue asynchrone
+    """
+    fields = [f for f in request.GET.get('fields', '').split(',') if f] or NEWS_API_DEFAULT_FIELDS
+    unknown = [f for f in fields if f not in NEWS_API_FIELDS]
+    if unknown:
+        return JsonResponse({'error': f"Champs inconnus : {', '.join(unknown)}"}, status=400)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', NEWS_API_PAGE_SIZE)), 1), NEWS_API_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'Paramètre limit invalide'}, status=400)
+    
+    news = News.objects.filter(published=True).order_by('-created_at', '-id')
+    
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = _decode_news_cursor(cursor)
+        if position is None:
+            return JsonResponse({'error': 'Curseur invalide'}, status=400)
+        created_at, pk = position
+        news = news.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    
+    # Seulement les 151 premiers caractères du contenu pour calculer l'extrait
+    columns = {'id', 'created_at'}
+    for field in fields:
+        columns.update(NEWS_API_FIELDS[field])
+    if 'content_head' in columns:
+        columns.discard('content_head')
+        news = news.annotate(content_head=Substr('content', 1, 151))
+        columns.add('content_head')
+    
+    return news.values(*columns)[:limit + 1], fields, limit
+
+
+def news_api_page(rows, fields, limit):
+    """Corps de la réponse d'api_news à partir des ``limit + 1`` lignes lues"""
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_next:
+        next_cursor = _encode_news_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    
+    return {
+        'news': [_serialize_news_row(row, fields) for row in rows],
+        'next_cursor': next_cursor,
+    }
+
+
+def stream_news_page(rows, fields, limit, asynchronous=False):
+    """
+    Variante en flux de api_news : le curseur suivant est écrit après la
+    liste. ``asynchronous`` lit les lignes avec ``aiterator()`` (vue ASGI).
+    """
+    state = {'count': 0, 'last': None, 'has_next': False}
     
-    return JsonResponse({'news': data})
\ No newline at end of file
+    def accept(row):
+        if state['count'] == limit:
+            state['has_next'] = True
+            return False
+        state['count'] += 1
+        state['last'] = row
+        return True
+    
+    def items():
+        for row in rows.iterator(chunk_size=iterator_chunk_size()):
+            if not accept(row):
+                break
+            yield _serialize_news_row(row, fields)
+    
+    async def aitems():
+        async for row in rows.aiterator(chunk_size=iterator_chunk_size()):
+            if not accept(row):
+                break
+            yield _serialize_news_row(row, fields)
+    
+    def extra():
+        next_cursor = None
+        if state['has_next']:
+            next_cursor = _encode_news_cursor(state['last']['created_at'], state['last']['id'])
+        return {'next_cursor': next_cursor}
+    
+    return StreamingJsonResponse(aitems() if asynchronous else items(), 'news', extra=extra)
+
+
+@query_budget(2)
+@staff_member_required
+def api_profiling(request):
+    """Percentiles des mesures par vue (middleware REQUEST_PROFILING), réservé à l'équipe"""
+    return JsonResponse({
+        'enabled': getattr(settings, 'REQUEST_PROFILING', False),
+        'views': get_profile_stats(),
+    })